@@ -0,0 +1,101 @@
+"""
+compares the numpy and the numba backend of the clustering and matrix kernels,
+first that both give the same results, then how long they take.
+
+    python benchmarks/backends.py
+
+without numba the kernels run as plain python, the results are still compared
+(that's slow, so use a few events only), but the timings don't mean anything
+"""
+import os
+import sys
+import numpy as np
+from time import perf_counter
+
+# runs from the checkout, without installing rootable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rootable.common import backend, genCluster, extractMatrix, genLadder, numbaAvailable
+from rootable.detectors.generateMatrices import GenerateMatrices
+
+
+def randomLadder(rng: np.random.Generator, numClusters: int = 40, size: tuple = (250, 768)) -> tuple:
+    """
+    blobs of a few pixels around random centers, like the digits of a single sensor
+    """
+    centers = np.column_stack((rng.integers(0, size[0], numClusters), rng.integers(0, size[1], numClusters)))
+    pixels = np.repeat(centers, 6, axis=0) + rng.integers(-2, 3, (6 * numClusters, 2))
+    pixels = np.unique(np.clip(pixels, 0, np.array(size) - 1), axis=0)
+    pixels = pixels[rng.permutation(len(pixels))]
+    charges = rng.integers(1, 255, len(pixels))
+    return pixels[:, 0], pixels[:, 1], charges
+
+
+def randomClusters(rng: np.random.Generator, numClusters: int) -> tuple:
+    """
+    jagged columns as they come out of the digits stage
+    """
+    sizes = rng.integers(1, 12, numClusters)
+    columns = [np.empty(numClusters, dtype=object) for _ in range(3)]
+    for i, size in enumerate(sizes):
+        columns[0][i] = rng.integers(0, 255, size)
+        columns[1][i] = rng.integers(10, 20, size)
+        columns[2][i] = rng.integers(10, 20, size)
+    return columns
+
+
+def run(name: str, function, *args) -> tuple:
+    backend._backend = name
+    start = perf_counter()
+    result = function(*args)
+    return result, perf_counter() - start
+
+
+def clusters(ladders: list) -> list:
+    return [[np.array(cluster) for cluster in genCluster(*ladder, size=(250, 768))] for ladder in ladders]
+
+
+def matrices(ladders: list) -> list:
+    results = []
+    for uCells, vCells, charges in ladders:
+        ladder = genLadder(uCells, vCells, charges)
+        for u, v in zip(uCells[:20], vCells[:20]):
+            results.append(extractMatrix(ladder, u, v, eventNumber=0))
+    return results
+
+
+def windows(columns: list, order: str) -> np.ndarray:
+    return GenerateMatrices().get(*columns, order=order)['matrix']
+
+
+def same(first, second) -> bool:
+    if isinstance(first, (list, tuple)):
+        return len(first) == len(second) and all(same(a, b) for a, b in zip(first, second))
+    return np.array_equal(first, second)
+
+
+if __name__ == '__main__':
+    compiled = numbaAvailable()
+    numEvents = 200 if compiled else 10
+    rng = np.random.default_rng(42)
+    ladders = [randomLadder(rng) for _ in range(numEvents)]
+    columns = randomClusters(rng, 5000 * numEvents // 10)
+
+    tasks = {'genCluster': (clusters, ladders),
+             'extractMatrix': (matrices, ladders),
+             'GenerateMatrices uv': (lambda columns: windows(columns, 'uv'), columns),
+             'GenerateMatrices vu': (lambda columns: windows(columns, 'vu'), columns)}
+
+    if not compiled:
+        print('numba is not installed, the kernels run as plain python, only the results are compared')
+    failed = False
+    for task, (function, data) in tasks.items():
+        if compiled:
+            # the first call compiles, that's not timed
+            run('numba', function, data[:1])
+        expected, numpyTime = run('numpy', function, data)
+        result, numbaTime = run('numba', function, data)
+        equal = same(expected, result)
+        failed = failed or not equal
+        print(f'{task:<22} numpy {numpyTime * 1000:9.1f} ms   numba {numbaTime * 1000:9.1f} ms   {"same" if equal else "DIFFERENT"}')
+    backend._backend = None
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,64 @@
+"""
+how long it takes to import rootable and to set up the loaders, every import is
+timed in a fresh interpreter, so nothing is cached from a previous run.
+
+    python benchmarks/startup.py
+
+uproot should only be imported, once the first file is opened, and the detector
+tables (geometry, pitch fits, branch names) should only be built once per process
+"""
+import os
+import subprocess
+import sys
+from time import perf_counter
+
+# runs from the checkout, without installing rootable, the fresh interpreters get the path too
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+environment = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, (root, os.environ.get('PYTHONPATH'))))}
+
+
+def importTime(statement: str, repeats: int = 5) -> float:
+    """
+    the best time of 'repeats' fresh interpreters, each running the statement once
+    """
+    script = f'from time import perf_counter\nstart = perf_counter()\n{statement}\nprint(perf_counter() - start)'
+    return min(float(subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True, env=environment).stdout) for _ in range(repeats))
+
+
+def instantiate(cls: type, repeats: int = 100) -> tuple[float, float]:
+    """
+    the time of the first instance and the average time of the ones after it
+    """
+    start = perf_counter()
+    cls()
+    first = perf_counter() - start
+    start = perf_counter()
+    for _ in range(repeats):
+        cls()
+    return first, (perf_counter() - start) / repeats
+
+
+if __name__ == '__main__':
+    baseline = importTime('import numpy')
+    print(f'import numpy:    {1e3 * baseline:7.1f} ms')
+    print(f'import rootable: {1e3 * importTime("import rootable"):7.1f} ms')
+    print(f'import uproot:   {1e3 * importTime("import uproot"):7.1f} ms')
+
+    loaded = subprocess.run([sys.executable, '-c', "import sys, rootable; print('uproot' in sys.modules)"],
+                            capture_output=True, text=True, check=True, env=environment).stdout.strip()
+    print(f'uproot imported by rootable: {loaded}')
+
+    from rootable import Rootable
+    from rootable.detectors import PXD
+    for cls in (PXD, Rootable):
+        first, repeated = instantiate(cls)
+        print(f'{cls.__name__ + "()":11s} first: {1e3 * first:7.3f} ms, after that: {1e3 * repeated:7.3f} ms')
+
+    # the tables are built on their first use, the instances after that share them
+    pxd = PXD()
+    start = perf_counter()
+    pxd.clusterCoordinates, pxd.clustersFromDigits, pxd.mcToClusters, pxd.mcToDigits, pxd.generateMatrices
+    print(f'building the pxd tables: {1e3 * (perf_counter() - start):7.3f} ms')
+    print(f'shared tables: {PXD().geometry is pxd.geometry and PXD().clustersFromDigits is pxd.clustersFromDigits}')
+    sys.exit(0 if loaded == 'False' else 1)
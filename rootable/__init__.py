@@ -1,2 +1,5 @@
 from .rootable import Rootable
+from .asyncRootable import AsyncRootable
+from .common import CancelToken, Cancelled, setBackend, getBackend
+from .mapReduce import mapreduce
 from . import detectors
\ No newline at end of file
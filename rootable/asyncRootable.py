@@ -0,0 +1,122 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import AsyncIterator, Callable
+from .rootable import Rootable
+from .common import FancyDict, Histogram
+
+
+# one bounded pool is shared by all instances, so that many concurrent requests
+# cannot spawn an unbounded number of threads
+_sharedExecutor = None
+
+
+def sharedExecutor() -> ThreadPoolExecutor:
+    global _sharedExecutor
+    if _sharedExecutor is None:
+        _sharedExecutor = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1), thread_name_prefix='rootable')
+    return _sharedExecutor
+
+
+class AsyncRootable:
+    """
+    an asyncio front-end for Rootable. every call is handed over to a bounded thread
+    pool, so that the uproot i/o and the numpy work don't block the event loop.
+    uproot and numpy release the GIL while decompressing and crunching numbers, so
+    requests on different files overlap. calls on the same instance are serialized,
+    because the underlying Rootable is not thread safe, the results are the ones of
+    the synchronous API.
+    """
+    def __init__(self, rootable: Rootable | None = None, executor: Executor | None = None, maxWorkers: int | None = None) -> None:
+        self.rootable = rootable if rootable is not None else Rootable()
+
+        # a private pool is only created, if a size was asked for
+        self.ownsExecutor = executor is None and maxWorkers is not None
+        if self.ownsExecutor:
+            executor = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix='rootable')
+        self.executor = executor if executor is not None else sharedExecutor()
+        self._lock = asyncio.Lock()
+
+    async def _run(self, function: Callable, *args, **kwargs):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(function, *args, **kwargs))
+
+    async def __aenter__(self) -> 'AsyncRootable':
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.ownsExecutor:
+            self.executor.shutdown(wait=False)
+
+    @property
+    def data(self) -> dict:
+        return self.rootable.data
+
+    def __getitem__(self, index):
+        return self.rootable[index]
+
+    def __len__(self) -> int:
+        return len(self.rootable)
+
+    async def open(self, *fileNames: str, **kwargs) -> None:
+        await self._run(self.rootable.open, *fileNames, **kwargs)
+
+    async def load(self, columns: list, **kwargs) -> None:
+        await self._run(self.rootable.load, columns, **kwargs)
+
+    async def append(self, *fileNames: str, **kwargs) -> None:
+        await self._run(self.rootable.append, *fileNames, **kwargs)
+
+    async def getClusters(self, **kwargs) -> None:
+        await self._run(self.rootable.getClusters, **kwargs)
+
+    async def getDigits(self, **kwargs) -> None:
+        await self._run(self.rootable.getDigits, **kwargs)
+
+    async def getMatrices(self, **kwargs) -> None:
+        await self._run(self.rootable.getMatrices, **kwargs)
+
+    async def getShapeFeatures(self, **kwargs) -> None:
+        await self._run(self.rootable.getShapeFeatures, **kwargs)
+
+    async def getCoordinates(self, **kwargs) -> None:
+        await self._run(self.rootable.getCoordinates, **kwargs)
+
+    async def getSphericals(self, **kwargs) -> None:
+        await self._run(self.rootable.getSphericals, **kwargs)
+
+    async def getLayers(self, **kwargs) -> None:
+        await self._run(self.rootable.getLayers, **kwargs)
+
+    async def getMCData(self, **kwargs) -> None:
+        await self._run(self.rootable.getMCData, **kwargs)
+
+    async def where(self, *conditions: str, **kwargs) -> FancyDict:
+        return await self._run(self.rootable.where, *conditions, **kwargs)
+
+    async def fillHistograms(self, *histograms: Histogram, **kwargs) -> tuple[Histogram, ...]:
+        return await self._run(self.rootable.fillHistograms, *histograms, **kwargs)
+
+    async def save(self, path: str) -> None:
+        await self._run(self.rootable.save, path)
+
+    async def openStore(self, path: str, **kwargs) -> None:
+        await self._run(self.rootable.openStore, path, **kwargs)
+
+    async def aiterate(self, *stages: str, **kwargs) -> AsyncIterator[FancyDict]:
+        """
+        the asynchronous version of Rootable.iterate, every batch is loaded inside
+        the thread pool, the event loop stays free in between
+        """
+        batches = self.rootable.iterate(*stages, **kwargs)
+        done = object()
+        while True:
+            batch = await self._run(next, batches, done)
+            if batch is done:
+                break
+            yield batch
@@ -1,4 +1,19 @@
+from .categorical import Categorical
+from .lazyColumns import LazyColumns
 from .fancyDict import FancyDict
 from .spherical import calcSpherical
-from .mcLists import fillMCList
-from .extractMatrix import extractMatrix, genCluster, genMatrices
+from .mcLists import fillMCList, gatherMCData, selectReferences
+from .backend import setBackend, getBackend, numbaAvailable
+from .extractMatrix import extractMatrix, genCluster, genLadder, genMatrices
+from .progress import Progress, CancelToken, Cancelled
+from .background import inBackground
+from .prefetch import PrefetchLoader, TreeChunk
+from .treeView import TreeView, entryNumbers
+from .eventIndex import EventIndex
+from .columnStore import ColumnStore
+from .memoryBudget import MemoryBudget, SpillBuffer
+from .groupBy import GroupBy
+from .histogram import Histogram
+from .spatialIndex import SpatialIndex
+from .batchLoader import BatchLoader
+from .dataFrame import toDataFrame
@@ -0,0 +1,69 @@
+import os
+import warnings
+from typing import Callable
+
+
+# the backend of the hot loops, 'numpy' or 'numba', it's taken from the environment
+# variable ROOTABLE_BACKEND and can be changed with 'setBackend'
+backends = ('numpy', 'numba')
+_backend = None
+
+
+def numbaAvailable() -> bool:
+    try:
+        import numba
+    except ImportError:
+        return False
+    return True
+
+
+def setBackend(name: str) -> str:
+    """
+    picks the backend for the clustering and matrix kernels, 'auto' takes numba, if
+    it's installed. asking for numba without having it falls back to numpy with a
+    warning. returns the backend, that is used
+    """
+    global _backend
+    if name not in backends + ('auto',):
+        raise ValueError(f"unknown backend '{name}', choose from {backends + ('auto',)}")
+    if name == 'auto':
+        name = 'numba' if numbaAvailable() else 'numpy'
+    elif name == 'numba' and not numbaAvailable():
+        warnings.warn("numba isn't installed, falling back to the numpy backend")
+        name = 'numpy'
+    _backend = name
+    return name
+
+
+def getBackend() -> str:
+    if _backend is None:
+        setBackend(os.environ.get('ROOTABLE_BACKEND', 'numpy').lower())
+    return _backend
+
+
+def useNumba() -> bool:
+    return getBackend() == 'numba'
+
+
+def jit(function: Callable) -> Callable:
+    """
+    compiles the function with numba on its first call, the compiled version is cached
+    on disk, so only the very first run pays for the compilation. without numba the
+    plain python function is returned (that's slow, it's only meant for checking)
+    """
+    compiled = None
+
+    def wrapper(*args):
+        nonlocal compiled
+        if compiled is None:
+            try:
+                import numba
+                compiled = numba.njit(cache=True, nogil=True)(function)
+            except ImportError:
+                compiled = function
+        return compiled(*args)
+
+    wrapper.__name__ = function.__name__
+    wrapper.__doc__ = function.__doc__
+    wrapper.python = function
+    return wrapper
@@ -0,0 +1,52 @@
+import threading
+from queue import Queue, Empty, Full
+from typing import Iterable, Iterator
+
+
+def _produce(items: Iterable, queue: Queue, stop: threading.Event) -> None:
+    try:
+        for item in items:
+            while not stop.is_set():
+                try:
+                    queue.put(item, timeout=0.1)
+                    break
+                except Full:
+                    continue
+            if stop.is_set():
+                return
+    except BaseException as error:
+        queue.put(error)
+        return
+    queue.put(None)
+
+
+def inBackground(items: Iterable, prefetch: int = 2) -> Iterator:
+    """
+    runs the iteration over 'items' in a background thread, which keeps at most
+    'prefetch' of them ready in a queue. errors of the producer are raised in the
+    consumer. 'items' should be lazy (a generator), so that the work happens in the
+    thread and not while this is called. None can't be handed out, it ends the queue
+    """
+    assert prefetch > 0, 'at least one item has to be prefetched'
+    queue = Queue(maxsize=prefetch)
+    stop = threading.Event()
+    producer = threading.Thread(target=_produce, args=(items, queue, stop), daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = queue.get()
+            if item is None:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # the consumer might stop early (cancelled or an error), the producer is
+        # told to stop and the queue is emptied, so that it doesn't block
+        stop.set()
+        while producer.is_alive():
+            try:
+                queue.get(timeout=0.1)
+            except Empty:
+                pass
+        producer.join()
@@ -0,0 +1,145 @@
+import numpy as np
+from typing import Iterable
+from .columnStore import ColumnStore
+from .background import inBackground
+
+
+class BatchLoader:
+    """
+    hands out (matrices, features, labels) batches for training, straight from the
+    columns, no per row dicts are made. every epoch the rows are shuffled by one
+    permutation of the indices, the batches are gathered with fancy indexing (sorted
+    inside of a batch, which is a lot faster on memory maps) and a background thread
+    keeps 'prefetch' batches ready.
+    sources: a Rootable, FancyDict, dict of columns or the path of a store written by
+             'Rootable.save', or a list of them (e.g. one store per file)
+    features: list = columns, that are stacked into the feature array (rows, features)
+    labels: str or list = the label column(s), e.g. 'pdg' or ['momentumX', 'momentumY', 'momentumZ']
+    matrix: str = the matrix column, None if there are no matrices
+    shard: tuple = (worker, workers), every worker only gets its part of the data, with
+                   several sources these are split up, otherwise the files (by 'fileIndex')
+    """
+    def __init__(self, sources, batchSize: int = 256, features: list | None = None, labels: str | list | None = 'pdg', matrix: str | None = 'matrix',
+                 shuffle: bool = True, seed: int | None = None, dropLast: bool = False, prefetch: int = 2, shard: tuple | None = None, dtype: np.dtype = np.float32) -> None:
+        assert batchSize > 0, 'batch size has to be positive'
+        assert prefetch > 0, 'at least one batch has to be prefetched'
+        self.batchSize = batchSize
+        self.features = [] if features is None else [features] if isinstance(features, str) else list(features)
+        self.labels = labels
+        self.matrix = matrix
+        self.shuffle = shuffle
+        self.seed = seed
+        self.dropLast = dropLast
+        self.prefetch = prefetch
+        self.dtype = dtype
+        self.epoch = 0
+
+        labelKeys = [] if labels is None else [labels] if isinstance(labels, str) else list(labels)
+        self.keys = list(dict.fromkeys(([matrix] if matrix is not None else []) + self.features + labelKeys))
+
+        sources = list(sources) if isinstance(sources, (list, tuple)) else [sources]
+        worker, workers = shard if shard is not None else (0, 1)
+        assert 0 <= worker < workers, 'the worker has to be one of the workers'
+        splitSources = len(sources) > 1
+        if splitSources:
+            sources = sources[worker::workers]
+        self.columns = [self._open(source) for source in sources]
+
+        # the rows of every source, that belong to this worker, None means all of them
+        self.rows = [None] * len(self.columns)
+        if not splitSources and workers > 1:
+            self.rows = [self._shardRows(self.columns[0], worker, workers)]
+        sizes = [self._numRows(columns) if rows is None else len(rows) for columns, rows in zip(self.columns, self.rows)]
+        self.offsets = np.cumsum([0] + sizes)
+
+    def _open(self, source) -> dict:
+        """
+        the needed columns of a source, stores are opened as memory maps
+        """
+        if isinstance(source, str):
+            store = ColumnStore(source)
+            available = store.readMeta()['columns']
+            return store.read([key for key in self.keys + ['fileIndex'] if key in available], mmap=True)
+        data = getattr(source, 'pxd', source)
+        data = getattr(data, 'data', data)
+        missing = [key for key in self.keys if key not in data]
+        if missing:
+            raise KeyError(f'the columns {missing} are missing')
+        return {key: data[key] for key in self.keys + ['fileIndex'] if key in data}
+
+    def _numRows(self, columns: dict) -> int:
+        return len(next(iter(columns.values()))) if columns else 0
+
+    def _shardRows(self, columns: dict, worker: int, workers: int) -> np.ndarray:
+        """
+        the rows of every 'workers'-th file, without file indices the rows are cut
+        into blocks
+        """
+        if 'fileIndex' in columns:
+            return np.nonzero(np.asarray(columns['fileIndex']) % workers == worker)[0]
+        return np.array_split(np.arange(self._numRows(columns)), workers)[worker]
+
+    @property
+    def numRows(self) -> int:
+        return int(self.offsets[-1])
+
+    def __len__(self) -> int:
+        if self.dropLast:
+            return self.numRows // self.batchSize
+        return -(-self.numRows // self.batchSize)
+
+    def setEpoch(self, epoch: int) -> None:
+        """
+        with a seed every epoch has its own, reproducible permutation
+        """
+        self.epoch = epoch
+
+    def _order(self) -> np.ndarray:
+        if not self.shuffle:
+            return np.arange(self.numRows)
+        rng = np.random.default_rng(None if self.seed is None else (self.seed, self.epoch))
+        return rng.permutation(self.numRows)
+
+    def _stack(self, columns: dict, keys: list, rows: np.ndarray, dtype: np.dtype | None = None) -> np.ndarray:
+        if not keys:
+            return np.empty((len(rows), 0), dtype=dtype or self.dtype)
+        stacked = np.column_stack([np.asarray(columns[key][rows]) for key in keys])
+        return stacked if dtype is None else stacked.astype(dtype, copy=False)
+
+    def _gather(self, indices: np.ndarray) -> tuple:
+        """
+        the batch of the given global row indices, they're sorted, so every source is
+        read front to back once
+        """
+        indices = np.sort(indices)
+        bounds = np.searchsorted(indices, self.offsets)
+        parts = []
+        for i, (columns, rows) in enumerate(zip(self.columns, self.rows)):
+            local = indices[bounds[i]:bounds[i + 1]] - self.offsets[i]
+            if len(local) == 0:
+                continue
+            local = local if rows is None else rows[local]
+            matrices = np.asarray(columns[self.matrix][local]).astype(self.dtype, copy=False) if self.matrix is not None else None
+            features = self._stack(columns, self.features, local, self.dtype)
+            if self.labels is None:
+                labels = None
+            elif isinstance(self.labels, str):
+                labels = np.asarray(columns[self.labels][local])
+            else:
+                labels = self._stack(columns, list(self.labels), local)
+            parts.append((matrices, features, labels))
+
+        if len(parts) == 1:
+            return parts[0]
+        return tuple(None if part[0] is None else np.concatenate(part) for part in zip(*parts))
+
+    def _batches(self) -> Iterable[tuple]:
+        order = self._order()
+        stopAt = len(self) * self.batchSize if self.dropLast else self.numRows
+        for start in range(0, stopAt, self.batchSize):
+            yield self._gather(order[start:start + self.batchSize])
+
+    def __iter__(self) -> Iterable[tuple]:
+        yield from inBackground(self._batches(), self.prefetch)
+        # the next pass over the loader is the next epoch
+        self.epoch += 1
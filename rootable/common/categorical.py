@@ -0,0 +1,142 @@
+import numpy as np
+from numpy.typing import ArrayLike
+from typing import Any, Iterable
+
+
+class Categorical:
+    """
+    a column with only a few different values (file names, detectors), stored as
+    small integer codes into a vocabulary. it behaves like a numpy column for the
+    things the rest of the code does with columns: indexing, masks, len, comparisons
+    (fileName == 'run1' only compares the codes) and np.concatenate, where the
+    vocabularies of the parts get merged and the codes remapped. everything else
+    sees the decoded strings through __array__
+    """
+    def __init__(self, codes: ArrayLike, categories: ArrayLike) -> None:
+        self.codes = np.asarray(codes, dtype=np.int32)
+        self.categories = np.asarray(categories)
+
+    @classmethod
+    def fromValues(cls, values: ArrayLike) -> 'Categorical':
+        values = np.asarray(values)
+        if len(values) == 0:
+            return cls(np.array([], dtype=np.int32), np.array([], dtype=values.dtype if values.dtype.kind == 'U' else str))
+        categories, codes = np.unique(values, return_inverse=True)
+        return cls(codes.reshape(-1), categories)
+
+    @classmethod
+    def full(cls, length: int, value: Any) -> 'Categorical':
+        """
+        one value for all rows, e.g. the file name of all clusters of a file
+        """
+        return cls(np.zeros(length, dtype=np.int32), np.array([value]))
+
+    @classmethod
+    def concatenate(cls, parts: Iterable['Categorical']) -> 'Categorical':
+        """
+        joins the parts, their vocabularies are merged and the codes remapped
+        """
+        parts = list(parts)
+        categories = np.unique(np.concatenate([part.categories for part in parts]))
+        codes = [np.searchsorted(categories, part.categories).astype(np.int32)[part.codes] if len(part.categories) else part.codes for part in parts]
+        return cls(np.concatenate(codes), categories)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.categories.dtype
+
+    @property
+    def shape(self) -> tuple:
+        return self.codes.shape
+
+    @property
+    def ndim(self) -> int:
+        return 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.categories.nbytes
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int | slice | ArrayLike) -> Any:
+        codes = self.codes[index]
+        if np.ndim(codes) == 0:
+            return self.categories[codes]
+        return self.__class__(codes, self.categories)
+
+    def __setitem__(self, index: int | slice | ArrayLike, value: Any) -> None:
+        value = value if isinstance(value, Categorical) else Categorical.fromValues(np.atleast_1d(value))
+        length = len(self.codes)
+        merged = Categorical.concatenate([self, value])
+        self.categories = merged.categories
+        self.codes, codes = merged.codes[:length], merged.codes[length:]
+        self.codes[index] = codes if np.ndim(self.codes[index]) else codes[0]
+
+    def __iter__(self):
+        return iter(self.categories[self.codes])
+
+    def __array__(self, dtype: np.dtype | None = None, copy: bool | None = None) -> np.ndarray:
+        values = self.categories[self.codes]
+        return values if dtype is None else values.astype(dtype)
+
+    def code(self, value: Any) -> int:
+        """
+        the code of a value, -1 if it isn't in the vocabulary
+        """
+        # the vocabulary of a store, that was appended to, isn't sorted anymore
+        matches = np.nonzero(self.categories == value)[0]
+        return int(matches[0]) if len(matches) else -1
+
+    def isin(self, values: Iterable) -> np.ndarray:
+        return np.isin(self.codes, [self.code(value) for value in values])
+
+    def _compare(self, other: Any, equal: bool) -> np.ndarray:
+        if isinstance(other, Categorical):
+            result = np.asarray(self) == np.asarray(other)
+        elif np.ndim(other) == 0:
+            result = self.codes == self.code(other)
+        else:
+            result = np.asarray(self) == np.asarray(other)
+        return result if equal else ~result
+
+    def __eq__(self, other: Any) -> np.ndarray:
+        return self._compare(other, True)
+
+    def __ne__(self, other: Any) -> np.ndarray:
+        return self._compare(other, False)
+
+    __hash__ = None
+
+    @staticmethod
+    def _decode(value: Any) -> Any:
+        if isinstance(value, Categorical):
+            return np.asarray(value)
+        if isinstance(value, (list, tuple)):
+            return type(value)(Categorical._decode(item) for item in value)
+        return value
+
+    def __array_ufunc__(self, ufunc: np.ufunc, method: str, *inputs, **kwargs) -> Any:
+        # equality with a single value only needs the codes
+        if method == '__call__' and ufunc in (np.equal, np.not_equal) and len(inputs) == 2:
+            first, second = inputs
+            if isinstance(second, Categorical):
+                first, second = second, first
+            return first._compare(second, ufunc is np.equal)
+        inputs = tuple(self._decode(value) for value in inputs)
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def __array_function__(self, func, types, args, kwargs) -> Any:
+        # string arrays, that are joined with a categorical, become categoricals too
+        if func is np.concatenate and all(isinstance(part, Categorical) or np.asarray(part).dtype.kind == 'U' for part in args[0]):
+            return Categorical.concatenate(part if isinstance(part, Categorical) else Categorical.fromValues(part) for part in args[0])
+        if func is np.isin and isinstance(args[0], Categorical):
+            return args[0].isin(args[1])
+        return func(*self._decode(args), **{key: self._decode(value) for key, value in kwargs.items()})
+
+    def copy(self) -> 'Categorical':
+        return self.__class__(self.codes.copy(), self.categories.copy())
+
+    def __repr__(self) -> str:
+        return f'Categorical({np.asarray(self[:10]).tolist()}{"..." if len(self) > 10 else ""}, categories={self.categories.tolist()})'
@@ -0,0 +1,176 @@
+import os
+import json
+import numpy as np
+from .categorical import Categorical
+
+
+class ColumnStore:
+    """
+    stores the columns on disk as raw binary files, one per column, next to a small
+    json file with the dtypes and shapes. the columns can be opened as memory maps,
+    so nothing is read until it's used and slicing doesn't copy anything.
+    ragged columns (e.g. the digits, an array per cluster) are stored as the
+    concatenated values plus the offsets of every row, when they're opened every
+    row is a view into the values. categorical columns are stored as their codes,
+    the vocabulary goes into the json file
+    """
+    metaFile = 'meta.json'
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def _file(self, key: str, suffix: str = 'bin') -> str:
+        return os.path.join(self.path, f'{key}.{suffix}')
+
+    def exists(self) -> bool:
+        return os.path.isfile(os.path.join(self.path, self.metaFile))
+
+    def readMeta(self) -> dict:
+        with open(os.path.join(self.path, self.metaFile)) as file:
+            return json.load(file)
+
+    def writeMeta(self, meta: dict) -> None:
+        with open(os.path.join(self.path, self.metaFile), 'w') as file:
+            json.dump(meta, file, indent=1)
+
+    @staticmethod
+    def isRagged(column: np.ndarray) -> bool:
+        return column.dtype == object and all(isinstance(row, np.ndarray) for row in column)
+
+    def write(self, data: dict, attributes: dict | None = None) -> None:
+        """
+        writes all columns, an existing store in the directory is overwritten
+        attributes: dict = anything json serializable, that is stored alongside
+        """
+        os.makedirs(self.path, exist_ok=True)
+        meta = {'rows': None, 'columns': {}, 'attributes': attributes or {}}
+        for key, column in data.items():
+            column = column if isinstance(column, Categorical) else np.asarray(column)
+            if meta['rows'] is None:
+                meta['rows'] = len(column)
+            meta['columns'][key] = self._writeColumn(key, column)
+        meta['rows'] = meta['rows'] or 0
+        self.writeMeta(meta)
+
+    def _writeColumn(self, key: str, column: np.ndarray | Categorical) -> dict:
+        if isinstance(column, Categorical):
+            column.codes.tofile(self._file(key))
+            return {'kind': 'categorical', 'dtype': column.codes.dtype.str, 'shape': [], 'categories': column.categories.tolist()}
+        if column.dtype == object:
+            if not self.isRagged(column):
+                raise TypeError(f"column '{key}' holds python objects, these can't be stored")
+            counts = np.fromiter(map(len, column), dtype=np.int64, count=len(column))
+            offsets = np.concatenate(([0], np.cumsum(counts)))
+            values = np.concatenate(list(column)) if len(column) > 0 else np.array([])
+            values.tofile(self._file(key))
+            offsets.tofile(self._file(key, 'offsets'))
+            return {'kind': 'ragged', 'dtype': values.dtype.str, 'shape': list(values.shape[1:])}
+        np.ascontiguousarray(column).tofile(self._file(key))
+        return {'kind': 'fixed', 'dtype': column.dtype.str, 'shape': list(column.shape[1:])}
+
+    def create(self, key: str, shape: tuple, dtype: np.dtype) -> np.ndarray:
+        """
+        a new fixed column, that is filled in place, it's a writable memory map. the
+        column is added to the store, its rows have to match the other columns
+        """
+        os.makedirs(self.path, exist_ok=True)
+        shape = tuple(int(length) for length in shape)
+        meta = self.readMeta() if self.exists() else {'rows': shape[0], 'columns': {}, 'attributes': {}}
+        if meta['rows'] != shape[0]:
+            raise ValueError(f"the store has {meta['rows']} rows, the column '{key}' {shape[0]}")
+        dtype = np.dtype(dtype)
+        meta['columns'][key] = {'kind': 'fixed', 'dtype': dtype.str, 'shape': list(shape[1:])}
+        self.writeMeta(meta)
+        if int(np.prod(shape)) == 0:
+            open(self._file(key), 'wb').close()
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(self._file(key), dtype=dtype, mode='w+', shape=shape)
+
+    def append(self, data: dict, attributes: dict | None = None) -> None:
+        """
+        adds rows to the end of the store, only the new rows are written, the files
+        of the columns are appended to and the old rows aren't touched. new names of
+        a categorical column go to the end of its vocabulary, so the stored codes stay
+        valid. without a store in the directory, it's written from scratch
+        attributes: dict = replace the stored attributes, if given
+        """
+        if not self.exists():
+            self.write(data, attributes)
+            return
+        meta = self.readMeta()
+        if set(data.keys()) != set(meta['columns'].keys()):
+            raise ValueError(f"the columns {sorted(set(data.keys()) ^ set(meta['columns'].keys()))} don't match the store")
+        rows = None
+        for key, column in data.items():
+            column = column if isinstance(column, Categorical) else np.asarray(column)
+            if rows is None:
+                rows = len(column)
+            meta['columns'][key] = self._appendColumn(key, column, meta['columns'][key], meta['rows'])
+        meta['rows'] += rows or 0
+        if attributes is not None:
+            meta['attributes'] = attributes
+        # the json file is written last, until then the store has its old length
+        self.writeMeta(meta)
+
+    @staticmethod
+    def _appendFile(fileName: str, array: np.ndarray) -> None:
+        with open(fileName, 'ab') as file:
+            np.ascontiguousarray(array).tofile(file)
+
+    def _appendColumn(self, key: str, column: np.ndarray | Categorical, info: dict, rows: int) -> dict:
+        dtype = np.dtype(info['dtype'])
+        if info['kind'] == 'categorical':
+            column = column if isinstance(column, Categorical) else Categorical.fromValues(column)
+            categories = list(info['categories'])
+            categories += [category for category in column.categories.tolist() if category not in categories]
+            lookup = np.array([categories.index(category) for category in column.categories.tolist()], dtype=dtype)
+            self._appendFile(self._file(key), lookup[column.codes] if len(lookup) else column.codes.astype(dtype))
+            return {**info, 'categories': categories}
+
+        if info['kind'] == 'ragged':
+            if len(column) > 0 and not self.isRagged(column):
+                raise TypeError(f"column '{key}' was stored as a ragged column")
+            counts = np.fromiter(map(len, column), dtype=np.int64, count=len(column))
+            lastOffset = np.fromfile(self._file(key, 'offsets'), dtype=np.int64, count=1, offset=rows * 8)[0]
+            if len(column) > 0:
+                self._appendFile(self._file(key), np.concatenate(list(column)).astype(dtype, copy=False))
+            self._appendFile(self._file(key, 'offsets'), lastOffset + np.cumsum(counts))
+            return info
+
+        if list(column.shape[1:]) != info['shape']:
+            raise ValueError(f"column '{key}' has the shape {column.shape[1:]} instead of {tuple(info['shape'])}")
+        self._appendFile(self._file(key), column.astype(dtype, copy=False))
+        return info
+
+    def read(self, keys: list | None = None, mmap: bool = True) -> dict:
+        """
+        opens the columns, as memory maps or read into memory
+        keys: list = the columns to open, defaults to all of them
+        """
+        meta = self.readMeta()
+        keys = meta['columns'].keys() if keys is None else keys
+        return {key: self._readColumn(key, meta['columns'][key], meta['rows'], mmap) for key in keys}
+
+    def _array(self, fileName: str, dtype: np.dtype, shape: tuple, mmap: bool) -> np.ndarray:
+        if shape[0] == 0 or os.path.getsize(fileName) == 0:
+            return np.empty(shape, dtype=dtype)
+        if mmap:
+            return np.memmap(fileName, dtype=dtype, mode='r', shape=shape)
+        return np.fromfile(fileName, dtype=dtype).reshape(shape)
+
+    def _readColumn(self, key: str, info: dict, rows: int, mmap: bool) -> np.ndarray | Categorical:
+        dtype = np.dtype(info['dtype'])
+        if info['kind'] == 'fixed':
+            return self._array(self._file(key), dtype, (rows, *info['shape']), mmap)
+        if info['kind'] == 'categorical':
+            codes = self._array(self._file(key), dtype, (rows,), mmap)
+            return Categorical(codes, np.array(info['categories'], dtype=str))
+
+        offsets = self._array(self._file(key, 'offsets'), np.int64, (rows + 1,), mmap)
+        values = self._array(self._file(key), dtype, (int(offsets[-1]), *info['shape']), mmap)
+        # plain views into the memory map, a view, that is a memmap itself, takes a few times the memory
+        values = values.view(np.ndarray)
+        column = np.empty(rows, dtype=object)
+        for i in range(rows):
+            column[i] = values[offsets[i]:offsets[i + 1]]
+        return column
@@ -0,0 +1,90 @@
+import numpy as np
+from .categorical import Categorical
+
+
+# string columns, that only hold a few different values, if they aren't categoricals already
+categoricalColumns = ('fileName', 'detector')
+
+
+def _explode(key: str, column: np.ndarray) -> dict:
+    """
+    one column per entry of a fixed size array column, e.g. matrix_0_0 ... matrix_8_8,
+    the columns are strided views of the array, nothing is copied
+    """
+    columns = {}
+    for position in np.ndindex(*column.shape[1:]):
+        name = '_'.join([key, *map(str, position)])
+        columns[name] = column[(slice(None), *position)]
+    return columns
+
+
+def _ragged(column: np.ndarray) -> np.ndarray:
+    """
+    a fixed size array column as an object column, every row is a view
+    """
+    ragged = np.empty(len(column), dtype=object)
+    for i, row in enumerate(column):
+        ragged[i] = row
+    return ragged
+
+
+def _listColumn(column: np.ndarray):
+    """
+    an object column of arrays as an arrow list column, the values are concatenated
+    once and the offsets are taken from the lengths, returns None without pyarrow
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+    if not all(isinstance(row, np.ndarray) and row.ndim == 1 for row in column):
+        return None
+    import pandas as pd
+    counts = np.fromiter(map(len, column), dtype=np.int64, count=len(column))
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    values = np.concatenate(list(column)) if len(column) > 0 else np.array([], dtype=np.int64)
+    array = pa.LargeListArray.from_arrays(pa.array(offsets), pa.array(values))
+    return pd.arrays.ArrowExtensionArray(array)
+
+
+def toDataFrame(data: dict, popMatrices: bool | str = True):
+    """
+    turns the columns into a pandas dataframe, the numeric columns are handed
+    over without a copy, the file names and detectors become categoricals.
+    popMatrices: bool or str = True/'drop' drops the matrices, 'explode' makes a column
+                               per pixel (matrix_i_j), False/'ragged' keeps one column
+                               with a 2d array per row
+    the digits become list columns, if pyarrow is installed, otherwise they stay
+    object columns
+    """
+    try:
+        import pandas as pd
+    except ImportError:
+        raise ImportError("pandas is needed for dataframes, install it with 'pip install rootable[pandas]'") from None
+
+    mode = {True: 'drop', False: 'ragged'}.get(popMatrices, popMatrices)
+    if mode not in ('drop', 'explode', 'ragged'):
+        raise ValueError(f"unknown option '{popMatrices}' for the matrices, choose from True, False, 'drop', 'explode' or 'ragged'")
+
+    columns = {}
+    for key, column in data.items():
+        if isinstance(column, Categorical):
+            # the codes and the vocabulary are handed over as they are
+            columns[key] = pd.Categorical.from_codes(column.codes, categories=column.categories)
+            continue
+        column = np.asarray(column)
+        if key == 'matrix':
+            if mode == 'explode':
+                columns.update(_explode(key, column))
+            elif mode == 'ragged':
+                columns[key] = _ragged(column) if column.dtype != object else column
+        elif key in categoricalColumns:
+            columns[key] = pd.Categorical(column)
+        elif column.dtype == object:
+            listColumn = _listColumn(column)
+            columns[key] = column if listColumn is None else listColumn
+        elif column.ndim > 1:
+            columns.update(_explode(key, column))
+        else:
+            columns[key] = column
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,51 @@
+import numpy as np
+from numpy.typing import ArrayLike
+
+
+class EventIndex:
+    """
+    a per event offset table over the cluster rows, offsets[k] is the first and
+    offsets[k + 1] - 1 the last row of event k, so looking up an event is O(1).
+    as long as the rows are ordered by event (which is how they are read), the
+    rows of an event are a slice and every column comes back as a view. if the
+    order is mixed up (e.g. ROI unselected clusters are appended at the end), the
+    table is built over the sorted rows and the lookup returns row indices instead,
+    then the columns are copied
+    """
+    def __init__(self, eventIDs: ArrayLike) -> None:
+        eventIDs = np.asarray(eventIDs)
+        self.numRows = len(eventIDs)
+        if self.numRows > 0 and np.any(eventIDs[1:] < eventIDs[:-1]):
+            self.order = np.argsort(eventIDs, kind='stable')
+            eventIDs = eventIDs[self.order]
+        else:
+            self.order = None
+        self.numEvents = int(eventIDs[-1]) + 1 if self.numRows > 0 else 0
+        self.offsets = np.searchsorted(eventIDs, np.arange(self.numEvents + 1), side='left')
+
+    def __len__(self) -> int:
+        return self.numEvents
+
+    def rows(self, event: int) -> slice | np.ndarray:
+        """
+        the rows of one event, events without clusters have no rows
+        """
+        if not 0 <= event < self.numEvents:
+            return slice(0, 0)
+        return self._rows(self.offsets[event], self.offsets[event + 1])
+
+    def rowRange(self, events: slice) -> slice | np.ndarray:
+        """
+        the rows of a range of events, the step of the slice has to be 1
+        """
+        start, stop, step = events.indices(self.numEvents)
+        if step != 1:
+            raise ValueError('only slices with a step of 1 are supported')
+        if stop <= start:
+            return slice(0, 0)
+        return self._rows(self.offsets[start], self.offsets[stop])
+
+    def _rows(self, start: int, stop: int) -> slice | np.ndarray:
+        if self.order is None:
+            return slice(int(start), int(stop))
+        return self.order[start:stop]
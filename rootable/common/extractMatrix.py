@@ -1,5 +1,7 @@
 import sys
 import numpy as np
+from .backend import useNumba
+from .kernels import labelClusters, matrixWindow
 
 
 def extractMatrix(matrixLadder: np.ndarray, uCellID: int, vCellID: int, eventNumber, matrixSize: tuple = (9,9)) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
@@ -12,6 +14,9 @@ def extractMatrix(matrixLadder: np.ndarray, uCellID: int, vCellID: int, eventNum
     assert matrixSize[0] < 250, 'matrix size in u is larger than the ladder'
     assert matrixSize[1] < 768, 'matrix size in v is larger than the ladder'
 
+    if useNumba():
+        return _extractMatrixCompiled(matrixLadder, uCellID, vCellID, matrixSize)
+
     uCenter, vCenter = matrixSize[0] // 2, matrixSize[1] // 2
 
     uLower = np.clip(uCellID - uCenter, a_min=0, a_max=matrixLadder.shape[0] - matrixSize[0])
@@ -58,6 +63,20 @@ def extractMatrix(matrixLadder: np.ndarray, uCellID: int, vCellID: int, eventNum
     return matrix, globalUPositions, globalVPositions, seedUGlobal, seedVGlobal
 
 
+def _extractMatrixCompiled(matrixLadder: np.ndarray, uCellID: int, vCellID: int, matrixSize: tuple) -> tuple:
+    """
+    extractMatrix with the search for the window in a compiled kernel, the result is the same
+    """
+    uLower, uUpper, vLower, vUpper, uSize, vSize = matrixWindow(matrixLadder, int(uCellID), int(vCellID), matrixSize[0], matrixSize[1])
+    assert uLower >= 0 or uSize < matrixLadder.shape[0], 'matrix size in u is larger than the ladder'
+    assert uLower >= 0 or vSize < matrixLadder.shape[1], 'matrix size in v is larger than the ladder'
+
+    matrix = matrixLadder[uLower:uUpper, vLower:vUpper]
+    nonZeroPositions = np.nonzero(matrix)
+    seedChargePos = np.unravel_index(matrix.argmax(), matrix.shape)
+    return matrix, nonZeroPositions[0] + uLower, nonZeroPositions[1] + vLower, seedChargePos[0] + uLower, seedChargePos[1] + vLower
+
+
 def genLadder(uCells, vCells, charges, size=(250,768)):
     ladder = np.zeros(size, dtype=int)
     ladder[uCells, vCells] = charges
@@ -70,8 +89,16 @@ def genCluster(uCells, vCells, charges, size=(250,786)):
     and then it traveses, using recursion, the ladder to find all connected pixels
     the output format is a bit stupid and I apologize for that.
     the first index counts the cluster, the first/second coloumn are u/v cells
-    and the last coloumn are the charges
+    and the last coloumn are the charges.
+    with the numba backend the clusters are labelled in a compiled loop, they come
+    in the same order, but every cluster is a (pixels, 3) array
     """
+    if useNumba():
+        uCells, vCells, charges = (np.asarray(column, dtype=np.int64) for column in (uCells, vCells, charges))
+        uOrdered, vOrdered, chargesOrdered, sizes = labelClusters(uCells, vCells, charges, size[0], size[1])
+        pixels = np.column_stack((uOrdered, vOrdered, chargesOrdered))
+        return np.split(pixels, np.cumsum(sizes)[:-1]) if len(sizes) > 0 else []
+
     ladder = genLadder(uCells, vCells, charges, size)
     # Initialize list to keep track of the clusters
     clusters = []
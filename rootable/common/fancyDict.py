@@ -2,6 +2,10 @@ import numpy as np
 from numpy.typing import ArrayLike
 from typing import Iterable, Any
 import re
+import ast
+from .groupBy import GroupBy
+from .lazyColumns import LazyColumns
+from .categorical import Categorical
 
 
 class FancyDict:
@@ -15,6 +19,8 @@ class FancyDict:
             """
             if isinstance(index, str):
                 return self.data[index]
+            if isinstance(self.data, LazyColumns):
+                return self.__class__(self.data.take(index))
             return self.__class__({key: value[index] for key, value in self.data.items()})
 
     def __setitem__(self, index: str | int | ArrayLike, value: dict | Any) -> None:
@@ -44,6 +50,8 @@ class FancyDict:
         """
         if keyWord in self.data:
             self.data[keyWord] = np.concatenate((self.data[keyWord], value))
+        elif isinstance(value, Categorical):
+            self.data[keyWord] = value
         else:
             self.data[keyWord] = np.array(value)
 
@@ -56,27 +64,34 @@ class FancyDict:
         for key in value:
             self.data[key] = np.concatenate((self.data[key], value[key]), axis=axis)
 
-    def where(self, *conditions: str) -> dict:
+    @staticmethod
+    def parseCondition(condition: str) -> tuple[str, str, str]:
         """
-        Filters the data based on the provided conditions.
-        :param conditions: List of conditions as strings for filtering. The keys should be the names of the data fields, and the conditions should be in a format that can be split into key, operator, and value.
-        :return: Instance of the class containing the filtered data.
+        splits a condition like 'clsSize > 1' into column, operator and value
         """
-        filteredData = self.data.copy()
-        mask = np.ones(len(next(iter(self.data.values()))), dtype=bool)  # Initial mask allowing all elements
+        match = re.match(r'(\w+)\s*([<>=]=?| in )\s*(.+)', condition)
+        if match is None:
+            raise ValueError(f"Invalid condition: {condition}")
+        key, op, value = match.groups()
+        return key, op.strip(), value
+
+    def mask(self, *conditions: str) -> np.ndarray:
+        """
+        the boolean mask of the rows, that fulfill all conditions
+        """
+        mask = np.ones(self.numClusters, dtype=bool)  # Initial mask allowing all elements
 
         # Applying the conditions to create the mask
         for condition in conditions:
-            match = re.match(r'(\w+)\s*([<>=]=?| in )\s*(.+)', condition)
-            if match is None:
-                raise ValueError(f"Invalid condition: {condition}")
-
-            key, op, value = match.groups()
-            op = op.strip()  # remove any leading and trailing spaces
+            key, op, value = self.parseCondition(condition)
 
             if op == 'in':
-                value = eval(value)
-                mask &= np.isin(self.data[key], value)
+                # only literals, the conditions come from the users of 'load' and 'iterate'
+                try:
+                    value = ast.literal_eval(value)
+                except (ValueError, SyntaxError):
+                    raise ValueError(f"Invalid values in condition: {condition}, only literals like [1, 2] or ('a', 'b') are allowed") from None
+                mask &= np.isin(self.data[key], list(value) if isinstance(value, (set, frozenset)) else value)
             else:
                 try:
                     # Attempt to convert value to float or boolean
@@ -103,6 +118,20 @@ class FancyDict:
                     raise ValueError(f"Invalid operator {op}")
 
                 mask &= operation(fieldValues, comparisionValue)
+        return mask
+
+    def where(self, *conditions: str, lazy: bool = False) -> dict:
+        """
+        Filters the data based on the provided conditions.
+        :param conditions: List of conditions as strings for filtering. The keys should be the names of the data fields, and the conditions should be in a format that can be split into key, operator, and value.
+        :param lazy: Return a view, that only copies a column when it's accessed (or on 'compact'), filtering a view again is always lazy.
+        :return: Instance of the class containing the filtered data.
+        """
+        mask = self.mask(*conditions)
+        if lazy or isinstance(self.data, LazyColumns):
+            return self.__class__(data=LazyColumns.select(self.data, mask))
+
+        filteredData = self.data.copy()
 
         # Applying the mask to filter the data
         for key, values in filteredData.items():
@@ -110,6 +139,21 @@ class FancyDict:
 
         return self.__class__(data=filteredData)
 
+    def compact(self) -> 'FancyDict':
+        """
+        copies all columns of a lazy view, after this it's an ordinary dict again
+        """
+        if isinstance(self.data, LazyColumns):
+            self.data = self.data.compact()
+        return self
+
+    def groupby(self, keys: str | list) -> GroupBy:
+        """
+        groups the rows by one or more columns, aggregate them with '.agg', e.g.
+        groupby(['eventNumber', 'sensorID']).agg({'clsCharge': 'sum', 'clsSize': 'mean'})
+        """
+        return GroupBy(self, keys)
+
     def __repr__(self) -> str:
         return f'fancyDict({repr(self.data)})'
 
@@ -140,6 +184,8 @@ class FancyDict:
 
     @property
     def numClusters(self) -> int:
+        if isinstance(self.data, LazyColumns):
+            return self.data.numRows
         key = list(self.keys())[0]
         return len(self.data[key])
 
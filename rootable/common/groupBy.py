@@ -0,0 +1,135 @@
+import numpy as np
+
+
+def _fancyDict(data: dict):
+    # imported here, the FancyDict module imports this one
+    from .fancyDict import FancyDict
+    return FancyDict(data)
+
+
+class GroupBy:
+    """
+    groups the rows of a FancyDict by one or more key columns and aggregates the
+    other columns per group. the rows are sorted once by the keys, after that every
+    aggregation is a single reduceat over the sorted column, no python loop over
+    the groups. e.g.
+        data.groupby(['eventNumber', 'sensorID']).agg({'clsCharge': 'sum', 'clsSize': ['mean', 'max']})
+    for streaming every chunk can be reduced to a partial aggregate, partials of
+    several chunks (or files, or processes) are merged with 'GroupBy.combine'
+    """
+    # the running sums, every aggregation needs, they can be merged by adding them up
+    # (min and max by taking the min and max)
+    states = {'sum': ['sum'], 'count': ['count'], 'mean': ['sum', 'count'], 'min': ['min'], 'max': ['max'],
+              'var': ['sum', 'count', 'sumsq'], 'std': ['sum', 'count', 'sumsq']}
+    reductions = {'sum': np.add, 'count': np.add, 'sumsq': np.add, 'min': np.minimum, 'max': np.maximum}
+
+    def __init__(self, data, keys: str | list) -> None:
+        self.data = data
+        self.keys = [keys] if isinstance(keys, str) else list(keys)
+        for key in self.keys:
+            if key not in data.keys():
+                raise KeyError(f"Column '{key}' does not exist.")
+
+        keyColumns = [np.asarray(data[key]) for key in self.keys]
+        numRows = len(keyColumns[0])
+        # lexsort sorts by the last key first, so the keys are handed over reversed
+        self.order = np.lexsort(keyColumns[::-1]) if numRows > 0 else np.array([], dtype=int)
+        sortedKeys = [column[self.order] for column in keyColumns]
+
+        # a new group starts wherever one of the keys changes
+        changes = np.zeros(numRows, dtype=bool)
+        if numRows > 0:
+            changes[0] = True
+            for column in sortedKeys:
+                changes[1:] |= column[1:] != column[:-1]
+        self.starts = np.nonzero(changes)[0]
+        self.counts = np.diff(np.append(self.starts, numRows))
+        self.groupKeys = {key: column[self.starts] for key, column in zip(self.keys, sortedKeys)}
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @classmethod
+    def _parse(cls, spec: dict) -> list[tuple[str, str, str]]:
+        """
+        turns the aggregation spec into (column, function, output name)
+        """
+        parsed = []
+        for column, functions in spec.items():
+            single = isinstance(functions, str)
+            for function in [functions] if single else functions:
+                if function not in cls.states:
+                    raise ValueError(f"unknown aggregation '{function}', choose from {list(cls.states.keys())}")
+                parsed.append((column, function, column if single else f'{column}_{function}'))
+        return parsed
+
+    def _reduce(self, column: str, state: str) -> np.ndarray:
+        if state == 'count':
+            return self.counts.copy()
+        values = np.asarray(self.data[column])[self.order]
+        if state == 'sumsq':
+            values = values.astype(float) ** 2
+        elif state == 'sum' and values.dtype.kind in 'biu':
+            # bools would be or-ed and small integers could overflow
+            values = values.astype(np.int64)
+        if len(values) == 0:
+            return values
+        return self.reductions[state].reduceat(values, self.starts, axis=0)
+
+    def partial(self, spec: dict) -> 'FancyDict':
+        """
+        the partial aggregate of this chunk, the key columns and the running sums
+        named 'column__state', they're merged and finished with 'GroupBy.combine'
+        """
+        data = dict(self.groupKeys)
+        for column, function, _ in self._parse(spec):
+            for state in self.states[function]:
+                name = f'{column}__{state}'
+                if name not in data:
+                    data[name] = self._reduce(column, state)
+        return _fancyDict(data)
+
+    def agg(self, spec: dict) -> 'FancyDict':
+        """
+        spec: dict = column -> aggregation or list of aggregations, possible are
+                     'sum', 'count', 'mean', 'min', 'max', 'var' and 'std'. with a
+                     list the output columns are called 'column_aggregation'
+        """
+        return self._finish(self.partial(spec), self.keys, spec)
+
+    @classmethod
+    def combine(cls, partials: list, spec: dict) -> 'FancyDict':
+        """
+        merges the partial aggregates of several chunks and finishes them, the spec
+        has to be the same one the partials were made with
+        """
+        partials = list(partials)
+        keys = [key for key in partials[0].keys() if '__' not in key]
+        merged = _fancyDict({key: np.concatenate([partial[key] for partial in partials]) for key in partials[0].keys()})
+        grouped = cls(merged, keys)
+
+        data = dict(grouped.groupKeys)
+        for key in merged.keys():
+            if '__' in key:
+                state = key.rpartition('__')[2]
+                values = np.asarray(merged[key])[grouped.order]
+                data[key] = cls.reductions[state].reduceat(values, grouped.starts, axis=0) if len(values) > 0 else values
+        return cls._finish(_fancyDict(data), keys, spec)
+
+    @classmethod
+    def _finish(cls, partial, keys: list, spec: dict) -> 'FancyDict':
+        data = {key: partial[key] for key in keys}
+        for column, function, name in cls._parse(spec):
+            if function in ('sum', 'count', 'min', 'max'):
+                data[name] = partial[f'{column}__{function}']
+                continue
+            total = partial[f'{column}__sum']
+            count = np.maximum(partial[f'{column}__count'], 1)
+            count = count.reshape(-1, *[1] * (np.ndim(total) - 1))
+            mean = total / count
+            if function == 'mean':
+                data[name] = mean
+            else:
+                variance = np.maximum(partial[f'{column}__sumsq'] / count - mean ** 2, 0)
+                data[name] = variance if function == 'var' else np.sqrt(variance)
+        return _fancyDict(data)
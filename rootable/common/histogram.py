@@ -0,0 +1,139 @@
+import copy
+import numpy as np
+
+
+class Histogram:
+    """
+    a fixed binning histogram of one column (1D) or two columns (2D), that is filled
+    chunk by chunk, so a whole run can be summarized without keeping the clusters in
+    memory. every fill is a single bincount over the flattened bin indices. with 'by'
+    there is one histogram per value of that column, e.g. per layer or per sensor.
+    histograms with the same binning can be merged (also across processes or files,
+    they can be pickled or saved)
+        Histogram('clsCharge', bins=100, ranges=(0, 500), by='layer')
+        Histogram(('uPosition', 'vPosition'), bins=(50, 100), ranges=((-0.7, 0.7), (-3, 3)), by='sensorID')
+    the upper edge belongs to the last bin, like in numpy. values outside of the
+    range (and nans) aren't filled, but counted in 'outOfRange'
+    """
+    def __init__(self, columns: str | tuple, bins: int | tuple = 100, ranges: tuple = (0, 1), by: str | None = None, weights: str | None = None) -> None:
+        self.columns = (columns,) if isinstance(columns, str) else tuple(columns)
+        assert len(self.columns) in (1, 2), 'only 1D and 2D histograms are supported'
+        if len(self.columns) == 1:
+            bins, ranges = (bins,), (ranges,)
+        self.bins = tuple(int(numBins) for numBins in bins)
+        self.ranges = tuple((float(low), float(high)) for low, high in ranges)
+        assert len(self.bins) == len(self.columns) and len(self.ranges) == len(self.columns), 'one binning per column is needed'
+        for low, high in self.ranges:
+            assert high > low, 'the upper edge has to be larger than the lower edge'
+        self.by = by
+        self.weights = weights
+        self.counts = {}
+        self.entries = 0
+        self.outOfRange = 0
+
+    @property
+    def edges(self) -> list[np.ndarray]:
+        return [np.linspace(low, high, numBins + 1) for numBins, (low, high) in zip(self.bins, self.ranges)]
+
+    @property
+    def needs(self) -> list[str]:
+        """
+        all columns, that are read by 'fill'
+        """
+        return list(self.columns) + [column for column in (self.by, self.weights) if column is not None]
+
+    def _empty(self) -> np.ndarray:
+        return np.zeros(self.bins, dtype=float if self.weights is not None else np.int64)
+
+    def fill(self, batch) -> 'Histogram':
+        """
+        batch: anything, that returns a column for a keyword, e.g. a FancyDict from
+               'Rootable.iterate' or the Rootable itself
+        """
+        index = None
+        inside = None
+        for column, numBins, (low, high) in zip(self.columns, self.bins, self.ranges):
+            values = np.asarray(batch[column], dtype=float)
+            valid = (values >= low) & (values <= high)
+            scaled = np.where(valid, (values - low) / (high - low) * numBins, 0)
+            binIndex = np.minimum(scaled.astype(np.int64), numBins - 1)
+            # rounding can put values right at an edge into the neighbouring bin,
+            # they are moved, so that the result is the same as with the bin edges
+            edges = np.linspace(low, high, numBins + 1)
+            binIndex -= values < edges[binIndex]
+            binIndex += (values >= edges[binIndex + 1]) & (binIndex != numBins - 1)
+            inside = valid if inside is None else inside & valid
+            index = binIndex if index is None else index * numBins + binIndex
+
+        self.entries += len(inside)
+        self.outOfRange += int(len(inside) - np.count_nonzero(inside))
+        index = index[inside]
+        weights = np.asarray(batch[self.weights], dtype=float)[inside] if self.weights is not None else None
+        size = int(np.prod(self.bins))
+
+        if self.by is None:
+            filled = np.bincount(index, weights=weights, minlength=size).reshape(self.bins)
+            self.counts[None] = self.counts.get(None, self._empty()) + filled
+            return self
+
+        # one bincount for all categories, every category gets its own block of bins
+        categories, inverse = np.unique(np.asarray(batch[self.by])[inside], return_inverse=True)
+        filled = np.bincount(inverse.reshape(-1) * size + index, weights=weights, minlength=len(categories) * size)
+        filled = filled.reshape(len(categories), *self.bins)
+        for category, counts in zip(categories.tolist(), filled):
+            self.counts[category] = self.counts.get(category, self._empty()) + counts
+        return self
+
+    def _compatible(self, other: 'Histogram') -> None:
+        if (self.columns, self.bins, self.ranges, self.by, self.weights) != (other.columns, other.bins, other.ranges, other.by, other.weights):
+            raise ValueError('only histograms with the same columns and binning can be merged')
+
+    def merge(self, other: 'Histogram') -> 'Histogram':
+        """
+        adds another histogram in-place
+        """
+        self._compatible(other)
+        for category, counts in other.counts.items():
+            self.counts[category] = self.counts.get(category, self._empty()) + counts
+        self.entries += other.entries
+        self.outOfRange += other.outOfRange
+        return self
+
+    def __add__(self, other: 'Histogram') -> 'Histogram':
+        return copy.deepcopy(self).merge(other)
+
+    def __iadd__(self, other: 'Histogram') -> 'Histogram':
+        return self.merge(other)
+
+    def __getitem__(self, category) -> np.ndarray:
+        return self.counts.get(category, self._empty())
+
+    def keys(self) -> list:
+        return sorted(self.counts.keys(), key=lambda category: (category is None, category))
+
+    def __repr__(self) -> str:
+        by = f', by={self.by!r}' if self.by is not None else ''
+        return f'Histogram({self.columns}, bins={self.bins}, ranges={self.ranges}{by}, entries={self.entries})'
+
+    def save(self, fileName: str) -> None:
+        """
+        saves the histogram into a numpy .npz file
+        """
+        categories = self.keys()
+        np.savez(fileName, columns=np.array(self.columns), bins=np.array(self.bins), ranges=np.array(self.ranges),
+                 by=np.array('' if self.by is None else self.by), weights=np.array('' if self.weights is None else self.weights),
+                 categories=np.array(categories, dtype=object), counts=np.array([self.counts[category] for category in categories]),
+                 entries=self.entries, outOfRange=self.outOfRange)
+
+    @classmethod
+    def load(cls, fileName: str) -> 'Histogram':
+        with np.load(fileName, allow_pickle=True) as file:
+            columns = tuple(file['columns'].tolist())
+            bins, ranges = tuple(file['bins'].tolist()), tuple(map(tuple, file['ranges'].tolist()))
+            if len(columns) == 1:
+                bins, ranges = bins[0], ranges[0]
+            histogram = cls(columns, bins=bins, ranges=ranges, by=str(file['by']) or None, weights=str(file['weights']) or None)
+            histogram.counts = {category: counts for category, counts in zip(file['categories'].tolist(), file['counts'])}
+            histogram.entries = int(file['entries'])
+            histogram.outOfRange = int(file['outOfRange'])
+        return histogram
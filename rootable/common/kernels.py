@@ -0,0 +1,132 @@
+import numpy as np
+from .backend import jit
+
+
+# the loops, that don't vectorize with numpy, written as plain loops over arrays, so
+# that numba can compile them. they do exactly what the numpy versions do (same
+# order of the pixels, the same ties), see benchmarks/backends.py for the comparison
+
+
+@jit
+def labelClusters(uCells: np.ndarray, vCells: np.ndarray, charges: np.ndarray, uSize: int, vSize: int) -> tuple:
+    """
+    connected pixels (4 neighbours) of one sensor, the pixels come back in the order
+    of the recursive search of genCluster: the pixel, then v + 1, v - 1, u + 1, u - 1.
+    returns the u, v and charge of the pixels in that order and the size of every cluster
+    """
+    numPixels = len(uCells)
+    ladder = np.zeros((uSize, vSize), dtype=np.int64)
+    for i in range(numPixels):
+        ladder[uCells[i], vCells[i]] = charges[i]
+    visited = np.zeros((uSize, vSize), dtype=np.bool_)
+
+    outU = np.empty(numPixels, dtype=np.int64)
+    outV = np.empty(numPixels, dtype=np.int64)
+    outCharge = np.empty(numPixels, dtype=np.int64)
+    sizes = np.empty(numPixels, dtype=np.int64)
+    # every visited pixel pushes 4 neighbours, the stack never gets longer than that
+    stackU = np.empty(4 * numPixels + 1, dtype=np.int64)
+    stackV = np.empty(4 * numPixels + 1, dtype=np.int64)
+
+    numOut = 0
+    numClusters = 0
+    for i in range(numPixels):
+        u, v = uCells[i], vCells[i]
+        if ladder[u, v] == 0 or visited[u, v]:
+            continue
+        start = numOut
+        stackU[0], stackV[0] = u, v
+        top = 1
+        while top > 0:
+            top -= 1
+            cu, cv = stackU[top], stackV[top]
+            if cu < 0 or cu >= uSize or cv < 0 or cv >= vSize:
+                continue
+            if ladder[cu, cv] == 0 or visited[cu, cv]:
+                continue
+            visited[cu, cv] = True
+            outU[numOut], outV[numOut], outCharge[numOut] = cu, cv, ladder[cu, cv]
+            numOut += 1
+            # pushed in reverse, so that v + 1 is visited first
+            stackU[top], stackV[top] = cu - 1, cv
+            stackU[top + 1], stackV[top + 1] = cu + 1, cv
+            stackU[top + 2], stackV[top + 2] = cu, cv - 1
+            stackU[top + 3], stackV[top + 3] = cu, cv + 1
+            top += 4
+        sizes[numClusters] = numOut - start
+        numClusters += 1
+    return outU[:numOut], outV[:numOut], outCharge[:numOut], sizes[:numClusters]
+
+
+@jit
+def matrixWindow(ladder: np.ndarray, uCellID: int, vCellID: int, uSize: int, vSize: int) -> tuple:
+    """
+    the window of extractMatrix around a pixel, recentered on the highest charge and
+    grown by 2 as long as there's charge on its border. returns the bounds of the
+    window (uLower, uUpper, vLower, vUpper) and its final size, the bounds are -1, if
+    the window had to grow beyond the ladder
+    """
+    numU, numV = ladder.shape
+    while True:
+        uCenter, vCenter = uSize // 2, vSize // 2
+        uLower = min(max(uCellID - uCenter, 0), numU - uSize)
+        uUpper = min(max(uCellID + uCenter + 1, 0), numU)
+        vLower = min(max(vCellID - vCenter, 0), numV - vSize)
+        vUpper = min(max(vCellID + vCenter + 1, 0), numV)
+        uStop, vStop = uUpper, vUpper
+
+        # the first pixel with the highest charge
+        seedU, seedV = 0, 0
+        best = ladder[uLower, vLower]
+        for i in range(uLower, uStop):
+            for j in range(vLower, vStop):
+                if ladder[i, j] > best:
+                    best = ladder[i, j]
+                    seedU, seedV = i - uLower, j - vLower
+
+        if seedU != uCenter or seedV != vCenter:
+            uLower = min(max(uCellID + seedU - 2 * uCenter, 0), numU - uSize)
+            vLower = min(max(vCellID + seedV - 2 * vCenter, 0), numV - vSize)
+            uStop, vStop = uLower + uSize, vLower + vSize
+
+        onBorder = False
+        for j in range(vLower, vStop):
+            if ladder[uLower, j] != 0 or ladder[uStop - 1, j] != 0:
+                onBorder = True
+        for i in range(uLower, uStop):
+            if ladder[i, vLower] != 0 or ladder[i, vStop - 1] != 0:
+                onBorder = True
+        atBoundary = uLower <= 0 or uUpper >= numU or vLower <= 0 or vUpper >= numV
+        if not onBorder or atBoundary:
+            return uLower, uStop, vLower, vStop, uSize, vSize
+        uSize += 2
+        vSize += 2
+        if uSize >= numU or vSize >= numV:
+            return -1, -1, -1, -1, uSize, vSize
+
+
+@jit
+def fillWindows(uCells: np.ndarray, vCells: np.ndarray, charges: np.ndarray, offsets: np.ndarray, matrices: np.ndarray, swap: bool) -> None:
+    """
+    the pixels of every cluster into its matrix, shifted so that the highest charge
+    sits in the center, pixels outside of the window are left out. with swap the
+    matrices are filled as (v, u), that only works for square matrices
+    """
+    uRange, vRange = matrices.shape[1] // 2, matrices.shape[2] // 2
+    uLimit, vLimit = matrices.shape[1], matrices.shape[2]
+    for cluster in range(len(offsets) - 1):
+        start, stop = offsets[cluster], offsets[cluster + 1]
+        if stop == start:
+            continue
+        seed = start
+        for i in range(start + 1, stop):
+            if charges[i] > charges[seed]:
+                seed = i
+        for i in range(start, stop):
+            uPos = uCells[i] + uRange - uCells[seed]
+            vPos = vCells[i] + vRange - vCells[seed]
+            if uPos >= 0 and uPos < uLimit and vPos >= 0 and vPos < vLimit:
+                if swap:
+                    matrices[cluster, vPos, uPos] = charges[i]
+                else:
+                    matrices[cluster, uPos, vPos] = charges[i]
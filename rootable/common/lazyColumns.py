@@ -0,0 +1,90 @@
+import numpy as np
+from numpy.typing import ArrayLike
+from collections.abc import MutableMapping
+from typing import Iterator
+
+
+class LazyColumns(MutableMapping):
+    """
+    the columns of a filtered FancyDict, that haven't been copied yet. it keeps the
+    unfiltered columns and the indices of the rows, that are left, a column is only
+    cut out (and kept) when it's accessed. filtering it again only shrinks the
+    indices, so a chain of 'where' calls costs nothing for the columns, that are
+    never looked at
+    """
+    def __init__(self, base: dict, index: ArrayLike) -> None:
+        # a shallow copy, later changes to the original dict don't change the view
+        self.base = dict(base)
+        self.index = np.asarray(index, dtype=np.int64)
+        self.cache = {}
+
+    @classmethod
+    def select(cls, data: MutableMapping, mask: ArrayLike) -> 'LazyColumns':
+        """
+        the rows of the mask, if the data is already a view, the indices are combined
+        """
+        rows = np.nonzero(mask)[0]
+        if isinstance(data, cls):
+            return data._subset(rows)
+        return cls(data, rows)
+
+    def _subset(self, rows: ArrayLike) -> 'LazyColumns':
+        view = self.__class__(self.base, self.index[rows])
+        # columns, that were added to the view, have no unfiltered version
+        view.cache = {key: value[rows] for key, value in self.cache.items() if key not in self.base}
+        return view
+
+    def take(self, rows: int | slice | ArrayLike) -> 'dict | LazyColumns':
+        """
+        single rows are returned as a dict of values, everything else as a new view
+        """
+        if np.ndim(self.index[rows]) == 0:
+            return {key: self.cache[key][rows] if key in self.cache else self.base[key][self.index[rows]] for key in self}
+        return self._subset(rows)
+
+    @property
+    def numRows(self) -> int:
+        return len(self.index)
+
+    @property
+    def materialized(self) -> list:
+        return list(self.cache.keys())
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        if key not in self.cache:
+            self.cache[key] = self.base[key][self.index]
+        return self.cache[key]
+
+    def __setitem__(self, key: str, value: ArrayLike) -> None:
+        self.cache[key] = value
+        self.base.pop(key, None)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self.base and key not in self.cache:
+            raise KeyError(key)
+        self.base.pop(key, None)
+        self.cache.pop(key, None)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.base or key in self.cache
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.base
+        yield from (key for key in self.cache if key not in self.base)
+
+    def __len__(self) -> int:
+        return len(self.base.keys() | self.cache.keys())
+
+    def copy(self) -> 'LazyColumns':
+        view = self.__class__(self.base, self.index)
+        view.cache = dict(self.cache)
+        return view
+
+    def compact(self) -> dict:
+        """
+        all columns as plain arrays
+        """
+        return {key: self[key] for key in self}
+
+    def __repr__(self) -> str:
+        return f'LazyColumns(rows={self.numRows}, columns={list(self)}, materialized={self.materialized})'
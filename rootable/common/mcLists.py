@@ -1,3 +1,4 @@
+import numpy as np
 from numpy.typing import ArrayLike
 
 
@@ -27,3 +28,46 @@ def fillMCList(fromClusters: ArrayLike, toClusters: ArrayLike, length: int) -> l
                 testList[i] = int(toClusters[fillIndex][0])
             fillIndex += 1
     return testList
+
+
+def gatherMCData(references: ArrayLike, values: ArrayLike) -> np.ndarray:
+    """
+    collects the mc values, that the clusters point to, for all events at once.
+    references and values are per event (jagged) arrays, a reference of -1 means
+    there is no mc particle for this cluster, these entries are filled with zeros
+    """
+    if len(references) == 0:
+        return np.array([])
+    refCounts = np.fromiter(map(len, references), dtype=int, count=len(references))
+    valueCounts = np.fromiter(map(len, values), dtype=int, count=len(values))
+    flatReferences = np.concatenate(list(references)).astype(int)
+    flatValues = np.concatenate(list(values))
+
+    # the position of the first mc particle of every event in the flat array
+    valueOffsets = np.concatenate(([0], np.cumsum(valueCounts)[:-1]))
+    eventOffsets = np.repeat(valueOffsets, refCounts)
+
+    kind = flatValues.dtype.kind
+    dtype = int if kind in 'iu' else bool if kind == 'b' else float
+    gathered = np.zeros(len(flatReferences), dtype=dtype)
+    valid = flatReferences != -1
+    gathered[valid] = flatValues[flatReferences[valid] + eventOffsets[valid]]
+    return gathered
+
+
+def selectReferences(references: ArrayLike, rows: ArrayLike | None) -> ArrayLike:
+    """
+    keeps only the references of the given clusters, rows count the clusters of
+    all events one after another. the result is per event again, so that the
+    mc data of only these clusters gets gathered
+    """
+    if rows is None or len(references) == 0:
+        return references
+    counts = np.fromiter(map(len, references), dtype=int, count=len(references))
+    flat = np.concatenate(list(references)).astype(int)
+    rows = np.asarray(rows, dtype=int)
+    events = np.repeat(np.arange(len(references)), counts)[rows]
+    selected = np.empty(len(references), dtype=object)
+    for i, part in enumerate(np.split(flat[rows], np.cumsum(np.bincount(events, minlength=len(references)))[:-1])):
+        selected[i] = part
+    return selected
@@ -0,0 +1,222 @@
+import os
+import re
+import shutil
+import tempfile
+import threading
+import weakref
+import numpy as np
+from typing import Any
+from .categorical import Categorical
+from .columnStore import ColumnStore
+
+
+class MemoryBudget:
+    """
+    keeps a loaded dataset below a memory limit. the trees are read in chunks, whose
+    size comes from the uncompressed size of the branches, and the columns are moved
+    into memory mapped stores on disk, once the ones in memory take up too much.
+    the spilled columns are memory maps (or rows, that are views into them), so they
+    are used like every other column, the operating system pages them in and out.
+    limit: int or str = bytes or a size like '4GB', '512MiB'
+    path: str = directory for the spilled columns, defaults to a temporary directory,
+                that is removed together with this object
+    """
+    # the share of the limit for the chunks, that are read, and for the columns in memory
+    readShare = 0.25
+    columnShare = 0.5
+    # every event of a jagged branch is its own numpy array, on top of its values
+    arrayOverhead = 112
+
+    units = {'': 1, 'b': 1, 'k': 1e3, 'kb': 1e3, 'm': 1e6, 'mb': 1e6, 'g': 1e9, 'gb': 1e9, 't': 1e12, 'tb': 1e12,
+             'kib': 2**10, 'mib': 2**20, 'gib': 2**30, 'tib': 2**40}
+
+    def __init__(self, limit: int | str, path: str | None = None) -> None:
+        self.limit = self.parseSize(limit)
+        self.path = path
+        self.spills = 0
+        # the files are loaded by several workers at the same time
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parseSize(cls, size: int | float | str) -> int:
+        """
+        a size in bytes from a number or a string like '4GB', '4 GiB', '500mb'
+        """
+        if isinstance(size, (int, float, np.integer, np.floating)):
+            return int(size)
+        match = re.fullmatch(r'\s*([\d.]+)\s*([a-zA-Z]*)\s*', str(size))
+        if match is None or match.group(2).lower() not in cls.units:
+            raise ValueError(f"can't read the size '{size}', use e.g. '4GB' or '512MiB'")
+        return int(float(match.group(1)) * cls.units[match.group(2).lower()])
+
+    def bytesPerEvent(self, eventTree, branches: list) -> float:
+        """
+        the memory one event of the branches takes, once it's read, estimated from the
+        uncompressed size of the branches in the file. branches without that information
+        count with the array overhead only
+        """
+        eventKeys = set(eventTree.keys())
+        numEntries = max(eventTree.num_entries, 1)
+        total = 0.
+        for branch in dict.fromkeys(branches):
+            if branch not in eventKeys:
+                continue
+            uncompressed = getattr(eventTree[branch], 'uncompressed_bytes', None)
+            total += self.arrayOverhead + (uncompressed / numEntries if uncompressed else 0)
+        return total
+
+    def stepSize(self, bytesPerEvent: float, chunks: int = 1) -> int:
+        """
+        the number of entries per chunk, so that 'chunks' chunks fit into the read share
+        """
+        return max(int(self.limit * self.readShare / max(bytesPerEvent * chunks, 1.)), 1)
+
+    @staticmethod
+    def mapped(array: Any) -> bool:
+        """
+        whether an array is a memory map or a view into one
+        """
+        while isinstance(array, np.ndarray):
+            if isinstance(array, np.memmap):
+                return True
+            array = array.base
+        return False
+
+    @staticmethod
+    def inMemory(column: np.ndarray | Categorical) -> int:
+        """
+        the bytes of a column, that are held in memory, memory maps don't count
+        """
+        if isinstance(column, Categorical):
+            return 0 if MemoryBudget.mapped(column.codes) else column.codes.nbytes
+        if MemoryBudget.mapped(column):
+            return 0
+        column = np.asarray(column)
+        if column.dtype != object:
+            return column.nbytes
+        rows = np.fromiter((0 if MemoryBudget.mapped(row) else getattr(row, 'nbytes', 0) + MemoryBudget.arrayOverhead for row in column),
+                           dtype=np.int64, count=len(column))
+        return column.nbytes + int(rows.sum())
+
+    def used(self, data: dict) -> int:
+        return sum(self.inMemory(column) for column in data.values())
+
+    @property
+    def columnLimit(self) -> float:
+        return self.limit * self.columnShare
+
+    @staticmethod
+    def storable(column: np.ndarray | Categorical) -> bool:
+        """
+        whether a column can be moved to disk, python objects can't be stored and
+        strings would be cut to the length of the first part, that is stored
+        """
+        if isinstance(column, Categorical):
+            return True
+        column = np.asarray(column)
+        return column.dtype.kind != 'U' and (column.dtype != object or ColumnStore.isRagged(column))
+
+    def _directory(self) -> str:
+        with self._lock:
+            if self.path is None:
+                self.path = tempfile.mkdtemp(prefix='rootable-')
+                # the temporary columns are removed together with the budget
+                weakref.finalize(self, shutil.rmtree, self.path, ignore_errors=True)
+            directory = os.path.join(self.path, f'spill{self.spills}')
+            self.spills += 1
+        return directory
+
+    def allocate(self, data: dict, shape: tuple, dtype: np.dtype) -> np.ndarray:
+        """
+        an empty column, it's a writable memory map on disk, if it doesn't fit next
+        to the columns in memory
+        """
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape)) * dtype.itemsize
+        if dtype == object or size == 0 or self.used(data) + size <= self.columnLimit:
+            return np.empty(shape, dtype=dtype)
+        return ColumnStore(self._directory()).create('column', shape, dtype)
+
+    def spill(self, data: dict, held: int = 0) -> dict:
+        """
+        moves the biggest columns in memory to disk, until the ones, that are left,
+        fit into the column share of the limit. returns the spilled columns, opened
+        as memory maps, they replace the ones in data
+        held: int = bytes, that are held in memory besides data (e.g. the loaded columns)
+        """
+        sizes = {key: self.inMemory(column) for key, column in data.items()}
+        excess = held + sum(sizes.values()) - self.columnLimit
+        spilled = {}
+        for key in sorted(sizes, key=sizes.get, reverse=True):
+            if excess <= 0 or sizes[key] == 0:
+                break
+            if not self.storable(data[key]):
+                continue
+            spilled[key] = data[key]
+            excess -= sizes[key]
+        if not spilled:
+            return {}
+        store = ColumnStore(self._directory())
+        store.write(spilled)
+        return store.read(mmap=True)
+
+
+class SpillBuffer:
+    """
+    collects the parts of a stage (the chunks of a file), that are put together at
+    the end. with a memory budget the parts are appended to a store on disk, as soon
+    as the ones in memory take up more than the column share next to the columns,
+    that are loaded already. the stage gets memory maps of the store then, instead
+    of a second copy of all parts in memory. columns, that can't be stored, stay in memory
+    budget: MemoryBudget = without one the parts are only concatenated
+    held: int = the bytes, that are in memory besides the parts
+    """
+    def __init__(self, budget: MemoryBudget | None = None, held: int = 0) -> None:
+        self.budget = budget
+        self.held = held
+        self.parts = []
+        self.inMemory = 0
+        self.store = None
+        self.storable = None
+        self.kept = {}
+        self.keys = None
+
+    def add(self, data: dict) -> None:
+        if not data:
+            return
+        self.keys = self.keys or list(data.keys())
+        self.parts.append(data)
+        if self.budget is None:
+            return
+        self.inMemory += self.budget.used(data)
+        if self.held + self.inMemory > self.budget.columnLimit:
+            self._flush()
+
+    def _flush(self) -> None:
+        # parts without rows don't add anything, but they'd set the dtypes of a new store
+        parts = [part for part in self.parts if len(next(iter(part.values()))) > 0]
+        if not parts:
+            return
+        if self.store is None:
+            self.storable = [key for key, column in parts[0].items() if self.budget.storable(column)]
+            self.store = ColumnStore(self.budget._directory())
+        for part in parts:
+            self.store.append({key: part[key] for key in self.storable})
+            for key in part.keys() - set(self.storable):
+                self.kept.setdefault(key, []).append(part[key])
+                self.held += self.budget.inMemory(part[key])
+        self.parts = []
+        self.inMemory = 0
+
+    def result(self) -> dict:
+        """
+        all parts in their order, as one column each
+        """
+        if self.store is None:
+            if not self.parts:
+                return {}
+            return {key: np.concatenate([part[key] for part in self.parts]) for key in self.parts[0].keys()}
+        self._flush()
+        data = self.store.read(mmap=True)
+        data.update({key: np.concatenate(parts) for key, parts in self.kept.items()})
+        return {key: data[key] for key in self.keys}
@@ -0,0 +1,73 @@
+import numpy as np
+from concurrent.futures import Executor
+from typing import Iterable
+from .background import inBackground
+
+
+class TreeChunk:
+    """
+    holds the already read and decompressed branches of a range of entries. it mimics
+    the small part of the uproot TTree interface, that the detector classes use
+    (keys, arrays and num_entries), so they can run on a chunk without any changes
+    """
+    def __init__(self, arrays: dict, keys: list, entryStart: int, entryStop: int, entries: np.ndarray | None = None) -> None:
+        self._arrays = arrays
+        self._keys = keys
+        self.entryStart = entryStart
+        self.entryStop = entryStop
+        # the entry numbers inside the file, they differ from the range, if the
+        # chunk was taken from a view of the tree
+        self.entries = np.arange(entryStart, entryStop) if entries is None else entries
+
+    @property
+    def num_entries(self) -> int:
+        return self.entryStop - self.entryStart
+
+    def keys(self) -> list:
+        return self._keys
+
+    def arrays(self, expressions: str | Iterable[str], library: str = 'np', **kwargs) -> dict:
+        if isinstance(expressions, str):
+            expressions = [expressions]
+        try:
+            return {expression: self._arrays[expression] for expression in expressions}
+        except KeyError as error:
+            raise KeyError(f'branch {error} was not read ahead for this chunk') from None
+
+
+class PrefetchLoader:
+    """
+    a pipelined loader, a background thread reads and decompresses chunk k+1 while
+    chunk k is reorganized into columns by the caller. the queue between the two
+    holds at most 'prefetch' chunks, which caps the memory. if an executor is handed
+    over, uproot uses it to decompress the baskets in parallel.
+    """
+    def __init__(self, eventTree, branches: list, stepSize: int = 10000, prefetch: int = 2, decompressionExecutor: Executor | None = None) -> None:
+        assert stepSize > 0, 'step size has to be positive'
+        assert prefetch > 0, 'at least one chunk has to be prefetched'
+        self.eventTree = eventTree
+        self.keys = eventTree.keys()
+        self.branches = [branch for branch in dict.fromkeys(branches) if branch in set(self.keys)]
+        self.stepSize = stepSize
+        self.prefetch = prefetch
+        self.decompressionExecutor = decompressionExecutor
+
+    def __len__(self) -> int:
+        return -(-self.eventTree.num_entries // self.stepSize)
+
+    def _read(self, entryStart: int, entryStop: int) -> TreeChunk:
+        kwargs = {}
+        if self.decompressionExecutor is not None:
+            kwargs['decompression_executor'] = self.decompressionExecutor
+        arrays = self.eventTree.arrays(self.branches, library='np', entry_start=entryStart, entry_stop=entryStop, **kwargs) if self.branches else {}
+        entries = getattr(self.eventTree, 'entries', None)
+        entries = None if entries is None else entries[entryStart:entryStop]
+        return TreeChunk(arrays, self.keys, entryStart, entryStop, entries)
+
+    def _chunks(self) -> Iterable[TreeChunk]:
+        numEntries = self.eventTree.num_entries
+        for entryStart in range(0, numEntries, self.stepSize):
+            yield self._read(entryStart, min(entryStart + self.stepSize, numEntries))
+
+    def __iter__(self) -> Iterable[TreeChunk]:
+        return inBackground(self._chunks(), self.prefetch)
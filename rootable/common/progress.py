@@ -0,0 +1,69 @@
+import threading
+from typing import Callable
+
+
+class Cancelled(Exception):
+    """
+    raised at a chunk boundary after the cancel token has been set
+    """
+
+
+class CancelToken:
+    """
+    a cooperative cancellation flag, it can be set from any thread (or a signal
+    handler) and is checked by the loaders every time they finish a chunk of events
+    """
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    def reset(self) -> None:
+        self._event.clear()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self) -> None:
+        if self._event.is_set():
+            raise Cancelled('loading was cancelled')
+
+
+class Progress:
+    """
+    bundles the progress callback and the cancel token for one stage of one file.
+    the per-event loops hand it the number of processed events, the callback is
+    called as onProgress(stage, file, eventsDone, eventsTotal), but only at chunk
+    boundaries (every 'chunkSize' events and at the end), this keeps the overhead
+    in the loops negligible. if the file is read in chunks, 'offset' is the first
+    entry of the chunk and 'eventsTotal' the number of entries of the whole file
+    """
+    def __init__(self, onProgress: Callable | None = None, cancelToken: CancelToken | None = None, stage: str = '', fileName: str | None = None, chunkSize: int = 1000, offset: int = 0, eventsTotal: int | None = None) -> None:
+        self.onProgress = onProgress
+        self.cancelToken = cancelToken
+        self.stage = stage
+        self.fileName = fileName
+        self.chunkSize = chunkSize
+        self.offset = offset
+        self.eventsTotal = eventsTotal
+
+    def chunk(self, offset: int, eventsTotal: int) -> 'Progress':
+        """
+        the same reporter for a chunk of a file
+        """
+        return self.__class__(self.onProgress, self.cancelToken, self.stage, self.fileName, self.chunkSize, offset, eventsTotal)
+
+    def check(self) -> None:
+        if self.cancelToken is not None:
+            self.cancelToken.check()
+
+    def update(self, eventsDone: int, eventsTotal: int) -> None:
+        if eventsDone % self.chunkSize != 0 and eventsDone != eventsTotal:
+            return
+        self.check()
+        # the start of a chunk was already reported as the end of the previous one
+        if self.onProgress is not None and not (eventsDone == 0 and self.offset > 0):
+            eventsTotal = eventsTotal if self.eventsTotal is None else self.eventsTotal
+            self.onProgress(self.stage, self.fileName, self.offset + eventsDone, eventsTotal)
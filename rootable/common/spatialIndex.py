@@ -0,0 +1,128 @@
+import itertools
+import numpy as np
+from numpy.typing import ArrayLike
+
+
+class SpatialIndex:
+    """
+    a uniform grid hash over cluster positions, that only connects clusters of the
+    same group (e.g. the same event, or the same event and sensor). every cluster
+    gets the key (group, cell), the keys are sorted once, after that a batch of
+    queries looks up all neighbouring cells with one searchsorted and computes the
+    distances to the candidates in one go, no python loop over the clusters.
+    groups: list = integer columns, that define the groups, e.g. [eventID] or [eventID, sensorID]
+    coordinates: array = the positions, shape (clusters, dimensions)
+    cellSize: float = edge length of the grid cells, queries are fastest if it's
+                      about the radius that is asked for
+    """
+    def __init__(self, groups: list[ArrayLike], coordinates: ArrayLike, cellSize: float) -> None:
+        assert cellSize > 0, 'the cell size has to be positive'
+        self.coordinates = np.asarray(coordinates, dtype=float)
+        if self.coordinates.ndim == 1:
+            self.coordinates = self.coordinates[:, None]
+        self.numRows, self.dimensions = self.coordinates.shape
+        self.cellSize = float(cellSize)
+
+        if self.numRows == 0:
+            self.groupIDs = np.array([], dtype=np.int64)
+        else:
+            _, groupIDs = np.unique(np.stack([np.asarray(group) for group in groups], axis=1), axis=0, return_inverse=True)
+            self.groupIDs = groupIDs.reshape(-1).astype(np.int64)
+        numGroups = int(self.groupIDs.max()) + 1 if self.numRows > 0 else 0
+
+        # the rows of every group, used for the nearest neighbours
+        self.groupOrder = np.argsort(self.groupIDs, kind='stable')
+        self.groupStarts = np.searchsorted(self.groupIDs[self.groupOrder], np.arange(numGroups + 1))
+
+        # the grid, the cells are counted from the smallest coordinate on
+        self.low = self.coordinates.min(axis=0) if self.numRows > 0 else np.zeros(self.dimensions)
+        cells = self._cells(self.coordinates)
+        self.shape = cells.max(axis=0) + 1 if self.numRows > 0 else np.ones(self.dimensions, dtype=np.int64)
+        keys = self._keys(self.groupIDs, cells)
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+
+    def _cells(self, coordinates: np.ndarray) -> np.ndarray:
+        return np.floor((coordinates - self.low) / self.cellSize).astype(np.int64)
+
+    def _keys(self, groupIDs: np.ndarray, cells: np.ndarray) -> np.ndarray:
+        """
+        one integer per (group, cell), -1 for cells outside of the grid
+        """
+        inside = np.all((cells >= 0) & (cells < self.shape), axis=1)
+        flat = np.ravel_multi_index(tuple(np.where(inside[:, None], cells, 0).T), tuple(self.shape)) if len(cells) else np.array([], dtype=np.int64)
+        return np.where(inside, groupIDs * int(np.prod(self.shape)) + flat, -1)
+
+    def _candidates(self, queryRows: np.ndarray, queryCoordinates: np.ndarray, queryGroups: np.ndarray, radius: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        all clusters in the cells around the queries, as pairs of (query, row)
+        """
+        reach = int(np.ceil(radius / self.cellSize))
+        offsets = np.array(list(itertools.product(range(-reach, reach + 1), repeat=self.dimensions)), dtype=np.int64)
+        cells = self._cells(queryCoordinates)
+        neighbourCells = (cells[:, None, :] + offsets[None, :, :]).reshape(-1, self.dimensions)
+        keys = self._keys(np.repeat(queryGroups, len(offsets)), neighbourCells)
+
+        starts = np.searchsorted(self.keys, keys, side='left')
+        counts = np.where(keys >= 0, np.searchsorted(self.keys, keys, side='right') - starts, 0)
+        pairQueries = np.repeat(np.repeat(np.arange(len(queryRows)), len(offsets)), counts)
+        # the position of every candidate inside its cell
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        candidates = self.order[np.repeat(starts, counts) + within]
+        return pairQueries, candidates
+
+    def radiusQuery(self, rows: ArrayLike, radius: float, returnDistances: bool = False) -> np.ndarray | tuple[np.ndarray, np.ndarray]:
+        """
+        the clusters of the same group within 'radius' around every queried cluster
+        (the cluster itself isn't included). returns an array with the rows of the
+        neighbours for every query, sorted by row, and optionally their distances
+        rows: array = the rows of the clusters to query
+        """
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+        queryCoordinates = self.coordinates[rows]
+        pairQueries, candidates = self._candidates(rows, queryCoordinates, self.groupIDs[rows], radius)
+
+        distances = np.linalg.norm(self.coordinates[candidates] - queryCoordinates[pairQueries], axis=1)
+        selected = (distances <= radius) & (candidates != rows[pairQueries])
+        pairQueries, candidates, distances = pairQueries[selected], candidates[selected], distances[selected]
+        order = np.lexsort((candidates, pairQueries))
+        pairQueries, candidates, distances = pairQueries[order], candidates[order], distances[order]
+
+        splits = np.cumsum(np.bincount(pairQueries, minlength=len(rows)))[:-1]
+        neighbours = np.empty(len(rows), dtype=object)
+        neighbourDistances = np.empty(len(rows), dtype=object)
+        for i, (part, distance) in enumerate(zip(np.split(candidates, splits), np.split(distances, splits))):
+            neighbours[i] = part
+            neighbourDistances[i] = distance
+        if returnDistances:
+            return neighbours, neighbourDistances
+        return neighbours
+
+    def nearest(self, rows: ArrayLike, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """
+        the k nearest clusters of the same group for every queried cluster, returns
+        their rows and distances, both of the shape (queries, k). if a group has
+        fewer clusters, the remaining rows are -1 and the distances inf
+        """
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+        groups = self.groupIDs[rows]
+        starts = self.groupStarts[groups]
+        sizes = self.groupStarts[groups + 1] - starts
+
+        # every cluster of the group is a candidate, the groups are small
+        pairQueries = np.repeat(np.arange(len(rows)), sizes)
+        within = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        candidates = self.groupOrder[np.repeat(starts, sizes) + within]
+        distances = np.linalg.norm(self.coordinates[candidates] - self.coordinates[rows][pairQueries], axis=1)
+        distances[candidates == rows[pairQueries]] = np.inf
+
+        order = np.lexsort((distances, pairQueries))
+        pairQueries, candidates, distances = pairQueries[order], candidates[order], distances[order]
+        ranks = np.arange(len(order)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        taken = (ranks < k) & np.isfinite(distances)
+
+        neighbours = np.full((len(rows), k), -1, dtype=np.int64)
+        neighbourDistances = np.full((len(rows), k), np.inf)
+        neighbours[pairQueries[taken], ranks[taken]] = candidates[taken]
+        neighbourDistances[pairQueries[taken], ranks[taken]] = distances[taken]
+        return neighbours, neighbourDistances
@@ -0,0 +1,81 @@
+import numpy as np
+from numpy.typing import ArrayLike
+from typing import Iterable
+
+
+def entryNumbers(eventTree) -> np.ndarray:
+    """
+    the entry numbers of the events of a tree inside its file, for views and
+    chunks these are the entries they were taken from
+    """
+    entries = getattr(eventTree, 'entries', None)
+    if entries is None:
+        return np.arange(eventTree.num_entries)
+    return entries
+
+
+class TreeView:
+    """
+    a part of a tree, either the entries from 'entryStart' to 'entryStop' or an
+    explicit list of entries. like the TreeChunk it mimics the part of the uproot
+    TTree interface the detector classes use, but every 'arrays' call only reads
+    the selected entries, so that a quick look at the first 1000 events doesn't
+    decompress the whole file. explicit entries are read as contiguous runs, runs
+    closer than 'maxGap' entries are merged into one read
+    """
+    def __init__(self, eventTree, entryStart: int | None = None, entryStop: int | None = None, entries: ArrayLike | None = None, maxGap: int = 1000) -> None:
+        self.tree = eventTree
+        self.maxGap = maxGap
+        numEntries = eventTree.num_entries
+        start, stop, _ = slice(entryStart, entryStop).indices(numEntries)
+        stop = max(start, stop)
+        if entries is None:
+            self.entries = np.arange(start, stop)
+        else:
+            entries = np.unique(np.asarray(entries, dtype=int))
+            if len(entries) > 0 and (entries[0] < 0 or entries[-1] >= numEntries):
+                raise IndexError(f'entries have to be between 0 and {numEntries - 1}')
+            self.entries = entries[(entries >= start) & (entries < stop)]
+
+    @property
+    def num_entries(self) -> int:
+        return len(self.entries)
+
+    def keys(self) -> list:
+        return self.tree.keys()
+
+    def __getitem__(self, key: str):
+        return self.tree[key]
+
+    def _runs(self, entries: np.ndarray) -> list[tuple[int, int]]:
+        """
+        splits sorted entries into ranges, that are read with one call each
+        """
+        if len(entries) == 0:
+            return [(0, 0)]
+        breaks = np.nonzero(np.diff(entries) > self.maxGap)[0] + 1
+        starts = entries[np.concatenate(([0], breaks))]
+        stops = entries[np.concatenate((breaks - 1, [len(entries) - 1]))] + 1
+        return list(zip(starts.tolist(), stops.tolist()))
+
+    def arrays(self, expressions: str | Iterable[str], library: str = 'np', entry_start: int | None = None, entry_stop: int | None = None, **kwargs) -> dict:
+        """
+        entry_start and entry_stop count the entries of the view, not of the file
+        """
+        if isinstance(expressions, str):
+            expressions = [expressions]
+        expressions = list(expressions)
+        entries = self.entries[entry_start:entry_stop]
+
+        parts = []
+        for start, stop in self._runs(entries):
+            part = self.tree.arrays(expressions, library=library, entry_start=start, entry_stop=stop, **kwargs)
+            # dropping the entries between the selected ones inside a merged run
+            wanted = entries[(entries >= start) & (entries < stop)] - start
+            if len(wanted) != stop - start:
+                part = {key: value[wanted] for key, value in part.items()}
+            parts.append(part)
+
+        if len(parts) == 1:
+            return parts[0]
+        return {key: np.concatenate([part[key] for part in parts]) for key in parts[0].keys()}
@@ -1 +1,5 @@
+from .detector import Detector
+from .engine import SensorGeometry
 from .pxd import PXD
+from .occupancy import OccupancyMap
+from .clusterShapes import ClusterShapes, EtaCorrection
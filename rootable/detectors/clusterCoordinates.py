@@ -1,11 +1,10 @@
 import numpy as np
-from ..common import calcSpherical
-from concurrent.futures import ThreadPoolExecutor
+from .engine import SensorGeometry
 
 
-class ClusterCoordinates:
+class ClusterCoordinates(SensorGeometry):
     """
-    This class takes care of cluster coordinates
+    This class takes care of cluster coordinates, it's the geometry of the pxd
     """
     def __init__(self) -> None:
         # these are the sensor IDs of the pxd modules/panels from the root file, they are
@@ -82,48 +81,12 @@ class ClusterCoordinates:
             self.transformation[self.panelIDs[i]] = [self.panelShifts[i], self.panelRotations[i]]
             self.layersLadders[self.panelIDs[i]] = [self.panelLayer[i], self.panelLadder[i]]
 
+        # the lookup tables, that transform all clusters at once
+        super().__init__(self.panelIDs, self.panelShifts, self.panelRotations, self.panelLayer, self.panelLadder)
+
     def get(self, uPositions: np.ndarray, vPositions: np.ndarray, sensorIDs: np.ndarray) -> dict:
         """
         converting the uv coordinates, together with sensor ids, into xyz coordinates
         """
-        #setting up index chunks for multi threading
-        #indexChunks = np.array_split(range(len(sensorIDs)), 4)
-
-        xPosition, yPosition, zPosition = np.zeros_like(uPositions, dtype=float), np.zeros_like(uPositions, dtype=float), np.zeros_like(uPositions, dtype=float)
-
-        for sensorID in self.panelIDs:
-            indices = np.where(sensorIDs == sensorID)
-
-            # grabbing the shift vector and rotation angle
-            shift, angle = self.transformation[sensorID]
-
-            # setting up rotation matrix
-            theta = np.deg2rad(angle)
-            rotMatrix = np.array([[np.cos(theta), -np.sin(theta), 0], [np.sin(theta), np.cos(theta), 0], [0, 0, 1]])
-
-            points = np.column_stack((uPositions[indices], np.zeros_like(uPositions[indices]), vPositions[indices]))
-            rotated = np.matmul(points, rotMatrix) + shift
-            xPosition[indices], yPosition[indices], zPosition[indices] = rotated[:,0], rotated[:,1], rotated[:,2]
-
-        return {'xPosition': xPosition, 'yPosition': yPosition, 'zPosition': zPosition}
-
-    def layers(self, sensorIDs: np.ndarray) -> dict:
-        """
-        looks up the corresponding layers and ladders for every cluster
-        """
-        layersLadders = {}
-        length = len(sensorIDs)
-        layers = np.empty(length, dtype=int)
-        ladders = np.empty(length, dtype=int)
-
-        for i, id in enumerate(sensorIDs):
-            layers[i], ladders[i] = self.layersLadders[id]
+        return self.transform(uPositions, vPositions, sensorIDs)
 
-        return {'layer': np.array(layers, dtype=int),
-               'ladder': np.array(ladders, dtype=int)}
-
-    def sphericals(self, xPosition: np.ndarray, yPosition: np.ndarray, zPosition: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
-        """
-        this calculates spherical coordinates from xyz coordinates
-        """
-        return calcSpherical(xPosition, yPosition, zPosition)
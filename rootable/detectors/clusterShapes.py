@@ -0,0 +1,93 @@
+import numpy as np
+from numpy.typing import ArrayLike
+from . import engine
+
+
+class ClusterShapes:
+    """
+    shape features of the clusters, calculated from their digits. the digits of all
+    clusters are flattened once and every feature is a reduction over the segments
+    of the clusters, so there's no loop over the clusters. positions are in cells
+    uCoG/vCoG: the charge weighted center of gravity
+    uVariance/vVariance/uvCovariance: the charge weighted second moments around the center
+    uEta/vEta: the charge sharing between the seed and its larger neighbour, right / (left + right)
+    seedRatio: seed charge over the cluster charge
+    uExtent/vExtent: the number of cells from the first to the last digit
+    """
+    keys = ['uCoG', 'vCoG', 'uVariance', 'vVariance', 'uvCovariance', 'uEta', 'vEta', 'seedRatio', 'uExtent', 'vExtent']
+
+    def get(self, cellCharges: ArrayLike, uCellIDs: ArrayLike, vCellIDs: ArrayLike) -> dict:
+        charges, sizes = engine.flatten(cellCharges, float)
+        uCells = engine.flatten(uCellIDs, float)[0]
+        vCells = engine.flatten(vCellIDs, float)[0]
+        clusters = np.repeat(np.arange(len(sizes)), sizes)
+
+        # clusters without digits (e.g. all of them were hot pixels) get nan
+        total = engine.segmentSum(charges, sizes)
+        weights = np.divide(1., total, out=np.full(len(total), np.nan), where=total != 0)
+        uCoG = engine.segmentSum(charges * uCells, sizes) * weights
+        vCoG = engine.segmentSum(charges * vCells, sizes) * weights
+        uDistance = uCells - uCoG[clusters]
+        vDistance = vCells - vCoG[clusters]
+
+        seeds = engine.segmentArgmax(charges, sizes)
+        seedCharge = np.where(seeds >= 0, charges[seeds], np.nan)
+        return {'uCoG': uCoG,
+                'vCoG': vCoG,
+                'uVariance': engine.segmentSum(charges * uDistance**2, sizes) * weights,
+                'vVariance': engine.segmentSum(charges * vDistance**2, sizes) * weights,
+                'uvCovariance': engine.segmentSum(charges * uDistance * vDistance, sizes) * weights,
+                'uEta': engine.chargeSharing(uCells, charges, sizes, seeds)[0],
+                'vEta': engine.chargeSharing(vCells, charges, sizes, seeds)[0],
+                'seedRatio': seedCharge * weights,
+                'uExtent': (engine.segmentReduce(np.maximum, uCells, sizes, -1) - engine.segmentReduce(np.minimum, uCells, sizes, 0) + 1).astype(int),
+                'vExtent': (engine.segmentReduce(np.maximum, vCells, sizes, -1) - engine.segmentReduce(np.minimum, vCells, sizes, 0) + 1).astype(int)}
+
+
+class EtaCorrection:
+    """
+    the eta correction of the positions of clusters, that are reconstructed from
+    digits. the charge center of gravity of two cells moves linear with eta, but
+    the real hit position doesn't. with hits spread evenly over the cells the hit
+    position between the two cells follows the cumulative distribution of eta, it's
+    taken from a sample of clusters (the same kind of data, the correction is used for).
+    a direction without any clusters two cells wide in the sample (e.g. the charge is
+    only shared in v) has no table, its positions stay at the center of gravity
+    uEta/vEta: array = eta of the sample clusters, e.g. from ClusterShapes
+    bins: int = the number of bins of the eta distribution
+    """
+    def __init__(self, uEta: ArrayLike, vEta: ArrayLike, bins: int = 100) -> None:
+        self.edges = np.linspace(0., 1., bins + 1)
+        self.uTable = self._cumulative(uEta)
+        self.vTable = self._cumulative(vEta)
+        if self.uTable is None and self.vTable is None:
+            raise ValueError('the sample has no clusters, that are wider than a single cell')
+
+    @classmethod
+    def fromDigits(cls, cellCharges: ArrayLike, uCellIDs: ArrayLike, vCellIDs: ArrayLike, bins: int = 100) -> 'EtaCorrection':
+        features = engine.sharedInstance(ClusterShapes).get(cellCharges, uCellIDs, vCellIDs)
+        # the correction is only used for clusters, that are two cells wide
+        uEta = np.where(features['uExtent'] == 2, features['uEta'], np.nan)
+        vEta = np.where(features['vExtent'] == 2, features['vEta'], np.nan)
+        return cls(uEta, vEta, bins=bins)
+
+    def _cumulative(self, eta: ArrayLike) -> np.ndarray | None:
+        # only clusters, that are wider than one cell, share charge
+        eta = np.asarray(eta, dtype=float)
+        eta = eta[np.isfinite(eta) & (eta > 0)]
+        if len(eta) == 0:
+            return None
+        counts, _ = np.histogram(eta, bins=self.edges)
+        return np.concatenate(([0.], np.cumsum(counts))) / len(eta)
+
+    def _correct(self, eta: ArrayLike, table: np.ndarray | None) -> np.ndarray:
+        # nan, if there's no table for the direction
+        if table is None:
+            return np.full(np.shape(eta), np.nan)
+        return np.interp(eta, self.edges, table)
+
+    def u(self, eta: ArrayLike) -> np.ndarray:
+        return self._correct(eta, self.uTable)
+
+    def v(self, eta: ArrayLike) -> np.ndarray:
+        return self._correct(eta, self.vTable)
@@ -1,8 +1,14 @@
+from __future__ import annotations
 from collections import defaultdict
 import numpy as np
 from numpy.typing import ArrayLike
-from uproot import TTree
-from ..common import extractMatrix, genCluster
+from ..common import extractMatrix, genCluster, Progress
+from .occupancy import dropHotPixels
+from .clusterShapes import EtaCorrection
+from . import engine
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from uproot import TTree
 
 
 class ClustersFromDigits:
@@ -109,6 +115,10 @@ class ClustersFromDigits:
                                 'vCellID': 'PXDDigits/PXDDigits.m_vCellID',
                              'cellCharge': 'PXDDigits/PXDDigits.m_charge'}
 
+        # the fits as tables, they're evaluated for all clusters at once
+        self.uPitch = engine.SensorPolynomials(self.uFit)
+        self.vPitch = engine.SensorPolynomials(self.vFit)
+
         self.digitsOutKeys = {  'sensorID': 'PXDDigitsOUT/PXDDigitsOUT.m_sensorID',
                                  'uCellID': 'PXDDigitsOUT/PXDDigitsOUT.m_uCellID',
                                  'vCellID': 'PXDDigitsOUT/PXDDigitsOUT.m_vCellID',
@@ -119,34 +129,26 @@ class ClustersFromDigits:
             return list((self.digitsInKeys | self.digitsOutKeys).values())
         return list(self.digitsInKeys.values())
 
-    def _pixelToUV(self, uvIndex: tuple[int], sensorID: int) -> float:
-        """
-        Convert pixel indices to u/v positions based on sensor ID.
-
-        Parameters:
-        - uvIndex (tuple[int]): The u/v pixel index.
-        - sensorID (int): The sensor ID.
-
-        Returns:
-        - tuple[float]: The u/v positions.
-        """
-        uMapped = self.uFit[sensorID](uvIndex[0])
-        vMapped = self.vFit[sensorID](uvIndex[1])
-        # Calculate and return the u/v positions for the given pixel index
-        return uMapped, vMapped
-
-    def get(self, eventTree: TTree, inOut: str = 'inROI') -> dict:
+    def get(self, eventTree: TTree, inOut: str = 'inROI', progress: Progress | None = None, entries: ArrayLike | None = None, hotPixels: np.ndarray | None = None, etaCorrection: EtaCorrection | None = None) -> dict:
         """
         Wrapper method to get cluster data.
 
         Parameters:
         - eventTree (TTree): The input event tree containing digit information.
+        - progress (Progress): Optional progress reporter/cancellation check.
+        - entries (ArrayLike): The event numbers of the entries, defaults to counting from 0.
+        - hotPixels (np.ndarray): Optional mask of noisy pixels (see OccupancyMap), these
+          digits are dropped before clustering.
+        - etaCorrection (EtaCorrection): Optional, corrects the positions of clusters, that
+          are two cells wide, otherwise it's the charge center of gravity.
 
         Returns:
         - dict: A dictionary containing processed cluster data.
         """
         uCellIDs, vCellIDs, cellCharges, sensorIDs = self._selectKeys(eventTree, inOut=inOut)
-        return self._process(uCellIDs, vCellIDs, cellCharges, sensorIDs)
+        if hotPixels is not None:
+            sensorIDs, uCellIDs, vCellIDs, cellCharges = dropHotPixels(hotPixels, np.sort(self.panelIDs), sensorIDs, uCellIDs, vCellIDs, cellCharges)
+        return self._process(uCellIDs, vCellIDs, cellCharges, sensorIDs, progress=progress, entries=entries, etaCorrection=etaCorrection)
 
     def _selectKeys(self, eventTree: TTree, inOut: str = 'inROI') -> tuple:
         """
@@ -168,38 +170,42 @@ class ClustersFromDigits:
 
         return uCellIDs, vCellIDs, cellCharges, sensorIDs
 
-    def _process(self, uCellIDsAllEvents: ArrayLike, vCellIDsAllEvents: ArrayLike, cellChargesAllEvents: ArrayLike, sensorIDsAllEvents: ArrayLike) -> dict:
+    def _process(self, uCellIDsAllEvents: ArrayLike, vCellIDsAllEvents: ArrayLike, cellChargesAllEvents: ArrayLike, sensorIDsAllEvents: ArrayLike, progress: Progress | None = None, entries: ArrayLike | None = None, etaCorrection: EtaCorrection | None = None) -> dict:
         """
         Common method to process either clusters or digits based on the given processType.
 
         Parameters:
         - eventTree (TTree): The input event tree containing digit information.
         - processType (str): The type of processing to perform ('clusters' or 'digits').
+        - progress (Progress): Optional progress reporter, it is checked every chunk of events.
+        - entries (ArrayLike): The event numbers of the entries, defaults to counting from 0.
+        - etaCorrection (EtaCorrection): Optional eta correction of the positions.
 
         Returns:
         - dict: A dictionary containing processed data.
         """
+        progress = progress or Progress()
 
+        # only the clustering runs per event and sensor, the cluster parameters are
+        # calculated afterwards for all clusters at once
         eventNumbers = []
-        clsCharges, seedCharges = [], []
-        clsSizes, uSizes, vSizes = [], [], []
-        uPositions, vPositions = [], []
         sensorIDs = []
         uCellses, vCellsess, cellChargeses = [], [], []
 
-        for i in range(len(sensorIDsAllEvents)):
+        numEvents = len(sensorIDsAllEvents)
+        for i in range(numEvents):
+            progress.update(i, numEvents)
             uCells = uCellIDsAllEvents[i]
             vCells = vCellIDsAllEvents[i]
             charges = cellChargesAllEvents[i]
             sensors = sensorIDsAllEvents[i]
 
-            for sensor in self.panelIDs:
-                uCellIDs = uCells[sensors == sensor]
-                vCellIDs = vCells[sensors == sensor]
-                cellCharges = charges[sensors == sensor]
-
-                if len(cellCharges) == 0:
-                    continue
+            # the panel ids are sorted, so this keeps their order
+            for sensor in np.intersect1d(sensors, self.panelIDs):
+                onSensor = sensors == sensor
+                uCellIDs = uCells[onSensor]
+                vCellIDs = vCells[onSensor]
+                cellCharges = charges[onSensor]
 
                 # the data format/structure is a bit weird, but fear not
                 # for I will resort it, to make is useable and senseable
@@ -207,48 +213,64 @@ class ClustersFromDigits:
 
                 for cluster in clusters:
                     cluster = np.array(cluster)
-                    uCell = cluster[:,0]
-                    vCell = cluster[:,1]
-                    cCharge = cluster[:,2]
-
-                    seedCharge = cCharge.max()
-                    clsCharge = cCharge.sum()
-
-                    uSize = len(np.unique(uCell))
-                    vSize = len(np.unique(vCell))
-                    clsSize = len(cCharge)
-
-                    uSeed = uCell[np.argmax(cCharge)]
-                    vSeed = vCell[np.argmax(cCharge)]
-                    uPosition, vPosition = self._pixelToUV((uSeed, vSeed), sensor)
-
-                    eventNumbers.append(i)
-                    clsCharges.append(clsCharge)
-                    seedCharges.append(seedCharge)
+                    eventNumbers.append(i if entries is None else entries[i])
+                    sensorIDs.append(sensor)
+                    uCellses.append(cluster[:,0])
+                    vCellsess.append(cluster[:,1])
+                    cellChargeses.append(cluster[:,2])
+        progress.update(numEvents, numEvents)
 
-                    clsSizes.append(clsSize)
-                    uSizes.append(uSize)
-                    vSizes.append(vSize)
+        sizes = engine.counts(cellChargeses)
+        uCells, vCells, cellCharges = (engine.regroup(np.concatenate(parts) if len(parts) > 0 else np.array([], dtype=int), sizes)
+                                       for parts in (uCellses, vCellsess, cellChargeses))
+        sensorIDs = np.array(sensorIDs, dtype=int)
+        clusters = self._parameters(uCells, vCells, cellCharges, sensorIDs, etaCorrection)
 
-                    uPositions.append(uPosition)
-                    vPositions.append(vPosition)
+        return {
+            'eventNumber': np.array(eventNumbers, dtype=int),
+            **clusters,
+            'sensorID': sensorIDs,
+            'uCellIDs': uCells,
+            'vCellIDs': vCells,
+            'cellCharges': cellCharges
+        }
 
-                    sensorIDs.append(sensor)
-                    uCellses.append(uCell)
-                    vCellsess.append(vCell)
-                    cellChargeses.append(cCharge)
+    def _parameters(self, uCellIDs: np.ndarray, vCellIDs: np.ndarray, cellCharges: np.ndarray, sensorIDs: np.ndarray, etaCorrection: EtaCorrection | None = None) -> dict:
+        """
+        the cluster parameters from the pixels of the clusters, as segment reductions
+        over the flat pixels. the position is the charge center of gravity (or the eta
+        corrected position) and it's mapped onto the sensor with the fits of the sensors
+        """
+        charges, sizes = engine.flatten(cellCharges, int)
+        uCells = engine.flatten(uCellIDs, int)[0]
+        vCells = engine.flatten(vCellIDs, int)[0]
+        clusters = np.repeat(np.arange(len(sizes)), sizes)
+
+        # the number of different cells in u and v
+        uSize = np.bincount(np.unique(np.stack((clusters, uCells)), axis=1)[0], minlength=len(sizes))
+        vSize = np.bincount(np.unique(np.stack((clusters, vCells)), axis=1)[0], minlength=len(sizes))
+
+        clsCharge = engine.segmentSum(charges, sizes)
+        uCell = engine.segmentSum(charges * uCells, sizes) / np.where(clsCharge != 0, clsCharge, 1)
+        vCell = engine.segmentSum(charges * vCells, sizes) / np.where(clsCharge != 0, clsCharge, 1)
+        if etaCorrection is not None:
+            seeds = engine.segmentArgmax(charges, sizes)
+            uEta, uLower = engine.chargeSharing(uCells, charges, sizes, seeds)
+            vEta, vLower = engine.chargeSharing(vCells, charges, sizes, seeds)
+            # eta only describes the charge sharing of clusters, that are two cells wide,
+            # without a table for a direction (nan) the center of gravity is kept
+            uCorrected, vCorrected = etaCorrection.u(uEta), etaCorrection.v(vEta)
+            uCell = np.where((uSize == 2) & np.isfinite(uCorrected), uLower + uCorrected, uCell)
+            vCell = np.where((vSize == 2) & np.isfinite(vCorrected), vLower + vCorrected, vCell)
 
         return {
-            'eventNumber': np.array(eventNumbers).astype(int),
-            'clsCharge': np.array(clsCharges).astype(int),
-            'seedCharge': np.array(seedCharges).astype(int),
-            'clsSize': np.array(clsSizes).astype(int),
-            'uSize': np.array(uSizes).astype(int),
-            'vSize': np.array(vSizes).astype(int),
-            'uPosition': np.array(uPositions),
-            'vPosition': np.array(vPositions),
-            'sensorID': np.array(sensorIDs).astype(int),
-            'uCellIDs': np.array(uCellses, dtype=object),
-            'vCellIDs': np.array(vCellsess, dtype=object),
-            'cellCharges': np.array(cellChargeses, dtype=object)
+            'clsCharge': clsCharge.astype(int),
+            'seedCharge': engine.segmentReduce(np.maximum, charges, sizes).astype(int),
+            'clsSize': sizes.astype(int),
+            'uSize': uSize.astype(int),
+            'vSize': vSize.astype(int),
+            'uStart': engine.segmentReduce(np.minimum, uCells, sizes).astype(int),
+            'vStart': engine.segmentReduce(np.minimum, vCells, sizes).astype(int),
+            'uPosition': self.uPitch(sensorIDs, uCell),
+            'vPosition': self.vPitch(sensorIDs, vCell)
         }
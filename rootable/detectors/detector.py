@@ -0,0 +1,240 @@
+from __future__ import annotations
+import copy
+import numpy as np
+from numpy.typing import ArrayLike
+from ..common import FancyDict, Progress, SpatialIndex, Categorical, entryNumbers
+from . import engine
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from uproot import TTree
+
+
+class Detector(FancyDict):
+    """
+    the common part of all detectors. a detector only describes its data, the loading
+    (reading the branches, event numbers, joining the digits to the clusters and the
+    coordinate transforms) is done here with the vectorized functions of 'engine'.
+    a new detector is a subclass, that fills in:
+    name: str = the name of the detector, its columns are in Rootable.data[name]
+    clusterKeys: dict = column -> branch of the cluster parameters
+    digitKeys: dict = column -> branch of the digits
+    clusterToDigits: str = the relation branch, that holds the digit indices of every cluster
+    structureKey: str = the cluster column, whose branch is always read for the event
+                        structure, defaults to the first one
+    geometryClass: type = a SensorGeometry, it places the sensors for coordinates and layers
+    positionKeys: tuple = the u, v and sensor columns, that are transformed
+    """
+    name = 'detector'
+    clusterKeys = {}
+    digitKeys = {}
+    clusterToDigits = None
+    structureKey = None
+    geometryClass = None
+    positionKeys = ('uPosition', 'vPosition', 'sensorID')
+
+    # the geometry is built once per process and shared by all instances
+    geometry = engine.Shared('geometryClass')
+
+    # the columns, that define the groups and the positions of the spatial queries
+    spatialSpaces = {'xyz': (['eventID'], ['xPosition', 'yPosition', 'zPosition']),
+                      'uv': (['eventID', 'sensorID'], ['uPosition', 'vPosition'])}
+
+    def __init__(self, data: dict | None = None) -> None:
+        # copies, so that an instance can be changed without changing the class
+        self.clusterKeys = dict(self.clusterKeys)
+        self.digitKeys = dict(self.digitKeys)
+
+        # parameter for checking what has been loaded
+        self.gotClusters = False
+        self.gotCoordinates = False
+        self.gotSphericals = False
+        self.gotLayers = False
+        self.gotDigits = False
+        self.gotMatrices = False
+        self.gotShapes = False
+        self.gotMCData = False
+
+        # this dict stores the data
+        self.data = data if data is not None else {}
+        self.length = 0
+
+        # the spatial indices are built on the first query and kept, until the
+        # columns they were built from change
+        self.spatialIndices = {}
+
+    def emptyCopy(self) -> Detector:
+        """
+        a detector with the same configuration (branches, relation, geometry), but
+        without any data, every file or chunk is loaded into its own one
+        """
+        other = copy.copy(self)
+        Detector.__init__(other)
+        return other
+
+    @property
+    def structureBranch(self) -> str:
+        return self.clusterKeys[self.structureKey or next(iter(self.clusterKeys))]
+
+    def clusterBranches(self, keys: list | None = None) -> list:
+        """
+        the branches of the cluster parameters in keys, and the one with the event structure
+        """
+        keys = self.clusterKeys.keys() if keys is None else keys
+        branches = [branch for key, branch in self.clusterKeys.items() if key in keys]
+        return list(dict.fromkeys(branches + [self.structureBranch]))
+
+    def digitBranches(self) -> list:
+        return list(self.digitKeys.values()) + ([self.clusterToDigits] if self.clusterToDigits is not None else [])
+
+    def branches(self, **kwargs) -> dict:
+        return {'clusters': list(self.clusterKeys.values()), 'digits': self.digitBranches()}
+
+    def stageBranches(self, stage: str, eventKeys: list, includeUnselected: bool = False, keys: list | None = None, fields: list | None = None, masked: bool = False) -> list:
+        """
+        the branches a single stage reads from an event tree, this is used to read
+        chunks of the tree ahead of time
+        """
+        clusters = self.clusterBranches(keys)
+        branches = {'clusters': clusters, 'clusterColumns': clusters, 'coordinates': clusters, 'sphericals': clusters, 'layers': clusters,
+                    'digits': self.digitBranches(), 'matrices': self.digitBranches(), 'shapes': self.digitBranches()}
+        return branches.get(stage, [])
+
+    def hasClusters(self, eventKeys: list) -> bool:
+        return set(self.clusterKeys.values()).issubset(set(eventKeys))
+
+    def readClusters(self, eventTree: TTree, keys: list | None = None, entries: ArrayLike | None = None) -> tuple[dict, int]:
+        """
+        the flat cluster columns, with the event number of every cluster, and the
+        number of events, that were read
+        """
+        keys = list(self.clusterKeys.keys()) if keys is None else [key for key in self.clusterKeys.keys() if key in keys]
+        data = eventTree.arrays(self.clusterBranches(keys), library='np')
+        columns = {key: engine.flatten(data[self.clusterKeys[key]])[0] for key in keys}
+        numbers = engine.counts(data[self.structureBranch])
+        columns['eventNumber'] = engine.eventNumbers(numbers, entries)
+        return columns, len(numbers)
+
+    def getClusters(self, eventTree: TTree, fileName: str = None, progress: Progress | None = None, keys: list | None = None, **kwargs) -> None:
+        """
+        keys: list = the cluster parameters to load, defaults to all of them
+        """
+        progress = progress or Progress()
+        columns, numEvents = self.readClusters(eventTree, keys, entryNumbers(eventTree))
+        for key, value in columns.items():
+            self.set(key, value)
+        length = len(self.data['eventNumber']) - self.length
+        self.length = len(self.data['eventNumber'])
+        self.set('fileName', Categorical.full(length, fileName))
+        progress.update(numEvents, numEvents)
+        self.gotClusters = True
+
+    def countClusters(self, eventTree: TTree, includeUnselected: bool = False) -> int | None:
+        """
+        the number of clusters a file holds, it's taken from the counter branch of
+        the cluster array, so that no cluster data needs to be read
+        """
+        if not self.hasClusters(eventTree.keys()):
+            return None
+        branch = self.structureBranch
+        countBranch = getattr(eventTree[branch], 'count_branch', None)
+        if countBranch is not None:
+            counts = countBranch.array(library='np')
+            # the counter branch is tiny, so it's read completely even for a view
+            entries = getattr(eventTree, 'entries', None)
+            return int(np.sum(counts if entries is None else counts[entries]))
+        return int(engine.counts(eventTree.arrays(branch, library='np')[branch]).sum())
+
+    def readHits(self, eventTree: TTree) -> tuple[dict, np.ndarray, np.ndarray]:
+        """
+        the flat digit columns, the number of digits of every event and the relation
+        """
+        data = eventTree.arrays(self.digitBranches(), library='np')
+        hits, hitCounts = {}, np.array([], dtype=np.int64)
+        for key, branch in self.digitKeys.items():
+            hits[key], hitCounts = engine.flatten(data[branch])
+        return hits, hitCounts, data[self.clusterToDigits]
+
+    def getDigits(self, eventTree: TTree, progress: Progress | None = None, rows: ArrayLike | None = None, keep: np.ndarray | None = None, **kwargs) -> None:
+        """
+        the digits of every cluster, joined over the relation for all clusters at once
+        rows: array = only the digits of these clusters are collected
+        keep: array = mask over the flat digits, the others are dropped (e.g. hot pixels)
+        """
+        progress = progress or Progress()
+        hits, hitCounts, relation = self.readHits(eventTree)
+        for key, column in engine.joinRelation(relation, hitCounts, hits, rows=rows, keep=keep).items():
+            self.set(key, column)
+        progress.update(len(hitCounts), len(hitCounts))
+        self.gotDigits = True
+
+    def getCoordinates(self, eventTree: TTree = None, progress: Progress | None = None) -> None:
+        """
+        converting the uv coordinates, together with sensor ids, into xyz coordinates
+        """
+        if eventTree:
+            self.getClusters(eventTree, progress=progress)
+        coordinates = self.geometry.transform(*(self[key] for key in self.positionKeys))
+        for key, data in coordinates.items():
+            self.set(key, data)
+        self.gotCoordinates = True
+
+    def getSphericals(self, eventTree: TTree = None, progress: Progress | None = None) -> None:
+        """
+        converting the xyz coordinates into spherical coordinates
+        """
+        if eventTree:
+            self.getClusters(eventTree, progress=progress)
+        if 'xPosition' in self.data:
+            xPosition, yPosition, zPosition = self['xPosition'], self['yPosition'], self['zPosition']
+        else:
+            coordinates = self.geometry.transform(*(self[key] for key in self.positionKeys))
+            xPosition, yPosition, zPosition = coordinates['xPosition'], coordinates['yPosition'], coordinates['zPosition']
+        r, theta, phi = self.geometry.sphericals(xPosition, yPosition, zPosition)
+        self.set('r', r)
+        self.set('theta', theta)
+        self.set('phi', phi)
+        self.gotSphericals = True
+
+    def getLayers(self, eventTree: TTree = None, progress: Progress | None = None) -> None:
+        if eventTree:
+            self.getClusters(eventTree, progress=progress)
+        layers = self.geometry.layers(self[self.positionKeys[2]])
+        for key, data in layers.items():
+            self.set(key, data)
+        self.gotLayers = True
+
+    def spatialIndex(self, space: str = 'xyz', cellSize: float = 0.1) -> SpatialIndex:
+        """
+        the grid index over the global positions ('xyz', clusters of the same event)
+        or over the positions on the sensors ('uv', clusters of the same event and
+        sensor), it's built lazily and cached
+        """
+        if space not in self.spatialSpaces:
+            raise ValueError(f"unknown space '{space}', choose from {list(self.spatialSpaces.keys())}")
+        groupKeys, positionKeys = self.spatialSpaces[space]
+        # a single file doesn't have event ids, the event numbers do the same job
+        groupKeys = [key if key in self.data or key != 'eventID' else 'eventNumber' for key in groupKeys]
+        missing = [key for key in groupKeys + positionKeys if key not in self.data]
+        if missing:
+            raise KeyError(f'the spatial index needs the columns {missing}, load them first')
+
+        columns = [self.data[key] for key in groupKeys + positionKeys]
+        cached = self.spatialIndices.get((space, cellSize))
+        if cached is None or any(column is not old for column, old in zip(columns, cached[0])):
+            index = SpatialIndex(columns[:len(groupKeys)], np.stack(columns[len(groupKeys):], axis=1), cellSize)
+            cached = (columns, index)
+            self.spatialIndices[(space, cellSize)] = cached
+        return cached[1]
+
+    def radiusQuery(self, rows: ArrayLike, radius: float, space: str = 'xyz', returnDistances: bool = False) -> np.ndarray | tuple:
+        """
+        the rows of all clusters within 'radius' (cm) around the clusters in 'rows', in
+        the same event ('xyz') or on the same sensor of the same event ('uv')
+        """
+        return self.spatialIndex(space, cellSize=radius).radiusQuery(rows, radius, returnDistances=returnDistances)
+
+    def nearest(self, rows: ArrayLike, k: int = 1, space: str = 'xyz') -> tuple[np.ndarray, np.ndarray]:
+        """
+        the rows and distances of the k nearest clusters of every cluster in 'rows'
+        """
+        return self.spatialIndex(space).nearest(rows, k=k)
@@ -0,0 +1,246 @@
+import numpy as np
+from numpy.typing import ArrayLike
+from functools import lru_cache
+from typing import Any
+from ..common import calcSpherical
+
+
+# the shared, vectorized part of the detectors. the root files store everything per
+# event (an array per event, or an array of arrays per event for the relations),
+# these functions turn that into flat columns once and then work on the flat arrays,
+# instead of looping over events and clusters in python
+
+
+@lru_cache(maxsize=None)
+def sharedInstance(cls: type) -> Any:
+    """
+    the one instance per process of a class, that only holds constant tables
+    (geometries, pitch fits, branch names), it's built on its first use
+    """
+    return cls()
+
+
+class Shared:
+    """
+    a class attribute, that gives every instance the shared instance (see sharedInstance)
+    of a helper class, so that the helpers aren't built again for every detector, file
+    or chunk. it can still be replaced on a single instance by assigning to it.
+    cls: type or str = the helper class, or the name of the class attribute, that holds it
+    """
+    def __init__(self, cls: type | str) -> None:
+        self.cls = cls
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        if instance is None:
+            return self
+        cls = getattr(instance, self.cls) if isinstance(self.cls, str) else self.cls
+        return None if cls is None else sharedInstance(cls)
+
+
+def counts(jagged: ArrayLike) -> np.ndarray:
+    """
+    the number of entries of every event
+    """
+    return np.fromiter(map(len, jagged), dtype=np.int64, count=len(jagged))
+
+
+def flatten(jagged: ArrayLike, dtype: np.dtype | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    the arrays of all events as one flat array, together with the number of entries
+    of every event. for relations (an array of index arrays per event) the result
+    is an object array with one index array per cluster
+    """
+    numbers = counts(jagged)
+    if len(numbers) == 0:
+        return np.array([], dtype=dtype if dtype is not None else np.int64), numbers
+    values = np.concatenate(list(jagged))
+    return (values if dtype is None else values.astype(dtype, copy=False)), numbers
+
+
+def eventNumbers(numbers: np.ndarray, entries: ArrayLike | None = None) -> np.ndarray:
+    """
+    the event number of every flat entry, entries are the entry numbers of the events
+    inside of the file (chunks and views don't start at 0)
+    """
+    entries = np.arange(len(numbers)) if entries is None else np.asarray(entries, dtype=int)
+    return np.repeat(entries, numbers)
+
+
+def regroup(values: np.ndarray, numbers: np.ndarray) -> np.ndarray:
+    """
+    cuts flat hits back into one array per cluster, every entry is a view into the
+    flat array. it's filled one by one, np.array would make a 2d array, if all
+    clusters happen to have the same size
+    """
+    column = np.empty(len(numbers), dtype=object)
+    for i, part in enumerate(np.split(values, np.cumsum(numbers)[:-1]) if len(numbers) > 0 else []):
+        column[i] = part
+    return column
+
+
+def segmentSum(values: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """
+    the sum of every segment of a flat array, the segments are consecutive and
+    have the given sizes (e.g. the digits of every cluster)
+    """
+    return np.bincount(np.repeat(np.arange(len(sizes)), sizes), weights=values, minlength=len(sizes))
+
+
+def segmentReduce(ufunc: np.ufunc, values: np.ndarray, sizes: np.ndarray, empty: float = 0) -> np.ndarray:
+    """
+    reduces every segment with a ufunc (np.maximum, np.minimum ...), empty segments get 'empty'
+    """
+    result = np.full(len(sizes), empty, dtype=np.result_type(values, type(empty)))
+    filled = sizes > 0
+    if filled.any():
+        result[filled] = ufunc.reduceat(values, (np.cumsum(sizes) - sizes)[filled])
+    return result
+
+
+def segmentArgmax(values: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """
+    the flat index of the first maximum of every segment, -1 for empty segments
+    """
+    segments = np.repeat(np.arange(len(sizes)), sizes)
+    candidates = np.flatnonzero(values == segmentReduce(np.maximum, values, sizes)[segments])
+    found, first = np.unique(segments[candidates], return_index=True)
+    index = np.full(len(sizes), -1, dtype=np.int64)
+    index[found] = candidates[first]
+    return index
+
+
+def chargeSharing(cells: np.ndarray, charges: np.ndarray, sizes: np.ndarray, seeds: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    eta of every cluster along one direction: the charge is projected onto the cell
+    of the seed and its two neighbours, the seed is paired with the larger neighbour
+    and eta is right / (left + right) of that pair. it's returned together with the
+    left cell of the pair, for clusters, that are one cell wide, eta is 0
+    seeds: array = the flat index of the seed of every cluster, -1 for empty ones
+    """
+    clusters = np.repeat(np.arange(len(sizes)), sizes)
+    seedCells = np.where(seeds >= 0, cells[seeds], 0)
+    offsets = cells - seedCells[clusters]
+    near = np.abs(offsets) <= 1
+    bins = 3 * clusters[near] + offsets[near].astype(int) + 1
+    left, center, right = np.bincount(bins, weights=charges[near], minlength=3 * len(sizes)).reshape(-1, 3).T
+    upper = right >= left
+    numerator = np.where(upper, right, center)
+    denominator = np.where(upper, center + right, left + center)
+    eta = np.divide(numerator, denominator, out=np.full(len(sizes), np.nan), where=denominator != 0)
+    return eta, np.where(upper, seedCells, seedCells - 1)
+
+
+def joinRelation(relation: ArrayLike, hitCounts: np.ndarray, hits: dict, rows: ArrayLike | None = None, keep: np.ndarray | None = None) -> dict:
+    """
+    the hits of every cluster, for a relation, that holds for every cluster the
+    indices of its hits inside of its event. the indices are turned into indices
+    into the flat hit columns with the hit offsets of the events, then every hit
+    column is gathered once and cut into the clusters.
+    relation: array = per event, an array with the hit indices of every cluster
+    hitCounts: array = the number of hits of every event
+    hits: dict = the flat hit columns, e.g. {'uCellIDs': ..., 'cellCharges': ...}
+    rows: array = only the clusters with these (flat) indices are joined
+    keep: array = boolean mask over the flat hits, the others are left out of the clusters
+    """
+    clusters, clusterCounts = flatten(relation)
+    events = np.repeat(np.arange(len(clusterCounts)), clusterCounts)
+    if rows is not None:
+        rows = np.asarray(rows, dtype=int)
+        clusters, events = clusters[rows], events[rows]
+
+    sizes = counts(clusters)
+    local = np.concatenate(list(clusters)).astype(np.int64, copy=False) if sizes.sum() > 0 else np.array([], dtype=np.int64)
+    hitOffsets = np.cumsum(hitCounts) - hitCounts
+    index = local + np.repeat(hitOffsets[events], sizes)
+    if keep is not None:
+        kept = keep[index]
+        index = index[kept]
+        sizes = np.bincount(np.repeat(np.arange(len(sizes)), sizes)[kept], minlength=len(sizes))
+    return {key: regroup(np.asarray(values)[index], sizes) for key, values in hits.items()}
+
+
+class SensorPolynomials:
+    """
+    a polynomial per sensor (e.g. cell -> position), stored as one table of
+    coefficients, that is indexed by the sensor id, so that it's evaluated for all
+    entries at once
+    fits: dict = sensor id -> np.poly1d
+    """
+    def __init__(self, fits: dict) -> None:
+        sensorIDs = np.array(sorted(fits.keys()))
+        degree = max(fits[sensorID].order for sensorID in sensorIDs)
+        self.sortedIDs = sensorIDs
+        # highest power first like np.poly1d, lower orders are padded with zeros
+        self.coefficients = np.zeros((len(sensorIDs), degree + 1))
+        for row, sensorID in enumerate(sensorIDs):
+            coefficients = fits[sensorID].coeffs
+            self.coefficients[row, degree + 1 - len(coefficients):] = coefficients
+
+    def __call__(self, sensorIDs: ArrayLike, values: ArrayLike) -> np.ndarray:
+        sensorIDs = np.asarray(sensorIDs)
+        rows = np.minimum(np.searchsorted(self.sortedIDs, sensorIDs), len(self.sortedIDs) - 1)
+        if not np.all(self.sortedIDs[rows] == sensorIDs):
+            raise KeyError(f'unknown sensor ids {np.unique(sensorIDs[self.sortedIDs[rows] != sensorIDs]).tolist()}')
+        values = np.asarray(values, dtype=float)
+        result = np.zeros(len(values))
+        for coefficients in self.coefficients[rows].T:
+            result = result * values + coefficients
+        return result
+
+
+class SensorGeometry:
+    """
+    the position of every sensor, as tables, that are indexed by the sensor id. the
+    transformations are done for all clusters at once, every cluster looks up the
+    row of its sensor, so there's no loop over the sensors.
+    a sensor is placed by rotating the uv plane around the beam axis and shifting it
+    sensorIDs: array = the ids of the sensors
+    shifts: array = (sensors, 3) shift of every sensor
+    rotations: array = rotation around the beam axis in degrees
+    layers/ladders: array = the layer and ladder of every sensor
+    """
+    def __init__(self, sensorIDs: ArrayLike, shifts: ArrayLike, rotations: ArrayLike, layers: ArrayLike | None = None, ladders: ArrayLike | None = None) -> None:
+        sensorIDs = np.asarray(sensorIDs)
+        order = np.argsort(sensorIDs, kind='stable')
+        self.sortedIDs = sensorIDs[order]
+        theta = np.deg2rad(np.asarray(rotations, dtype=float))[order]
+        self.cos, self.sin = np.cos(theta), np.sin(theta)
+        self.shifts = np.asarray(shifts, dtype=float)[order]
+        self.layerTable = None if layers is None else np.asarray(layers, dtype=int)[order]
+        self.ladderTable = None if ladders is None else np.asarray(ladders, dtype=int)[order]
+
+    def lookup(self, sensorIDs: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+        """
+        the table row of every sensor id and whether the sensor is known
+        """
+        sensorIDs = np.asarray(sensorIDs)
+        index = np.minimum(np.searchsorted(self.sortedIDs, sensorIDs), len(self.sortedIDs) - 1)
+        return index, self.sortedIDs[index] == sensorIDs
+
+    def transform(self, uPositions: ArrayLike, vPositions: ArrayLike, sensorIDs: ArrayLike) -> dict:
+        """
+        uv coordinates on the sensors into global xyz coordinates, unknown sensors stay at 0
+        """
+        uPositions = np.asarray(uPositions, dtype=float)
+        vPositions = np.asarray(vPositions, dtype=float)
+        index, known = self.lookup(sensorIDs)
+        # the same as the row vector (u, 0, v) times the rotation matrix
+        xPosition = np.where(known, uPositions * self.cos[index] + self.shifts[index, 0], 0.)
+        yPosition = np.where(known, -uPositions * self.sin[index] + self.shifts[index, 1], 0.)
+        zPosition = np.where(known, vPositions + self.shifts[index, 2], 0.)
+        return {'xPosition': xPosition, 'yPosition': yPosition, 'zPosition': zPosition}
+
+    def layers(self, sensorIDs: ArrayLike) -> dict:
+        """
+        the layer and ladder of every cluster
+        """
+        index, known = self.lookup(sensorIDs)
+        if not known.all():
+            raise KeyError(f'unknown sensor ids {np.unique(np.asarray(sensorIDs)[~known]).tolist()}')
+        return {'layer': self.layerTable[index].astype(int), 'ladder': self.ladderTable[index].astype(int)}
+
+    def sphericals(self, xPosition: np.ndarray, yPosition: np.ndarray, zPosition: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        this calculates spherical coordinates from xyz coordinates
+        """
+        return calcSpherical(xPosition, yPosition, zPosition)
@@ -2,6 +2,8 @@ import numpy as np
 from numpy.typing import ArrayLike
 from concurrent.futures import ThreadPoolExecutor
 from time import time
+from ..common.backend import useNumba
+from ..common.kernels import fillWindows
 
 
 class GenerateMatrices:
@@ -11,12 +13,22 @@ class GenerateMatrices:
     def get(self, cellCharges: np.ndarray, uCellIDs: np.ndarray, vCellIDs: np.ndarray, matrixSize: tuple = (9, 9), order: str = 'uv') -> dict:
         assert order == 'uv' or order == 'vu', f"{order} is not a proper order, 'uv' or 'vu' are the only options"
 
-        lengthes = np.vectorize(len)(cellCharges)
+        lengthes = np.fromiter(map(len, cellCharges), dtype=int, count=len(cellCharges))
         uniqueLengthes = np.unique(lengthes)
         plotRange = np.array(matrixSize) // 2
         matrices = np.zeros((len(cellCharges), *matrixSize), dtype=int)
 
+        # the compiled loop goes over the flat pixels once, instead of once per cluster size
+        if useNumba() and (order == 'uv' or matrixSize[0] == matrixSize[1]) and lengthes.sum() > 0:
+            offsets = np.concatenate(([0], np.cumsum(lengthes)))
+            uCells, vCells, charges = (np.concatenate(list(column)).astype(np.int64) for column in (uCellIDs, vCellIDs, cellCharges))
+            fillWindows(uCells, vCells, charges, offsets, matrices, order == 'vu')
+            return {'matrix': matrices}
+
         for length in uniqueLengthes:
+            # clusters without digits (all of them were hot pixels) keep an empty matrix
+            if length == 0:
+                continue
             indices = np.where(lengthes == length)[0]
             uCells = np.vstack(uCellIDs[indices])
             vCells = np.vstack(vCellIDs[indices])
@@ -1,13 +1,20 @@
+from __future__ import annotations
 import numpy as np
 from numpy.typing import ArrayLike
-from uproot import TTree
-from ..common import fillMCList, extractMatrix
+from ..common import fillMCList, gatherMCData, selectReferences, genCluster, Progress
+from .occupancy import dropHotPixels, dropHotRelation
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from uproot import TTree
 
 
 class MCtoClusters:
     """
     This class establishes the relationship between clusters and monte carlo data
     """
+    # the mc parameters, that are loaded if nothing else is asked for
+    defaultFields = ['momentumX', 'momentumY', 'momentumZ', 'pdg']
+
     def __init__(self) -> None:
         # behind these keys are the monte carlo info on the simulated data
         self.mcKeys = {              'pdg': 'MCParticles/MCParticles.m_pdg',
@@ -32,24 +39,37 @@ class MCtoClusters:
         self.mcClusterRelations = {'from': 'PXDClustersToMCParticles/m_elements/m_elements.m_from',
                                      'to': 'PXDClustersToMCParticles/m_elements/m_elements.m_to'}
 
-    def branches(self, *, includeUnselected: bool = False) -> list:
-        return list((self.mcKeys | self.mcClusterRelations).values())
+    def fieldBranches(self, fields: list | None = None) -> list:
+        """
+        the mc particle branches behind the requested fields, defaults to pdg and momentum
+        """
+        fields = self.defaultFields if fields is None else list(fields)
+        unknown = [field for field in fields if field not in self.mcKeys]
+        if unknown:
+            raise ValueError(f'unknown monte carlo fields {unknown}, choose from {list(self.mcKeys.keys())}')
+        return [self.mcKeys[field] for field in fields]
+
+    def branches(self, *, includeUnselected: bool = False, fields: list | None = None) -> list:
+        return self.fieldBranches(fields) + list(self.mcClusterRelations.values())
 
-    def get(self, eventTree: TTree) -> dict:
+    def get(self, eventTree: TTree, progress: Progress | None = None, fields: list | None = None, rows: ArrayLike | None = None) -> dict:
         """
         this loads the monte carlo from the root file
+        fields: list = the mc particle parameters to load (keys of mcKeys), only
+                       these branches are read, defaults to pdg and momentum
+        rows: array = only the mc data of these clusters (counted over all events) is gathered
         """
+        progress = progress or Progress()
+        fields = self.defaultFields if fields is None else list(fields)
+
         # the monte carlo data, they are longer than the cluster data
-        mcData = eventTree.arrays(self.mcKeys.values(), library='np')
-        pdg = mcData[self.mcKeys['pdg']]
-        momentumX = mcData[self.mcKeys['momentumX']]
-        momentumY = mcData[self.mcKeys['momentumY']]
-        momentumZ = mcData[self.mcKeys['momentumZ']]
+        mcData = eventTree.arrays(self.fieldBranches(fields), library='np') if fields else {}
 
         # this loads the relation ships to and from clusters and mc data
         # this is the same level of retardedness as with the cluster digits
-        clusterToMC = eventTree.arrays(self.mcClusterRelations['to'], library='np')[self.mcClusterRelations['to']]
-        mcToCluster = eventTree.arrays(self.mcClusterRelations['from'], library='np')[self.mcClusterRelations['from']]
+        relations = eventTree.arrays(self.mcClusterRelations.values(), library='np')
+        clusterToMC = relations[self.mcClusterRelations['to']]
+        mcToCluster = relations[self.mcClusterRelations['from']]
 
         # it need the cluster charge as a jagged/ragged array, maybe I could simply
         # use the event numbers, but I am too tired to fix this shitty file format
@@ -57,59 +77,29 @@ class MCtoClusters:
 
         # reorganizing MC data
         n = len(clusterToMC)
-        momentumXList = np.zeros(n, dtype=object)
-        momentumYList = np.zeros(n, dtype=object)
-        momentumZList = np.zeros(n, dtype=object)
-        pdgList = np.zeros(n, dtype=object)
-        clusterNumbersList = np.zeros(n, dtype=object)
+        clusterNumbersList = np.empty(n, dtype=object)
         for i in range(n):
+            progress.update(i, n)
             # _fillMCList fills in the missing spots, because there are not mc data for
             # every cluster, even though there are more entries in this branch than
             # in the cluster branch... as I said, the root format is retarded
-            fullClusterReferences = fillMCList(mcToCluster[i], clusterToMC[i], len(clsCharge[i]))
-            clusterNumbersList[i] = fullClusterReferences
-            pdgs, xmom, ymom, zmom = self._getMCData(fullClusterReferences, pdg[i], momentumX[i], momentumY[i], momentumZ[i])
-            momentumXList[i] = xmom
-            momentumYList[i] = ymom
-            momentumZList[i] = zmom
-            pdgList[i] = pdgs
+            clusterNumbersList[i] = np.array(fillMCList(mcToCluster[i], clusterToMC[i], len(clsCharge[i])), dtype=int)
+        progress.update(n, n)
 
-        return {
-            'momentumX': np.hstack(momentumXList).astype(float),
-            'momentumY': np.hstack(momentumYList).astype(float),
-            'momentumZ': np.hstack(momentumZList).astype(float),
-                  'pdg': np.hstack(pdgList).astype(int),
-            'clsNumber': np.hstack(clusterNumbersList).astype(int)
-            }
-
-    @staticmethod
-    def _getMCData(toClusters: ArrayLike, pdgs: ArrayLike, xMom: ArrayLike, yMom: ArrayLike, zMom: ArrayLike) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
-        """
-        after filling and reorganizing MC data arrays one can finally collect the
-        actual MC data, where there's data missing I will with zeros
-        """
-        n = len(toClusters)
-        pxList = np.zeros(n)
-        pyList = np.zeros(n)
-        pzList = np.zeros(n)
-        pdgList = np.zeros(n, dtype=int)
-
-        for i, references in enumerate(toClusters):
-            if references == -1:
-                continue  # Arrays were initialized to zero
-            else:
-                pxList[i] = xMom[references]
-                pyList[i] = yMom[references]
-                pzList[i] = zMom[references]
-                pdgList[i] = pdgs[references]
-
-        return pdgList, pxList, pyList, pzList
+        # every requested field is gathered in one go over all events
+        clusterNumbersList = selectReferences(clusterNumbersList, rows)
+        data = {field: gatherMCData(clusterNumbersList, mcData[self.mcKeys[field]]) for field in fields}
+        data['clsNumber'] = np.concatenate(list(clusterNumbersList)).astype(int) if n > 0 else np.array([], dtype=int)
+        return data
 
 
 class MCtoDigits:
     """
     This class establishes the relationship between digits and monte carlo data
     """
+    defaultFields = MCtoClusters.defaultFields
+    fieldBranches = MCtoClusters.fieldBranches
+
     def __init__(self) -> None:
         # these are the sensor IDs of the pxd modules/panels from the root file, they are
         # use to identify on which panels a cluster event happened
@@ -157,21 +147,30 @@ class MCtoDigits:
                                  'vCellID': 'PXDDigitsOUT/PXDDigitsOUT.m_vCellID',
                               'cellCharge': 'PXDDigitsOUT/PXDDigitsOUT.m_charge'}
 
-    def branches(self, *, includeUnselected: bool = False) -> list:
-        if includeUnselected is True:
-            return list((self.mcKeys | self.mcDigitsInRelations | self.mcDigitsOutRelations).values())
-        return list((self.mcKeys | self.mcDigitsInRelations).values())
-
-    def get(self, eventTree: TTree, inOut: str = 'inROI') -> dict:
-        pdg, momentumX, momentumY, momentumZ, fromDigits, toDigits, uCellIDs, vCellIDs, cellCharges, clusterSensorIDs = self._selectKeys(eventTree, inOut=inOut)
-        return self._process(pdg, momentumX, momentumY, momentumZ, fromDigits, toDigits, uCellIDs, vCellIDs, cellCharges, clusterSensorIDs)
+    def branches(self, *, includeUnselected: bool = False, fields: list | None = None) -> list:
+        relations = self.mcDigitsInRelations | self.mcDigitsOutRelations if includeUnselected else self.mcDigitsInRelations
+        return self.fieldBranches(fields) + list(relations.values())
 
-    def _selectKeys(self, eventTree: TTree, inOut: str = 'inROI') -> tuple:
-        mcData = eventTree.arrays(self.mcKeys.values(), library='np')
-        pdg = mcData[self.mcKeys['pdg']]
-        momentumX = mcData[self.mcKeys['momentumX']]
-        momentumY = mcData[self.mcKeys['momentumY']]
-        momentumZ = mcData[self.mcKeys['momentumZ']]
+    def get(self, eventTree: TTree, inOut: str = 'inROI', progress: Progress | None = None, fields: list | None = None, rows: ArrayLike | None = None, hotPixels: np.ndarray | None = None) -> dict:
+        """
+        fields: list = the mc particle parameters to load (keys of mcKeys), only
+                       these branches are read, defaults to pdg and momentum
+        rows: array = only the mc data of these clusters (counted over all events) is gathered
+        hotPixels: array = mask of noisy pixels, they're dropped like for the reconstructed
+                           clusters, so that the mc data lines up with them
+        """
+        mcData, fromDigits, toDigits, uCellIDs, vCellIDs, cellCharges, clusterSensorIDs = self._selectKeys(eventTree, inOut=inOut, fields=fields)
+        if hotPixels is not None:
+            panelIDs = np.sort(self.panelIDs)
+            fromDigits, toDigits = dropHotRelation(hotPixels, panelIDs, clusterSensorIDs, uCellIDs, vCellIDs, fromDigits, toDigits)
+            clusterSensorIDs, uCellIDs, vCellIDs, cellCharges = dropHotPixels(hotPixels, panelIDs, clusterSensorIDs, uCellIDs, vCellIDs, cellCharges)
+        return self._process(mcData, fromDigits, toDigits, uCellIDs, vCellIDs, cellCharges, clusterSensorIDs, progress=progress, rows=rows)
+
+    def _selectKeys(self, eventTree: TTree, inOut: str = 'inROI', fields: list | None = None) -> tuple:
+        fields = self.defaultFields if fields is None else list(fields)
+        branches = self.fieldBranches(fields)
+        mcData = eventTree.arrays(branches, library='np') if branches else {}
+        mcData = {field: mcData[self.mcKeys[field]] for field in fields}
         if inOut == 'inROI':
             relations = eventTree.arrays(self.mcDigitsInRelations.values(), library='np')
             fromDigits = relations[self.mcDigitsInRelations['from']]
@@ -194,65 +193,40 @@ class MCtoDigits:
             cellCharges = digits[self.digitsOutKeys['cellCharge']]
             clusterSensorIDs = digits[self.digitsOutKeys['sensorID']]
 
-        return pdg, momentumX, momentumY, momentumZ, fromDigits, toDigits, uCellIDs, vCellIDs, cellCharges, clusterSensorIDs
-
-    def _process(self, pdg: ArrayLike, momentumX: ArrayLike, momentumY: ArrayLike, momentumZ: ArrayLike, fromDigits: ArrayLike, toDigits: ArrayLike, uCellIDs: ArrayLike, vCellIDs: ArrayLike, cellCharges: ArrayLike, clusterSensorIDs: ArrayLike) -> dict:
-        # Loop through each cell charge to populate matrices and process data
-        pdgCodes = []
-        momentumXList = []
-        momentumYList = []
-        momentumZList = []
-        clsNumbers = []
-
-        for i in range(len(clusterSensorIDs)):
-            # Initialize and populate the matrix
-            matrixLadder = np.zeros((250, 768))
-            matrixLadder[uCellIDs[i], vCellIDs[i]] = cellCharges[i]
-            sensorID = clusterSensorIDs[i]
-            xx, yy = uCellIDs[i], vCellIDs[i]
-
-            # retrieving mc data and references
-            mcDigits = fillMCList(fromDigits[i], toDigits[i], len(sensorID))
-            pdgs = pdg[i]
-            momentaX = momentumX[i]
-            momentaY = momentumY[i]
-            momentaZ = momentumZ[i]
-
-            assert len(mcDigits) == len(sensorID), f'event {i}, mcDigits: {len(mcDigits)} and sensorID: {len(sensorID)}'
-
-            # here I store all pixels, that have already been visited
-            knownPixels = {id: set() for id in self.panelIDs}
-
-            for x, y, id, relation in zip(xx, yy, sensorID, mcDigits):
-                if (x, y) in knownPixels[id]:
-                    continue
+        return mcData, fromDigits, toDigits, uCellIDs, vCellIDs, cellCharges, clusterSensorIDs
 
-                matrix, xLower, yLower = extractMatrix(matrixLadder, x, y)
-                vv, uu = np.nonzero(matrix)
-
-                # Convert local indices of non-zero pixels to global indices
-                globalNonzeroX = vv + xLower
-                globalNonzeroY = uu + yLower
-
-                # Update knownPixels with the global coordinates of the non-zero pixels
-                knownPixels[id].update(zip(globalNonzeroX, globalNonzeroY))
-
-                if relation == -1:
-                    pdgCodes.append(0)
-                    momentumXList.append(0.0)
-                    momentumYList.append(0.0)
-                    momentumZList.append(0.0)
-                else:
-                    pdgCodes.append(pdgs[relation])
-                    momentumXList.append(momentaX[relation])
-                    momentumYList.append(momentaY[relation])
-                    momentumZList.append(momentaZ[relation])
-                clsNumbers.append(relation)
-
-        return {
-            'pdg': np.array(pdgCodes).astype(int),
-            'momentumX': np.array(momentumXList),
-            'momentumY': np.array(momentumYList),
-            'momentumZ': np.array(momentumZList),
-            'clsNumber': np.array(clsNumbers).astype(int)
-        }
+    def _process(self, mcData: dict, fromDigits: ArrayLike, toDigits: ArrayLike, uCellIDs: ArrayLike, vCellIDs: ArrayLike, cellCharges: ArrayLike, clusterSensorIDs: ArrayLike, progress: Progress | None = None, rows: ArrayLike | None = None) -> dict:
+        """
+        mcData: dict = the per event mc particle arrays of every requested field
+        """
+        progress = progress or Progress()
+
+        # the digits are clustered like in ClustersFromDigits (sensor by sensor, in the
+        # order of the sensor ids), so that the references line up with those clusters.
+        # a cluster gets the mc particle of its first digit
+        numEvents = len(clusterSensorIDs)
+        clsNumbers = np.empty(numEvents, dtype=object)
+        for i in range(numEvents):
+            progress.update(i, numEvents)
+            sensors = np.asarray(clusterSensorIDs[i])
+            mcDigits = fillMCList(fromDigits[i], toDigits[i], len(sensors))
+            assert len(mcDigits) == len(sensors), f'event {i}, mcDigits: {len(mcDigits)} and sensorID: {len(sensors)}'
+
+            references = []
+            for sensor in np.intersect1d(sensors, self.panelIDs):
+                onSensor = np.flatnonzero(sensors == sensor)
+                uCells, vCells = uCellIDs[i][onSensor], vCellIDs[i][onSensor]
+                # the first digit of every pixel, the clusters only know the pixels
+                firstDigit = {}
+                for index, u, v in zip(onSensor[::-1], uCells[::-1], vCells[::-1]):
+                    firstDigit[(u, v)] = index
+                for cluster in genCluster(uCells, vCells, cellCharges[i][onSensor]):
+                    cluster = np.asarray(cluster)
+                    references.append(mcDigits[min(firstDigit[(u, v)] for u, v in zip(cluster[:, 0], cluster[:, 1]))])
+            clsNumbers[i] = np.array(references, dtype=int)
+        progress.update(numEvents, numEvents)
+
+        clsNumbers = selectReferences(clsNumbers, rows)
+        data = {field: gatherMCData(clsNumbers, values) for field, values in mcData.items()}
+        data['clsNumber'] = np.concatenate(list(clsNumbers)).astype(int) if numEvents > 0 else np.array([], dtype=int)
+        return data
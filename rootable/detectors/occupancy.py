@@ -0,0 +1,180 @@
+from __future__ import annotations
+import numpy as np
+from numpy.typing import ArrayLike
+from ..common import PrefetchLoader
+from .clusterCoordinates import ClusterCoordinates
+from . import engine
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from uproot import TTree
+
+
+# the number of pixels of a pxd sensor in u and v
+ladderShape = (250, 768)
+
+
+def sensorIndices(panelIDs: np.ndarray, sensorIDs: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+    """
+    the position of every sensor id in the (sorted) panel ids and whether it's one of them
+    """
+    sensorIDs = np.asarray(sensorIDs)
+    index = np.minimum(np.searchsorted(panelIDs, sensorIDs), len(panelIDs) - 1)
+    return index, panelIDs[index] == sensorIDs
+
+
+def hotPixelKeep(hotPixels: np.ndarray, panelIDs: np.ndarray, sensorIDs: ArrayLike, uCellIDs: ArrayLike, vCellIDs: ArrayLike) -> np.ndarray:
+    """
+    looks up all digits in the mask at once, True for every digit, that is kept.
+    hotPixels: array = boolean mask of the shape (sensors, 250, 768) in the order of panelIDs
+    """
+    index, known = sensorIndices(panelIDs, sensorIDs)
+    uCellIDs, vCellIDs = np.asarray(uCellIDs, dtype=int), np.asarray(vCellIDs, dtype=int)
+    known &= (uCellIDs >= 0) & (uCellIDs < ladderShape[0]) & (vCellIDs >= 0) & (vCellIDs < ladderShape[1])
+    keep = np.ones(len(index), dtype=bool)
+    keep[known] = ~hotPixels[index[known], uCellIDs[known], vCellIDs[known]]
+    return keep
+
+
+def dropHotPixels(hotPixels: np.ndarray, panelIDs: np.ndarray, sensorIDs: ArrayLike, uCellIDs: ArrayLike, vCellIDs: ArrayLike, *columns: ArrayLike) -> tuple:
+    """
+    removes the masked digits from per event (jagged) digit arrays, the arrays of
+    all events are flattened, masked in one go and split up again.
+    returns sensorIDs, uCellIDs, vCellIDs and the other columns (e.g. charges)
+    """
+    flatSensors, counts = engine.flatten(sensorIDs)
+    flatU, _ = engine.flatten(uCellIDs)
+    flatV, _ = engine.flatten(vCellIDs)
+    keep = hotPixelKeep(hotPixels, panelIDs, flatSensors, flatU, flatV)
+
+    # the number of digits, that are left in every event
+    events = np.repeat(np.arange(len(counts)), counts)
+    newCounts = np.bincount(events[keep], minlength=len(counts))
+    flatColumns = [flatSensors, flatU, flatV] + [engine.flatten(column)[0] for column in columns]
+    return tuple(engine.regroup(column[keep], newCounts) for column in flatColumns)
+
+
+def dropHotRelation(hotPixels: np.ndarray, panelIDs: np.ndarray, sensorIDs: ArrayLike, uCellIDs: ArrayLike, vCellIDs: ArrayLike, fromDigits: ArrayLike, toDigits: ArrayLike) -> tuple:
+    """
+    the per event relation of the digits to the mc particles (digit index inside of the
+    event -> particle), after the masked digits are dropped. the entries of the masked
+    digits are left out, the others point to the index of their digit among the ones,
+    that are left, so they fit to the digits of dropHotPixels
+    """
+    flatSensors, digitCounts = engine.flatten(sensorIDs)
+    keep = hotPixelKeep(hotPixels, panelIDs, flatSensors, engine.flatten(uCellIDs)[0], engine.flatten(vCellIDs)[0])
+
+    flatFrom, fromCounts = engine.flatten(fromDigits, np.int64)
+    flatTo, _ = engine.flatten(toDigits)
+    events = np.repeat(np.arange(len(fromCounts)), fromCounts)
+    index = flatFrom + (np.cumsum(digitCounts) - digitCounts)[events]
+    kept = keep[index]
+
+    # the digits, that are left before every digit and before the first digit of every event
+    keptBefore = np.concatenate(([0], np.cumsum(keep)))
+    newIndex = keptBefore[index] - keptBefore[np.cumsum(digitCounts) - digitCounts][events]
+    newCounts = np.bincount(events[kept], minlength=len(fromCounts))
+    return engine.regroup(newIndex[kept], newCounts), engine.regroup(flatTo[kept], newCounts)
+
+
+class OccupancyMap:
+    """
+    hit counts and charge sums of every pixel of the 40 pxd sensors, accumulated
+    event chunk by event chunk straight from the digit branches. a fill is one
+    bincount over the flattened (sensor, u, v) index. maps of different files or
+    processes can be merged and the maps are saved into numpy .npz files.
+    the hit rate per event is used to find noisy pixels, 'hotPixels' returns the
+    mask, that is handed to 'getDigits'/'getClusters' or to 'open'
+    """
+    def __init__(self) -> None:
+        self.panelIDs = np.sort(engine.sharedInstance(ClusterCoordinates).panelIDs)
+        self.hits = np.zeros((len(self.panelIDs), *ladderShape), dtype=np.int64)
+        self.charge = np.zeros((len(self.panelIDs), *ladderShape), dtype=np.int64)
+        self.events = 0
+
+        self.digitsInKeys = {  'sensorID': 'PXDDigits/PXDDigits.m_sensorID',
+                                'uCellID': 'PXDDigits/PXDDigits.m_uCellID',
+                                'vCellID': 'PXDDigits/PXDDigits.m_vCellID',
+                             'cellCharge': 'PXDDigits/PXDDigits.m_charge'}
+
+        self.digitsOutKeys = {  'sensorID': 'PXDDigitsOUT/PXDDigitsOUT.m_sensorID',
+                                 'uCellID': 'PXDDigitsOUT/PXDDigitsOUT.m_uCellID',
+                                 'vCellID': 'PXDDigitsOUT/PXDDigitsOUT.m_vCellID',
+                              'cellCharge': 'PXDDigitsOUT/PXDDigitsOUT.m_charge'}
+
+    def fill(self, sensorIDs: ArrayLike, uCellIDs: ArrayLike, vCellIDs: ArrayLike, charges: ArrayLike, numEvents: int = 0) -> 'OccupancyMap':
+        """
+        adds flat digit arrays, the number of events is needed for the occupancy
+        """
+        index, known = sensorIndices(self.panelIDs, sensorIDs)
+        uCellIDs, vCellIDs = np.asarray(uCellIDs, dtype=int), np.asarray(vCellIDs, dtype=int)
+        known &= (uCellIDs >= 0) & (uCellIDs < ladderShape[0]) & (vCellIDs >= 0) & (vCellIDs < ladderShape[1])
+        flat = np.ravel_multi_index((index[known], uCellIDs[known], vCellIDs[known]), self.hits.shape)
+
+        size = self.hits.size
+        self.hits += np.bincount(flat, minlength=size).reshape(self.hits.shape)
+        charges = np.asarray(charges)[known]
+        self.charge += np.bincount(flat, weights=charges, minlength=size).astype(np.int64).reshape(self.charge.shape)
+        self.events += numEvents
+        return self
+
+    def fillTree(self, eventTree: TTree, inOut: str = 'inROI', stepSize: int = 10000) -> 'OccupancyMap':
+        """
+        reads the digits of a tree chunk by chunk, only the four digit branches are read
+        inOut: str = 'inROI' for the ROI selected digits, 'outROI' for the unselected ones
+        """
+        keys = self.digitsInKeys if inOut == 'inROI' else self.digitsOutKeys
+        for chunk in PrefetchLoader(eventTree, list(keys.values()), stepSize=stepSize):
+            digits = chunk.arrays(keys.values(), library='np')
+            sensorIDs, _ = engine.flatten(digits[keys['sensorID']])
+            uCellIDs, _ = engine.flatten(digits[keys['uCellID']])
+            vCellIDs, _ = engine.flatten(digits[keys['vCellID']])
+            charges, _ = engine.flatten(digits[keys['cellCharge']])
+            self.fill(sensorIDs, uCellIDs, vCellIDs, charges, numEvents=chunk.num_entries)
+        return self
+
+    @property
+    def occupancy(self) -> np.ndarray:
+        """
+        the mean number of hits per event of every pixel
+        """
+        return self.hits / max(self.events, 1)
+
+    def __getitem__(self, sensorID: int) -> np.ndarray:
+        """
+        the hit map of one sensor
+        """
+        return self.hits[int(np.searchsorted(self.panelIDs, sensorID))]
+
+    def hotPixels(self, maxOccupancy: float | None = None, factor: float = 10.) -> np.ndarray:
+        """
+        the mask of the noisy pixels, either all pixels firing in more than
+        'maxOccupancy' of the events, or more than 'factor' times as often as
+        the mean pixel of their sensor
+        """
+        occupancy = self.occupancy
+        if maxOccupancy is not None:
+            return occupancy > maxOccupancy
+        meanOccupancy = occupancy.mean(axis=(1, 2), keepdims=True)
+        return (occupancy > factor * meanOccupancy) & (self.hits > 0)
+
+    def merge(self, other: 'OccupancyMap') -> 'OccupancyMap':
+        self.hits += other.hits
+        self.charge += other.charge
+        self.events += other.events
+        return self
+
+    def __iadd__(self, other: 'OccupancyMap') -> 'OccupancyMap':
+        return self.merge(other)
+
+    def save(self, fileName: str) -> None:
+        np.savez_compressed(fileName, panelIDs=self.panelIDs, hits=self.hits, charge=self.charge, events=self.events)
+
+    @classmethod
+    def load(cls, fileName: str) -> 'OccupancyMap':
+        occupancyMap = cls()
+        with np.load(fileName) as file:
+            assert np.array_equal(file['panelIDs'], occupancyMap.panelIDs), 'the map was made for different sensors'
+            occupancyMap.hits = file['hits']
+            occupancyMap.charge = file['charge']
+            occupancyMap.events = int(file['events'])
+        return occupancyMap
@@ -1,83 +1,86 @@
+from __future__ import annotations
 import numpy as np
 from numpy.typing import ArrayLike
-from uproot import TTree
-from ..common import FancyDict
+from ..common import Progress, Categorical, entryNumbers
+from .detector import Detector
+from .occupancy import hotPixelKeep
 from .clusterCoordinates import ClusterCoordinates
 from .mcToClusters import MCtoClusters, MCtoDigits
 from .clustersFromDigits import ClustersFromDigits
 from .generateMatrices import GenerateMatrices
+from .clusterShapes import ClusterShapes, EtaCorrection
+from . import engine
 import warnings
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from uproot import TTree
+
+
+class PXD(Detector):
+    name = 'pxd'
+
+    # these are the branch names for cluster info in the root file
+    clusterKeys = { 'clsCharge': 'PXDClusters/PXDClusters.m_clsCharge',
+                   'seedCharge': 'PXDClusters/PXDClusters.m_seedCharge',
+                      'clsSize': 'PXDClusters/PXDClusters.m_clsSize',
+                        'uSize': 'PXDClusters/PXDClusters.m_uSize',
+                        'vSize': 'PXDClusters/PXDClusters.m_vSize',
+                       'uStart': 'PXDClusters/PXDClusters.m_uStart',
+                       'vStart': 'PXDClusters/PXDClusters.m_vStart',
+                    'uPosition': 'PXDClusters/PXDClusters.m_uPosition',
+                    'vPosition': 'PXDClusters/PXDClusters.m_vPosition',
+                     'sensorID': 'PXDClusters/PXDClusters.m_sensorID'}
+
+    # these are the branch names for cluster digits in the root file
+    digitKeys = {   'uCellIDs': 'PXDDigits/PXDDigits.m_uCellID',
+                    'vCellIDs': 'PXDDigits/PXDDigits.m_vCellID',
+                 'cellCharges': 'PXDDigits/PXDDigits.m_charge'}
+
+    # this establishes the relationship between clusters and digits
+    # because for some reaseon the branch for digits has a different
+    # size/shape than the cluster branch
+    clusterToDigits = 'PXDClustersToPXDDigits/m_elements/m_elements.m_to'
+
+    # the cluster charge carries the event structure, it's always read
+    structureKey = 'clsCharge'
+    geometryClass = ClusterCoordinates
+
+    # list of pxd panels
+    panels = [[[-0.89 ,  0.36 ,  0.36 , -0.89 , -0.89 ], [ 1.4  ,  1.4  ,  1.4  ,  1.4  ,  1.4  ], [-3.12, -3.12, 5.92, 5.92, -3.12]],      # 00
+              [[ 1.25 ,  0.365,  0.365,  1.25 ,  1.25 ], [ 0.72 ,  1.615,  1.615,  0.72 ,  0.72 ], [-3.12, -3.12, 5.92, 5.92, -3.12]],      # 01
+              [[ 1.4  ,   1.4 ,  1.4  ,  1.4  ,  1.4  ], [-0.36 ,  0.89 ,  0.89 , -0.36 , -0.36 ], [-3.12, -3.12, 5.92, 5.92, -3.12]],      # 02
+              [[ 0.72 ,  1.615,  1.615,  0.72 ,  0.72 ], [-1.25 , -0.365, -0.365, -1.25 , -1.25 ], [-3.12, -3.12, 5.92, 5.92, -3.12]],      # 03
+              [[ 0.89 , -0.36 , -0.36 ,  0.89 ,  0.89 ], [-1.4  , -1.4  , -1.4  , -1.4  , -1.4  ], [-3.12, -3.12, 5.92, 5.92, -3.12]],      # 04
+              [[-1.25 , -0.365, -0.365, -1.25 , -1.25 ], [-0.72 , -1.615, -1.615, -0.72 , -0.72 ], [-3.12, -3.12, 5.92, 5.92, -3.12]],      # 05
+              [[-1.4  , -1.4  , -1.4  , -1.4  , -1.4  ], [ 0.36 , -0.89 , -0.89 ,  0.36 ,  0.36 ], [-3.12, -3.12, 5.92, 5.92, -3.12]],      # 06
+              [[-0.72 , -1.615, -1.615, -0.72 , -0.72 ], [ 1.25 ,  0.365,  0.365,  1.25 ,  1.25 ], [-3.12, -3.12, 5.92, 5.92, -3.12]],      # 07
+              [[-0.89 ,  0.36 ,  0.36 , -0.89 , -0.89 ], [ 2.2  ,  2.2  ,  2.2  ,  2.2  ,  2.2  ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 08
+              [[ 0.345,  1.4  ,  1.4  ,  0.345,  0.345], [ 2.35 ,  1.725,  1.725,  2.35 ,  2.35 ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 09
+              [[ 1.48 ,  2.1  ,  2.1  ,  1.48 ,  1.48 ], [ 1.85 ,  0.78 ,  0.78 ,  1.85 ,  1.85 ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 10
+              [[ 2.2  ,  2.2  ,  2.2  ,  2.2  ,  2.2  ], [ 0.89 , -0.36 , -0.36 ,  0.89 ,  0.89 ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 11
+              [[ 2.35 ,  1.725,  1.725,  2.35 ,  2.35 ], [-0.345, -1.4  , -1.4  , -0.345, -0.345], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 12
+              [[ 1.85 ,  0.78 ,  0.78 ,  1.85 ,  1.85 ], [-1.48 , -2.1  , -2.1  , -1.48 , -1.48 ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 13
+              [[ 0.89 , -0.36 , -0.36 ,  0.89 ,  0.89 ], [-2.2  , -2.2  , -2.2  , -2.2  , -2.2  ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 14
+              [[-0.345, -1.4  , -1.4  , -0.345, -0.345], [-2.35 , -1.725, -1.725, -2.35 , -2.35 ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 15
+              [[-1.48 , -2.1  , -2.1  , -1.48 , -1.48 ], [-1.85 , -0.78 , -0.78 , -1.85 , -1.85 ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 16
+              [[-2.2  , -2.2  , -2.2  , -2.2  , -2.2  ], [-0.89 ,  0.36 ,  0.36 , -0.89 , -0.89 ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 17
+              [[-2.35 , -1.725, -1.725, -2.35 , -2.35 ], [ 0.345,  1.4  ,  1.4  ,  0.345,  0.345], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 18
+              [[-1.85 , -0.78 , -0.78 , -1.85 , -1.85 ], [ 1.48 ,  2.1  ,  2.1  ,  1.48 ,  1.48 ], [-4.28, -4.28, 8.08, 8.08, -4.28]]]      # 19
+
+    # classes for loading, reorganizing and calculating specific pieces of data,
+    # they only hold constant tables, so they're built once per process and shared
+    clusterCoordinates = engine.Shared('geometryClass')
+    generateMatrices = engine.Shared(GenerateMatrices)
+    clusterShapes = engine.Shared(ClusterShapes)
+    clustersFromDigits = engine.Shared(ClustersFromDigits)
+    mcToClusters = engine.Shared(MCtoClusters)
+    mcToDigits = engine.Shared(MCtoDigits)
 
-
-class PXD(FancyDict):
     def __init__(self, data: dict | None = None) -> None:
-        self.name = 'pxd'
-
-        # list of pxd panels
-        self.panels = [[[-0.89 ,  0.36 ,  0.36 , -0.89 , -0.89 ], [ 1.4  ,  1.4  ,  1.4  ,  1.4  ,  1.4  ], [-3.12, -3.12, 5.92, 5.92, -3.12]],      # 00
-                       [[ 1.25 ,  0.365,  0.365,  1.25 ,  1.25 ], [ 0.72 ,  1.615,  1.615,  0.72 ,  0.72 ], [-3.12, -3.12, 5.92, 5.92, -3.12]],      # 01
-                       [[ 1.4  ,   1.4 ,  1.4  ,  1.4  ,  1.4  ], [-0.36 ,  0.89 ,  0.89 , -0.36 , -0.36 ], [-3.12, -3.12, 5.92, 5.92, -3.12]],      # 02
-                       [[ 0.72 ,  1.615,  1.615,  0.72 ,  0.72 ], [-1.25 , -0.365, -0.365, -1.25 , -1.25 ], [-3.12, -3.12, 5.92, 5.92, -3.12]],      # 03
-                       [[ 0.89 , -0.36 , -0.36 ,  0.89 ,  0.89 ], [-1.4  , -1.4  , -1.4  , -1.4  , -1.4  ], [-3.12, -3.12, 5.92, 5.92, -3.12]],      # 04
-                       [[-1.25 , -0.365, -0.365, -1.25 , -1.25 ], [-0.72 , -1.615, -1.615, -0.72 , -0.72 ], [-3.12, -3.12, 5.92, 5.92, -3.12]],      # 05
-                       [[-1.4  , -1.4  , -1.4  , -1.4  , -1.4  ], [ 0.36 , -0.89 , -0.89 ,  0.36 ,  0.36 ], [-3.12, -3.12, 5.92, 5.92, -3.12]],      # 06
-                       [[-0.72 , -1.615, -1.615, -0.72 , -0.72 ], [ 1.25 ,  0.365,  0.365,  1.25 ,  1.25 ], [-3.12, -3.12, 5.92, 5.92, -3.12]],      # 07
-                       [[-0.89 ,  0.36 ,  0.36 , -0.89 , -0.89 ], [ 2.2  ,  2.2  ,  2.2  ,  2.2  ,  2.2  ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 08
-                       [[ 0.345,  1.4  ,  1.4  ,  0.345,  0.345], [ 2.35 ,  1.725,  1.725,  2.35 ,  2.35 ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 09
-                       [[ 1.48 ,  2.1  ,  2.1  ,  1.48 ,  1.48 ], [ 1.85 ,  0.78 ,  0.78 ,  1.85 ,  1.85 ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 10
-                       [[ 2.2  ,  2.2  ,  2.2  ,  2.2  ,  2.2  ], [ 0.89 , -0.36 , -0.36 ,  0.89 ,  0.89 ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 11
-                       [[ 2.35 ,  1.725,  1.725,  2.35 ,  2.35 ], [-0.345, -1.4  , -1.4  , -0.345, -0.345], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 12
-                       [[ 1.85 ,  0.78 ,  0.78 ,  1.85 ,  1.85 ], [-1.48 , -2.1  , -2.1  , -1.48 , -1.48 ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 13
-                       [[ 0.89 , -0.36 , -0.36 ,  0.89 ,  0.89 ], [-2.2  , -2.2  , -2.2  , -2.2  , -2.2  ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 14
-                       [[-0.345, -1.4  , -1.4  , -0.345, -0.345], [-2.35 , -1.725, -1.725, -2.35 , -2.35 ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 15
-                       [[-1.48 , -2.1  , -2.1  , -1.48 , -1.48 ], [-1.85 , -0.78 , -0.78 , -1.85 , -1.85 ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 16
-                       [[-2.2  , -2.2  , -2.2  , -2.2  , -2.2  ], [-0.89 ,  0.36 ,  0.36 , -0.89 , -0.89 ], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 17
-                       [[-2.35 , -1.725, -1.725, -2.35 , -2.35 ], [ 0.345,  1.4  ,  1.4  ,  0.345,  0.345], [-4.28, -4.28, 8.08, 8.08, -4.28]],      # 18
-                       [[-1.85 , -0.78 , -0.78 , -1.85 , -1.85 ], [ 1.48 ,  2.1  ,  2.1  ,  1.48 ,  1.48 ], [-4.28, -4.28, 8.08, 8.08, -4.28]]]      # 19
-
-        # these are the branch names for cluster info in the root file
-        self.clusterKeys = { 'clsCharge': 'PXDClusters/PXDClusters.m_clsCharge',
-                            'seedCharge': 'PXDClusters/PXDClusters.m_seedCharge',
-                               'clsSize': 'PXDClusters/PXDClusters.m_clsSize',
-                                 'uSize': 'PXDClusters/PXDClusters.m_uSize',
-                                 'vSize': 'PXDClusters/PXDClusters.m_vSize',
-                                'uStart': 'PXDClusters/PXDClusters.m_uStart',
-                                'vStart': 'PXDClusters/PXDClusters.m_vStart',
-                             'uPosition': 'PXDClusters/PXDClusters.m_uPosition',
-                             'vPosition': 'PXDClusters/PXDClusters.m_vPosition',
-                              'sensorID': 'PXDClusters/PXDClusters.m_sensorID'}
-
-        # these are the branch names for cluster digits in the root file
-        self.digitKeys = {   'uCellIDs': 'PXDDigits/PXDDigits.m_uCellID',
-                             'vCellIDs': 'PXDDigits/PXDDigits.m_vCellID',
-                          'cellCharges': 'PXDDigits/PXDDigits.m_charge'}
-
-        # this establishes the relationship between clusters and digits
-        # because for some reaseon the branch for digits has a different
-        # size/shape than the cluster branch
-        self.clusterToDigis = 'PXDClustersToPXDDigits/m_elements/m_elements.m_to'
-
-
-        # parameter for checking if coordinates have been loaded
-        self.gotClusters = False
-        self.gotCoordinates = False
-        self.gotSphericals = False
-        self.gotLayers = False
-        self.gotDigits = False
-        self.gotMatrices = False
-        self.gotMCData = False
-
-        # setting up classes for loading, reorganizing and calculating
-        # specific pieces of data
-        self.clusterCoordinates = ClusterCoordinates()
-        self.generateMatrices = GenerateMatrices()
-        self.clustersFromDigits = ClustersFromDigits()
-        self.mcToClusters = MCtoClusters()
-        self.mcToDigits = MCtoDigits()
-
-        # this dict stores the data
-        self.data = data if data is not None else {}
-        self.length = 0
+        super().__init__(data)
+
+        # the old name of the relation
+        self.clusterToDigis = self.clusterToDigits
 
     def branches(self, *, includeUnselected: bool = False) -> dict:
         branches = {  'clusters': list(self.clusterKeys.values()),
@@ -86,53 +89,108 @@ class PXD(FancyDict):
         branches['monteCarlo'].extend(self.mcToDigits.branches(includeUnselected=includeUnselected))
         return branches
 
-    def getClusters(self, eventTree: TTree, fileName: str = None, includeUnselected: bool = False) -> None:
+    def stageBranches(self, stage: str, eventKeys: list, includeUnselected: bool = False, keys: list | None = None, fields: list | None = None, masked: bool = False) -> list:
+        """
+        the branches a single stage reads from an event tree, this is used to read
+        chunks of the tree ahead of time. it follows the same logic as the 'get' methods
+        keys: list = the cluster parameters, that are loaded, defaults to all of them
+        fields: list = the monte carlo parameters, that are loaded, defaults to pdg and momentum
+        masked: bool = hot pixels are masked, then the digits need their sensor ids
+        """
+        eventKeys = set(eventKeys)
+        hasClusters = self.hasClusters(eventKeys)
+        digitsIn = list(self.clustersFromDigits.digitsInKeys.values())
+        digitsOut = list(self.clustersFromDigits.digitsOutKeys.values()) if includeUnselected else []
+
+        clusters = self.clusterBranches(keys) if hasClusters else digitsIn
+        digitKeys = self.digitBranches()
+        digits = digitKeys if set(digitKeys).issubset(eventKeys) else digitsIn
+        if masked:
+            digits = digits + [self.clustersFromDigits.digitsInKeys['sensorID']]
+        if hasClusters:
+            mcData = self.mcToClusters.branches(fields=fields) + ['PXDClusters/PXDClusters.m_clsCharge']
+        else:
+            mcData = self.mcToDigits.branches(fields=fields) + digitsIn
+        if includeUnselected:
+            mcData += list(self.mcToDigits.mcDigitsOutRelations.values()) + digitsOut
+
+        branches = {'clusters': clusters + digitsOut,
+                    'clusterColumns': clusters + digitsOut,
+                    'coordinates': clusters + digitsOut,
+                    'sphericals': clusters + digitsOut,
+                    'layers': clusters + digitsOut,
+                    'digits': digits + digitsOut,
+                    'matrices': digits + digitsOut,
+                    'shapes': digits + digitsOut,
+                    'mcData': mcData}
+        return branches[stage]
+
+    def getClusters(self, eventTree: TTree, fileName: str = None, includeUnselected: bool = False, progress: Progress | None = None, keys: list | None = None, hotPixels: np.ndarray | None = None, etaCorrection: EtaCorrection | None = None) -> None:
         """
         this uses the array from __init__ to load different branches into the data dict
+        keys: list = the cluster parameters to load, defaults to all of them
+        hotPixels: array = mask of noisy pixels, they're dropped before clusters are reconstructed from digits
+        etaCorrection: EtaCorrection = corrects the positions of the clusters, that are reconstructed from digits
         """
         #if self.gotClusters:
         #    return
+        progress = progress or Progress()
+        keys = list(self.clusterKeys.keys()) if keys is None else [key for key in self.clusterKeys.keys() if key in keys]
+
+        # chunks and views of a tree keep the entry numbers of the file, so the
+        # event numbers don't restart for every chunk
+        entries = entryNumbers(eventTree)
 
         eventKeys = set(eventTree.keys())
         missing_branches = set(self.clusterKeys.values()) - eventKeys
         if missing_branches:
-            clusters = self.clustersFromDigits.get(eventTree, 'inROI')
-            for key in self.clusterKeys.keys():
+            clusters = self.clustersFromDigits.get(eventTree, 'inROI', progress=progress, entries=entries, hotPixels=hotPixels, etaCorrection=etaCorrection)
+            for key in keys:
                 self.set(key, clusters[key])
             self.set('eventNumber', clusters['eventNumber'])
         else:
-            for key, branch in self.clusterKeys.items():
-                data = self._getData(eventTree, branch)
-                self.set(key, data)
-            clusters = eventTree.arrays('PXDClusters/PXDClusters.m_clsCharge', library='np')['PXDClusters/PXDClusters.m_clsCharge']
-            self._getEventNumbers(clusters)
-
-        length = len(self.data['clsCharge']) - self.length
-        self.length = len(self.data['clsCharge'])
+            # the cluster charge is always read, because it carries the event structure
+            clusters, numEvents = self.readClusters(eventTree, keys, entries)
+            for key, value in clusters.items():
+                self.set(key, value)
+            progress.update(numEvents, numEvents)
+
+        length = len(self.data['eventNumber']) - self.length
+        self.length = len(self.data['eventNumber'])
         self.set('roiSelected', np.array([True] * length))
-        self.set('fileName', np.array([fileName] * length))
+        self.set('fileName', Categorical.full(length, fileName))
 
         missing_branches = set(self.clustersFromDigits.digitsOutKeys.values()) - eventKeys
         if includeUnselected and not missing_branches:
-            clusters = self.clustersFromDigits.get(eventTree, 'outROI')
-            clusters_ = {key: clusters[key] for key in self.clusterKeys.keys()}
-            length = len(clusters_[list(clusters_.keys())[0]])
+            clusters = self.clustersFromDigits.get(eventTree, 'outROI', progress=progress, entries=entries, hotPixels=hotPixels, etaCorrection=etaCorrection)
+            clusters_ = {key: clusters[key] for key in keys}
+            length = len(clusters['eventNumber'])
             self.length += length
             clusters_['roiSelected'] = np.array([False] * length)
-            clusters_['fileName'] = np.array([fileName] * length)
+            clusters_['fileName'] = Categorical.full(length, fileName)
             clusters_['eventNumber'] = clusters['eventNumber']
             self.extend(clusters_)
 
         self.gotClusters = True
 
-    def _getEventNumbers(self, clusters: np.ndarray, offset: int = 0) -> None:
+    def _getEventNumbers(self, clusters: np.ndarray, entries: np.ndarray | None = None) -> None:
         """
         this generates event numbers from the structure of pxd clusters
+        entries: array = the entry numbers of the events inside the file
         """
-        eventNumbers = []
-        for i in range(len(clusters)):
-            eventNumbers.append(np.array([i]*len(clusters[i])) + offset)
-        self.set('eventNumber', np.concatenate(eventNumbers))
+        self.set('eventNumber', engine.eventNumbers(engine.counts(clusters), entries))
+
+    def countClusters(self, eventTree: TTree, includeUnselected: bool = False) -> int | None:
+        """
+        the number of clusters a file holds, it's taken from the counter branch of
+        the cluster array, so that no cluster data needs to be read. it returns None
+        if the clusters have to be reconstructed from digits, then the number is
+        only known after clustering
+        """
+        eventKeys = set(eventTree.keys())
+        if includeUnselected and set(self.clustersFromDigits.digitsOutKeys.values()).issubset(eventKeys):
+            return None
+        return super().countClusters(eventTree)
 
     def _getData(self, eventTree: TTree, keyword: str, library: str = 'np') -> np.ndarray:
         """
@@ -148,13 +206,29 @@ class PXD(FancyDict):
         except:
             return KeyError
 
-    def getDigits(self, eventTree: TTree, includeUnselected: bool = False) -> None:
+    @staticmethod
+    def _splitRows(rows: ArrayLike | None, numSelected: int) -> tuple[np.ndarray | None, np.ndarray | None]:
+        """
+        the rows count the roi selected clusters first and the unselected ones after
+        them, this splits them into the rows of both parts
+        """
+        if rows is None:
+            return None, None
+        rows = np.asarray(rows, dtype=int)
+        return rows[rows < numSelected], rows[rows >= numSelected] - numSelected
+
+    def getDigits(self, eventTree: TTree, includeUnselected: bool = False, progress: Progress | None = None, hotPixels: np.ndarray | None = None, rows: ArrayLike | None = None) -> None:
         """
         reorganizes digits, so that they fit to the clusters
-        this is still pretty slow, because of the underlaying data structure
+        hotPixels: array = mask of noisy pixels (see OccupancyMap), these digits are dropped. the
+                           clusters from the file keep their rows, the ones made only of hot
+                           pixels are left without digits
+        rows: array = only the digits of these clusters are collected, e.g. the ones,
+                      that passed a filter
         """
         #if self.gotDigits:
         #    return
+        progress = progress or Progress()
 
         eventKeys = set(eventTree.keys())
         digitKeys = set(self.digitKeys.values())
@@ -162,53 +236,43 @@ class PXD(FancyDict):
         missing_branches = digitKeys - eventKeys
 
         if missing_branches:
-            digits = self.clustersFromDigits.get(eventTree, 'inROI')
+            digits = self.clustersFromDigits.get(eventTree, 'inROI', progress=progress, hotPixels=hotPixels)
+            rowsIn, rowsOut = self._splitRows(rows, len(digits['uCellIDs']))
             for key in self.digitKeys.keys():
-                self.set(key, digits[key])
+                self.set(key, digits[key] if rowsIn is None else digits[key][rowsIn])
         else:
-            digits = eventTree.arrays(self.digitKeys.values(), library='np')
-            uCellIDs = digits[self.digitKeys['uCellIDs']]
-            vCellIDs = digits[self.digitKeys['vCellIDs']]
-            cellCharges = digits[self.digitKeys['cellCharges']]
-
-            # this establishes the relation between digits and clusters, it's still
-            # shocking to me, that this is necessary, why aren't digits stored in the
-            # same way as clusters, than one wouldn't need to jump through hoops just
-            # to have the data in a usable und sensible manner
-            # root is such a retarded file format
-            clusterDigits = eventTree.arrays(self.clusterToDigis, library='np')[self.clusterToDigis]
-
-            uCellIDsTemp = []
-            vCellIDsTemp = []
-            cellChargesTemp = []
-            for event in range(len(clusterDigits)):
-                for cls in clusterDigits[event]:
-                    uCellIDsTemp.append(uCellIDs[event][cls])
-                    vCellIDsTemp.append(vCellIDs[event][cls])
-                    cellChargesTemp.append(cellCharges[event][cls])
-
-            self.set('uCellIDs', np.array(uCellIDsTemp, dtype=object))
-            self.set('vCellIDs', np.array(vCellIDsTemp, dtype=object))
-            self.set('cellCharges', np.array(cellChargesTemp, dtype=object))
+            # the relation is joined for all clusters at once, the masked digits are
+            # looked up once over the flat digits and left out of the clusters
+            hits, hitCounts, relation = self.readHits(eventTree)
+            keep = None
+            if hotPixels is not None:
+                sensorBranch = self.clustersFromDigits.digitsInKeys['sensorID']
+                sensorIDs = engine.flatten(eventTree.arrays(sensorBranch, library='np')[sensorBranch])[0]
+                keep = hotPixelKeep(hotPixels, np.sort(self.clustersFromDigits.panelIDs), sensorIDs, hits['uCellIDs'], hits['vCellIDs'])
+            rowsIn, rowsOut = self._splitRows(rows, int(engine.counts(relation).sum()))
+            for key, column in engine.joinRelation(relation, hitCounts, hits, rows=rowsIn, keep=keep).items():
+                self.set(key, column)
+            progress.update(len(hitCounts), len(hitCounts))
 
         missing_branches = set(self.clustersFromDigits.digitsOutKeys.values()) - eventKeys
         if includeUnselected and not missing_branches:
-            digits = self.clustersFromDigits.get(eventTree, 'outROI')
-            digits = {key: digits[key] for key in self.digitKeys.keys()}
+            digits = self.clustersFromDigits.get(eventTree, 'outROI', progress=progress, hotPixels=hotPixels)
+            digits = {key: digits[key] if rowsOut is None else digits[key][rowsOut] for key in self.digitKeys.keys()}
             self.extend(digits)
 
         self.gotDigits = True
 
-    def getMatrices(self, eventTree: TTree = None, matrixSize: tuple = (9, 9), includeUnselected: bool = False) -> None:
+    def getMatrices(self, eventTree: TTree = None, matrixSize: tuple = (9, 9), includeUnselected: bool = False, progress: Progress | None = None, hotPixels: np.ndarray | None = None, rows: ArrayLike | None = None) -> None:
         """
         Loads the digit branches into arrays and converts them into adc matrices
+        rows: array = only the matrices of these clusters are made, if the digits have to be read
         """
         #if self.gotMatrices:
         #    return
 
         popDigits = False
         if self.gotDigits is False and eventTree:
-            self.getDigits(eventTree=eventTree, includeUnselected=includeUnselected)
+            self.getDigits(eventTree=eventTree, includeUnselected=includeUnselected, progress=progress, hotPixels=hotPixels, rows=rows)
             popDigits = True
 
         cellCharges = self.data['cellCharges']
@@ -227,48 +291,64 @@ class PXD(FancyDict):
             self.gotDigits = False
         self.gotMatrices = True
 
-    def getCoordinates(self, eventTree: TTree = None) -> None:
+    def getShapeFeatures(self, eventTree: TTree = None, includeUnselected: bool = False, progress: Progress | None = None, hotPixels: np.ndarray | None = None, rows: ArrayLike | None = None) -> None:
         """
-        converting the uv coordinates, together with sensor ids, into xyz coordinates
+        the shape features of the clusters (see ClusterShapes) from their digits, that
+        works for the clusters in the file and for the ones reconstructed from digits.
+        without loaded digits they are read and dropped again afterwards
+        rows: array = only the features of these clusters are calculated, if the digits have to be read
         """
-        #if self.gotCoordinates:
-        #    return
-
-        if eventTree:
-            self.getClusters(eventTree)
-        coordinates = self.clusterCoordinates.get(self['uPosition'], self['vPosition'], self['sensorID'])
-        for key, data in coordinates.items():
-            self.set(key, data)
-        self.gotCoordinates = True
+        popDigits = False
+        if self.gotDigits is False and eventTree:
+            self.getDigits(eventTree=eventTree, includeUnselected=includeUnselected, progress=progress, hotPixels=hotPixels, rows=rows)
+            popDigits = True
 
-    def getLayers(self, eventTree: TTree = None) -> None:
-        if eventTree:
-            self.getClusters(eventTree)
-        layers = self.clusterCoordinates.layers(self['sensorID'])
-        for key, data in layers.items():
-            self.set(key, data)
+        features = self.clusterShapes.get(self.data['cellCharges'], self.data['uCellIDs'], self.data['vCellIDs'])
+        for key, value in features.items():
+            self.set(key, value)
 
-        self.gotLayers = True
+        if popDigits is True:
+            self.data.pop('uCellIDs')
+            self.data.pop('vCellIDs')
+            self.data.pop('cellCharges')
+            self.gotDigits = False
+        self.gotShapes = True
 
-    def getMCData(self, eventTree: TTree, includeUnselected: bool = False) -> None:
+    def getMCData(self, eventTree: TTree, includeUnselected: bool = False, progress: Progress | None = None, fields: list | None = None, rows: ArrayLike | None = None, hotPixels: np.ndarray | None = None) -> None:
         """
         this loads the monte carlo from the root file
+        fields: list = the mc particle parameters to load, e.g. ['pdg', 'energy', 'productionVertexX'],
+                       only their branches are read, defaults to pdg and momentum
+        rows: array = only the mc data of these clusters is gathered
+        hotPixels: array = mask of noisy pixels, for clusters reconstructed from digits it has
+                           to be the same as for the clusters, so that the rows line up
         """
         #if self.gotMCData:
         #    return
 
         eventKeys = set(eventTree.keys())
         missing_branches = set(self.clusterKeys.values()) - eventKeys
+        # with the unselected clusters the rows have to be split, for that the
+        # number of roi selected clusters is needed
+        rowsIn, rowsOut = rows, None
+        if rows is not None and includeUnselected:
+            if missing_branches:
+                numSelected = len(self.clustersFromDigits.get(eventTree, 'inROI', hotPixels=hotPixels)['eventNumber'])
+            else:
+                charges = eventTree.arrays(self.clusterKeys['clsCharge'], library='np')[self.clusterKeys['clsCharge']]
+                numSelected = int(sum(map(len, charges)))
+            rowsIn, rowsOut = self._splitRows(rows, numSelected)
+
         if missing_branches:
-            mcData = self.mcToDigits.get(eventTree, 'inROI')
+            mcData = self.mcToDigits.get(eventTree, 'inROI', progress=progress, fields=fields, rows=rowsIn, hotPixels=hotPixels)
         else:
-            mcData = self.mcToClusters.get(eventTree)
+            mcData = self.mcToClusters.get(eventTree, progress=progress, fields=fields, rows=rowsIn)
 
         for key, data in mcData.items():
             self.set(key, data)
 
         if includeUnselected:
-            mcData = self.mcToDigits.get(eventTree, 'outROI')
+            mcData = self.mcToDigits.get(eventTree, 'outROI', progress=progress, fields=fields, rows=rowsOut, hotPixels=hotPixels)
             self.extend(mcData)
 
         self.gotMCData = True
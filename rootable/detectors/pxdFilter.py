@@ -1,5 +1,9 @@
+from __future__ import annotations
 import numpy as np
-from uproot import TTree
+from ..common import Categorical
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from uproot import TTree
 
 
 class FindUnselectedClusters:
@@ -203,7 +207,6 @@ class FindUnselectedClusters:
         uCells, vCells, cCharges = [], [], []
         seedCharges, clsCharges = [], []
         sensorIDs = []
-        detector, fileNames = [], []
 
         # Loop through each cell charge to populate matrices and process data
         for i in range(len(cellCharges)):
@@ -256,8 +259,6 @@ class FindUnselectedClusters:
                 vSizes.append(len(vv))
                 uSizes.append(len(uu))
                 selected.append(False)
-                detector.append('pxd')
-                fileNames.append(fileName)
 
         # Return the appropriate data based on the processType
         if processType == 'clusters':
@@ -272,8 +273,8 @@ class FindUnselectedClusters:
                 'sensorID': np.array(sensorIDs).astype(int),
                 'eventNumber': np.array(eventNumbers).astype(int),
                 'roiSelected': np.array(selected),
-                'detector': np.array(detector),
-                'fileName': np.array(fileNames)
+                'detector': Categorical.full(len(clsCharges), 'pxd'),
+                'fileName': Categorical.full(len(clsCharges), fileName)
             }
 
         return {
@@ -0,0 +1,189 @@
+import os
+import pickle
+import warnings
+from concurrent.futures import Executor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Iterable
+from .rootable import Rootable
+from .common import FancyDict
+
+
+class Task:
+    """
+    one unit of work, the entries from 'entryStart' to 'entryStop' of one file
+    """
+    def __init__(self, fileName: str, fileIndex: int, entryOffset: int, entryStart: int, entryStop: int) -> None:
+        self.fileName = fileName
+        self.fileIndex = fileIndex
+        self.entryOffset = entryOffset
+        self.entryStart = entryStart
+        self.entryStop = entryStop
+
+    @property
+    def key(self) -> tuple:
+        return (self.fileName, self.entryStart, self.entryStop)
+
+    @property
+    def size(self) -> int:
+        return self.entryStop - self.entryStart
+
+    def __repr__(self) -> str:
+        return f'Task({self.fileName!r}, entries {self.entryStart}-{self.entryStop})'
+
+
+def runTask(task: Task, mapFn: Callable, stages: tuple, columns: list | None, openKwargs: dict, loadKwargs: dict, stageKwargs: dict) -> Any:
+    """
+    loads the entries of one task and hands them to the map function, this runs
+    inside of the worker processes
+    """
+    rootable = Rootable()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        rootable.open(task.fileName, entryStart=task.entryStart, entryStop=task.entryStop, **openKwargs)
+    # the event ids are the ones of the whole list of files
+    rootable.fileIndices = [task.fileIndex]
+    rootable.entryOffsets = [task.entryOffset]
+    if columns is not None:
+        rootable.load(columns, **loadKwargs)
+    else:
+        for stage in stages:
+            getattr(rootable, rootable._stageMethods[stage])(**stageKwargs.get(stage, {}))
+    return mapFn(FancyDict(rootable.pxd.data))
+
+
+def makeTasks(fileNames: list, chunkEvents: int | None = None, openKwargs: dict | None = None) -> list[Task]:
+    """
+    splits the files into tasks of at most 'chunkEvents' entries, only the
+    number of entries of every file is read for this
+    """
+    openKwargs = {key: value for key, value in (openKwargs or {}).items() if key in ('includeUnselected',)}
+    tasks = []
+    entryOffset = 0
+    for fileIndex, fileName in enumerate(fileNames):
+        rootable = Rootable()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            rootable.open(fileName, **openKwargs)
+        numEntries = rootable.fileEntries[0]
+        step = chunkEvents or max(numEntries, 1)
+        for entryStart in range(0, numEntries, step):
+            tasks.append(Task(fileName, fileIndex, entryOffset, entryStart, min(entryStart + step, numEntries)))
+        entryOffset += numEntries
+    return tasks
+
+
+def _loadCheckpoint(checkpoint: str | None) -> tuple[set, Any, bool]:
+    if checkpoint is None or not os.path.isfile(checkpoint):
+        return set(), None, False
+    with open(checkpoint, 'rb') as file:
+        state = pickle.load(file)
+    return state['done'], state['result'], state['hasResult']
+
+
+def _saveCheckpoint(checkpoint: str | None, done: set, result: Any, hasResult: bool) -> None:
+    """
+    the checkpoint is written next to the old one and then moved over it, so that
+    a crash while writing doesn't destroy it
+    """
+    if checkpoint is None:
+        return
+    temporary = f'{checkpoint}.tmp'
+    with open(temporary, 'wb') as file:
+        pickle.dump({'done': done, 'result': result, 'hasResult': hasResult}, file)
+    os.replace(temporary, checkpoint)
+
+
+def mapreduce(fileNames: Iterable[str], mapFn: Callable, reduceFn: Callable, workers: int = 1, chunkEvents: int | None = None,
+              stages: Iterable[str] = ('clusters',), columns: list | None = None, initial: Any = None, retries: int = 1,
+              checkpoint: str | None = None, executor: Executor | None = None, openKwargs: dict | None = None, loadKwargs: dict | None = None,
+              stageKwargs: dict | None = None) -> Any:
+    """
+    runs 'mapFn' over the data of every file (or every chunk of 'chunkEvents' entries
+    of a file) and combines the results with 'reduceFn'. the chunks go to a pool of
+    processes, the biggest ones first, and every worker picks up the next chunk as
+    soon as it's done, so files of different sizes keep all workers busy. the
+    results come back in the order they're finished, so 'reduceFn' has to be
+    associative and commutative (summing up counts or histograms is).
+    fileNames: list = the root files, as for 'Rootable.open'
+    mapFn: callable = gets the columns of a chunk as FancyDict, has to be picklable (a module level function)
+    reduceFn: callable = reduceFn(result, otherResult) -> result
+    workers: int = number of processes, with 1 everything runs in this process
+    chunkEvents: int = entries per chunk, defaults to whole files
+    stages: list = the stages, that are loaded ('clusters', 'coordinates', ...), see 'Rootable.iterate'
+    columns: list = alternatively the columns for 'Rootable.load'
+    initial: any = the start value of the reduction, defaults to the first result
+    retries: int = how often a failed chunk is tried again, before giving up
+    checkpoint: str = file, where the done chunks and the reduced result are stored after
+                      every chunk, if it exists, the run continues where it stopped
+    executor: Executor = an own pool (e.g. of a cluster), instead of a new process pool
+    openKwargs/loadKwargs: dict = handed to 'Rootable.open'/'Rootable.load'
+    stageKwargs: dict = stage -> keyword arguments of its get method, e.g. {'matrices': {'matrixSize': (7, 7)}}
+    """
+    fileNames = list(fileNames)
+    stages = tuple(stages)
+    openKwargs = openKwargs or {}
+    loadKwargs = loadKwargs or {}
+    stageKwargs = stageKwargs or {}
+    for stage in stages:
+        if stage not in Rootable._stageMethods:
+            raise ValueError(f"unknown stage '{stage}', choose from {list(Rootable._stageMethods.keys())}")
+
+    done, result, hasResult = _loadCheckpoint(checkpoint)
+    if not hasResult and initial is not None:
+        result, hasResult = initial, True
+    tasks = [task for task in makeTasks(fileNames, chunkEvents, openKwargs) if task.key not in done]
+    # the longest chunks first, the short ones fill the gaps at the end
+    tasks.sort(key=lambda task: task.size, reverse=True)
+
+    def collect(task: Task, value: Any) -> None:
+        nonlocal result, hasResult
+        result = reduceFn(result, value) if hasResult else value
+        hasResult = True
+        done.add(task.key)
+        _saveCheckpoint(checkpoint, done, result, hasResult)
+
+    arguments = (mapFn, stages, columns, openKwargs, loadKwargs, stageKwargs)
+    if workers <= 1 and executor is None:
+        for task in tasks:
+            for attempt in range(retries + 1):
+                try:
+                    value = runTask(task, *arguments)
+                    break
+                except Exception as error:
+                    if attempt == retries:
+                        raise RuntimeError(f'{task} failed {retries + 1} times') from error
+            collect(task, value)
+        return result
+
+    ownExecutor = executor is None
+    executor = executor or ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = list(reversed(tasks))
+        attempts = {}
+        running = {}
+
+        def submit() -> None:
+            # only a few chunks are queued per worker, the rest waits here, so
+            # that idle workers always get the next chunk
+            while pending and len(running) < 2 * max(workers, 1):
+                task = pending.pop()
+                running[executor.submit(runTask, task, *arguments)] = task
+
+        submit()
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                task = running.pop(future)
+                try:
+                    value = future.result()
+                except Exception as error:
+                    attempts[task.key] = attempts.get(task.key, 0) + 1
+                    if attempts[task.key] > retries:
+                        raise RuntimeError(f'{task} failed {retries + 1} times') from error
+                    pending.append(task)
+                    continue
+                collect(task, value)
+            submit()
+    finally:
+        if ownExecutor:
+            executor.shutdown(wait=True, cancel_futures=True)
+    return result
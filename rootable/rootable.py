@@ -1,10 +1,10 @@
 import numpy as np
 from numpy.typing import ArrayLike
-import uproot as ur
-from typing import Any, Iterable
-import os, warnings
-from .detectors import PXD
-from .common import FancyDict
+from typing import Any, Callable, Iterable
+import os, inspect, warnings
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+from .detectors import PXD, Detector, OccupancyMap, ClusterShapes, EtaCorrection
+from .common import FancyDict, GroupBy, Histogram, Progress, CancelToken, Cancelled, PrefetchLoader, TreeView, EventIndex, ColumnStore, BatchLoader, Categorical, MemoryBudget, SpillBuffer, toDataFrame
 
 
 class Rootable:
@@ -14,31 +14,102 @@ class Rootable:
     it can load the cluster information, uses the digits to generate the adc matrices,
     coordinates, layer and ladders and finally also monte carlo data.
     """
-    def __init__(self, data: dict = None) -> None:
+    # the loading stages, the 'get' command and the import flag of each of them
+    _stageMethods = {'clusters': 'getClusters', 'coordinates': 'getCoordinates', 'sphericals': 'getSphericals',
+                     'layers': 'getLayers', 'digits': 'getDigits', 'matrices': 'getMatrices', 'shapes': 'getShapeFeatures',
+                     'mcData': 'getMCData'}
+    _stageFlags = {'clusters': 'gotClusters', 'coordinates': 'gotCoordinates', 'sphericals': 'gotSphericals',
+                   'layers': 'gotLayers', 'digits': 'gotDigits', 'matrices': 'gotMatrices', 'shapes': 'gotShapes',
+                   'mcData': 'gotMCData'}
+    # the cluster parameters, that the stages, which are calculated from the clusters, need
+    _stageDependencies = {'coordinates': ['uPosition', 'vPosition', 'sensorID'],
+                          'sphericals': ['uPosition', 'vPosition', 'sensorID'],
+                          'layers': ['sensorID']}
+
+    def __init__(self, data: dict = None, detectors: list | None = None, memoryLimit: int | str | None = None, spillPath: str | None = None) -> None:
+        """
+        detectors: list = further detectors (Detector subclasses or instances), their
+                          clusters are read in the same pass over the trees as the pxd
+                          ones and end up in 'data' under their names
+        memoryLimit: int or str = e.g. '4GB', the step size is chosen from the size of the
+                                  branches, if none is given, and columns, that don't fit
+                                  anymore, are moved to memory mapped files on disk
+        spillPath: str = directory for these files, defaults to a temporary one
+        """
         self.pxd = PXD()
+        self.detectors = {'pxd': self.pxd}
+        for detector in detectors or []:
+            detector = detector() if isinstance(detector, type) else detector
+            if not isinstance(detector, Detector):
+                raise TypeError(f'{detector} is not a detector')
+            self.detectors[detector.name] = detector
         self.includeUnselected = False
+        self.memoryBudget = MemoryBudget(memoryLimit, spillPath) if memoryLimit is not None else None
 
         # the root event tree
         self.eventTrees = [None]
 
+        # progress callback and cancel token, they are set by 'open' and can be
+        # overwritten for every single 'get' call
+        self.onProgress = None
+        self.cancelToken = None
+
+        # reading the trees in chunks, None means all entries at once
+        self.stepSize = None
+        self.prefetch = 2
+        self.decompressionExecutor = None
+
+        # bookkeeping for merging several files, the number of entries and rows
+        # (clusters) per file, the global index of the files and the global
+        # event number of their first entries
+        self.workers = 1
+        self.fileEntries = []
+        self.fileRows = None
+        self.fileIndices = []
+        self.entryOffsets = []
+
+        # mask of noisy pixels, their digits are dropped
+        self.hotPixels = None
+
+        # the eta correction of the positions of clusters, that are reconstructed from digits
+        self.etaCorrection = None
+
+        # per event offsets over the cluster rows, built when the clusters are loaded
+        self.eventIndex = None
+
+        # the rows of every file, that passed the filters of 'load', and the number
+        # of rows of every chunk, the later stages only compute these rows
+        self.rowSelection = None
+        self.chunkRows = None
+
+        # the conditions of 'load', files, that are appended later, get the same cuts
+        self.conditions = []
+
         # import flags
         self.gotClusters = False
         self.gotDigits = False
         self.gotMatrices = False
+        self.gotShapes = False
         self.gotCoordinates = False
         self.gotLayers = False
         self.gotSphericals = False
         self.gotMCData = False
 
-    def where(self, *conditions: str) -> dict:
-        return self.pxd.where(*conditions)
+    def where(self, *conditions: str, lazy: bool = False) -> dict:
+        """
+        with lazy the result is a view, its columns are only copied when they're used
+        """
+        return self.pxd.where(*conditions, lazy=lazy)
+
+    def groupby(self, keys: str | list) -> GroupBy:
+        return self.pxd.groupby(keys)
 
     @property
     def data(self) -> dict:
-        return {'pxd': self.pxd.data}
+        return {name: detector.data for name, detector in self.detectors.items()}
 
     def __repr__(self) -> str:
-        return repr({'pxd': self.pxd.data})
+        return repr(self.data)
 
     def __iter__(self) -> Iterable:
         return iter(self.pxd.data)
@@ -51,22 +122,62 @@ class Rootable:
         this makes the class subscriptable, one can retrieve one coloumn by using
         strings as keywords, or get a row by using integer indices or arrays
         """
-        if index == 'pxd':
-            return FancyDict(self.data['pxd'])
+        if isinstance(index, str) and index in self.detectors:
+            return FancyDict(self.detectors[index].data)
         elif isinstance(index, str):
             return self.data['pxd'][index]
         return FancyDict({key: value[index] for key, value in self.data['pxd'].items()})
 
+    def _eventIndex(self) -> EventIndex:
+        """
+        the offset table, it's rebuilt if the rows changed since it was made
+        """
+        if self.eventIndex is None or self.eventIndex.numRows != self.numClusters:
+            eventIDs = self.pxd['eventID'] if 'eventID' in self.pxd.data else self.pxd['eventNumber']
+            self.eventIndex = EventIndex(eventIDs)
+        return self.eventIndex
+
+    def radiusQuery(self, rows: ArrayLike, radius: float, space: str = 'xyz', returnDistances: bool = False) -> np.ndarray | tuple:
+        """
+        the rows of all clusters within 'radius' around the clusters in 'rows', either in
+        the same event ('xyz', needs the coordinates) or on the same sensor ('uv')
+        """
+        return self.pxd.radiusQuery(rows, radius, space=space, returnDistances=returnDistances)
+
+    def nearest(self, rows: ArrayLike, k: int = 1, space: str = 'xyz') -> tuple[np.ndarray, np.ndarray]:
+        """
+        the rows and distances of the k nearest clusters of every cluster in 'rows'
+        """
+        return self.pxd.nearest(rows, k=k, space=space)
+
+    def event(self, event: int) -> FancyDict:
+        """
+        all clusters (and their digits, matrices, mc data...) of one event, the
+        columns are views, nothing gets copied. with several files the event is the
+        global 'eventID'
+        """
+        rows = self._eventIndex().rows(event)
+        return FancyDict({key: value[rows] for key, value in self.pxd.items()})
+
+    def events(self, events: slice) -> FancyDict:
+        """
+        all clusters of a range of events, e.g. events(slice(10, 20))
+        """
+        rows = self._eventIndex().rowRange(events)
+        return FancyDict({key: value[rows] for key, value in self.pxd.items()})
+
     @property
     def numEvents(self) -> int:
         """
-        this makes only sense if you use one file
+        the number of events with at least one cluster, over all files
         """
+        if 'eventID' in self.pxd.data:
+            return len(np.unique(self.pxd['eventID']))
         return len(np.unique(self.pxd['eventNumber']))
 
     @property
     def numClusters(self) -> int:
-        return len(self.pxd['clsCharge'])
+        return len(self.pxd['eventNumber'])
 
     @property
     def particles(self) -> list:
@@ -90,17 +201,52 @@ class Rootable:
     def stack(self, *columns, toKey: str, pop: bool = True) -> None:
        self.pxd.stack(*columns, toKey=toKey)
 
-    def open(self, *fileNames: str, includeUnselected: bool = False) -> None:
+    def open(self, *fileNames: str, includeUnselected: bool = False, onProgress: Callable | None = None, cancelToken: CancelToken | None = None,
+             stepSize: int | None = None, prefetch: int = 2, decompressionExecutor: Executor | None = None, workers: int = 1,
+             entryStart: int | None = None, entryStop: int | None = None, entries: ArrayLike | None = None, hotPixels: np.ndarray | None = None,
+             etaCorrection: EtaCorrection | None = None) -> None:
         """
         Reads the file off of the hard drive; it automatically creates event numbers.
+        onProgress: callable = called as onProgress(stage, file, eventsDone, eventsTotal)
+        cancelToken: CancelToken = stops loading at the next chunk boundary once cancelled
+        stepSize: int = number of entries per chunk, the next chunk is read and decompressed
+                        in the background while the current one is processed
+        prefetch: int = maximal number of chunks waiting in memory
+        decompressionExecutor: Executor = handed to uproot for decompressing in parallel
+        workers: int = number of files, that are loaded in parallel
+        entryStart/entryStop: int = only the entries in this range of every file are read
+        entries: list = only these entries (event numbers) of every file are read
+        hotPixels: array = mask of noisy pixels (see OccupancyMap.hotPixels), their digits are
+                           dropped when digits, matrices or reconstructed clusters (and their
+                           mc data) are loaded. clusters from the file, that only have hot
+                           pixels, keep their rows without digits and with an empty matrix
+        etaCorrection: EtaCorrection = the positions of reconstructed clusters are eta corrected,
+                                       instead of the charge center of gravity
         """
+        # uproot takes a good part of a second to import, it's only needed here
+        import uproot
+
         self.eventTrees = []
         self.fileNames = []
+        self.fileEntries = []
+        self.fileRows = None
+        self.rowSelection = None
+        self.chunkRows = None
         branches = self.pxd.branches(includeUnselected=includeUnselected)
 
         self.multiplyFiles = True if len(fileNames) > 1 else False
         self.includeUnselected = includeUnselected
+        self.onProgress = onProgress
+        self.cancelToken = cancelToken
+        self.stepSize = stepSize
+        self.prefetch = prefetch
+        self.decompressionExecutor = decompressionExecutor
+        self.workers = workers
+        self.hotPixels = hotPixels
+        self.etaCorrection = etaCorrection
         for fileName in fileNames:
+            if cancelToken is not None:
+                cancelToken.check()
             file, _, treeName = fileName.partition(':')
             if not file.endswith('.root'):
                 file += '.root'
@@ -111,7 +257,7 @@ class Rootable:
             self.fileNames.append(fileBaseName)
             # Attempting to open the file and tree
             try:
-                eventTree = ur.open(f'{file}:{treeName}')
+                eventTree = uproot.open(f'{file}:{treeName}')
                 self.eventTrees.append(eventTree)
                 eventKeys = set(eventTree.keys())
                 for branch_type, branch_list in branches.items():
@@ -122,70 +268,735 @@ class Rootable:
                         warnings.warn(f"Missing branches for {branch_type} in '{file}': {missing_branches}")
             except FileNotFoundError:
                 raise FileNotFoundError(f"File {file} not found.")
+            self.fileEntries.append(eventTree.num_entries)
+            if onProgress is not None:
+                onProgress('open', fileBaseName, eventTree.num_entries, eventTree.num_entries)
 
-    def getClusters(self) -> None:
+        self.fileIndices = list(range(len(self.eventTrees)))
+        self.entryOffsets = np.cumsum([0] + self.fileEntries[:-1]).tolist()
+        self._selectEntries(entryStart, entryStop, entries)
+        if self.memoryBudget is not None and stepSize is None:
+            self.stepSize = self._budgetStepSize(branches)
+
+    def _budgetStepSize(self, branches: dict) -> int | None:
+        """
+        the largest step size, for which the chunks, that can be in memory at the same
+        time (the prefetched ones and the one, that is processed, for every worker),
+        fit into the memory limit. the size of an event is taken from the branch metadata
+        """
+        branches = [branch for branchList in branches.values() for branch in branchList]
+        bytesPerEvent = max([self.memoryBudget.bytesPerEvent(eventTree, branches) for eventTree in self.eventTrees], default=0)
+        stepSize = self.memoryBudget.stepSize(bytesPerEvent, chunks=(self.prefetch + 2) * max(self.workers, 1))
+        # a single chunk for every file doesn't need the chunking at all
+        return None if stepSize >= max(self.fileEntries, default=0) else stepSize
+
+    def _spill(self) -> None:
+        """
+        with a memory limit, the biggest columns are moved to disk, once the ones in
+        memory take up too much, they're memory maps afterwards
+        """
+        if self.memoryBudget is None:
+            return
+        for key, column in self.memoryBudget.spill(self.pxd.data).items():
+            self.pxd.data[key] = column
+
+    def _selectEntries(self, entryStart: int | None = None, entryStop: int | None = None, entries: ArrayLike | None = None) -> None:
+        """
+        restricts the opened trees to a range or a list of entries, every 'arrays'
+        call of the detectors only reads these. the event numbers (and the event ids)
+        stay the ones of the whole file
+        """
+        if entryStart is None and entryStop is None and entries is None:
+            return
+        if self.gotClusters:
+            raise ValueError('the entries have to be selected before any data is loaded')
+        trees = [getattr(eventTree, 'tree', eventTree) for eventTree in self.eventTrees]
+        self.eventTrees = [TreeView(eventTree, entryStart, entryStop, entries) for eventTree in trees]
+
+    def _snapshot(self) -> dict:
+        """
+        remembers the length of every column and the import flags, so that a
+        cancelled stage can be rolled back
+        """
+        return {'lengths': {key: len(value) for key, value in self.pxd.items()},
+                 'length': self.pxd.length,
+                  'flags': {key: value for key, value in vars(self.pxd).items() if key.startswith('got')}}
+
+    def _restore(self, snapshot: dict) -> None:
+        """
+        drops every column, that was added after the snapshot, and cuts the
+        others back to their old lengths
+        """
+        for key in self.pxd.keys():
+            if key not in snapshot['lengths']:
+                self.pxd.pop(key)
+            else:
+                self.pxd.data[key] = self.pxd.data[key][:snapshot['lengths'][key]]
+        self.pxd.length = snapshot['length']
+        for key, value in snapshot['flags'].items():
+            setattr(self.pxd, key, value)
+
+    def _runStage(self, stage: str, load: Callable, perFile: bool = True, onProgress: Callable | None = None, cancelToken: CancelToken | None = None, keys: list | None = None, fields: list | None = None) -> None:
+        """
+        runs one loading stage, either for every opened file or once on the data
+        that has already been loaded. the stage is checked for cancellation at
+        every chunk boundary, if it was cancelled, everything it has added so far
+        gets rolled back, so that all columns keep the same length
+        """
+        onProgress = onProgress if onProgress is not None else self.onProgress
+        cancelToken = cancelToken if cancelToken is not None else self.cancelToken
+        snapshot = self._snapshot()
+        try:
+            if perFile:
+                rows = self._countClusters() if stage == 'clusters' else self.fileRows
+                parts = self._loadFiles(stage, load, onProgress, cancelToken, keys=keys, fields=fields)
+                self._fillColumns(stage, parts, rows)
+            else:
+                progress = Progress(onProgress, cancelToken, stage)
+                progress.check()
+                load(self.pxd, None, None, progress)
+                progress.update(self.pxd.numClusters, self.pxd.numClusters)
+        except Cancelled:
+            self._restore(snapshot)
+            raise
+        self._spill()
+
+    def _countClusters(self) -> list | None:
+        """
+        first pass of the multi-file merge, the number of clusters of every file is
+        taken from the branch metadata, before any cluster data is read
+        """
+        if len(self.eventTrees) < 2:
+            return None
+        counts = [self.pxd.countClusters(eventTree, self.includeUnselected) for eventTree in self.eventTrees]
+        return None if None in counts else counts
+
+    def _loadFiles(self, stage: str, load: Callable, onProgress: Callable | None, cancelToken: CancelToken | None, keys: list | None = None, fields: list | None = None) -> Iterable[tuple[int, PXD]]:
+        """
+        loads the stage for every file into its own PXD instance and yields them
+        together with the index of the file, with more than one worker the files
+        are loaded in parallel and come back in the order they are finished
+        """
+        def loadFile(index: int) -> tuple[int, PXD]:
+            progress = Progress(onProgress, cancelToken, stage, self.fileNames[index])
+            progress.check()
+            return index, self._loadFile(stage, load, self.eventTrees[index], self.fileNames[index], progress, keys=keys, fields=fields, index=index)
+
+        indices = range(len(self.eventTrees))
+        if self.workers <= 1 or len(indices) < 2:
+            for index in indices:
+                yield loadFile(index)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(loadFile, index) for index in indices]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def _chunks(self, eventTree, *stages: str, keys: list | None = None, fields: list | None = None) -> PrefetchLoader:
+        """
+        a prefetching loader over the tree, that reads all branches the stages need
+        """
+        eventKeys = eventTree.keys()
+        branches = [branch for stage in stages for branch in self.pxd.stageBranches(stage, eventKeys, self.includeUnselected, keys=keys, fields=fields, masked=self.hotPixels is not None)]
+        if 'clusters' in stages:
+            branches += [branch for _, detector in self._otherDetectors() if detector.hasClusters(eventKeys) for branch in detector.clusterBranches()]
+        return PrefetchLoader(eventTree, branches, stepSize=self.stepSize, prefetch=self.prefetch, decompressionExecutor=self.decompressionExecutor)
+
+    def _loadFile(self, stage: str, load: Callable, eventTree, fileName: str, progress: Progress, keys: list | None = None, fields: list | None = None, index: int = 0) -> PXD:
+        """
+        runs a stage for one file, with a step size it's done chunk by chunk, every
+        chunk is processed by its own PXD instance and the parts are concatenated
+        once at the end, that way the columns don't get copied for every chunk.
+        with a memory limit the finished chunks go to disk, once they take up too
+        much, and the part of the file are memory maps of them (see SpillBuffer).
+        if the rows were filtered, the stages after the clusters only get the rows,
+        that are left, of every chunk
+        """
+        selection = None if stage == 'clusters' or self.rowSelection is None else self.rowSelection[index]
+        withOthers = stage == 'clusters' and len(self.detectors) > 1
+        if self.stepSize is None:
+            part = PXD()
+            load(part, eventTree, fileName, progress, **({} if selection is None else {'rows': selection}))
+            if withOthers:
+                part.others = self._loadOthers(eventTree, fileName)
+            return part
+
+        # without the rows per chunk (the clusters were loaded in one go), every
+        # chunk is computed completely and the rows are picked afterwards
+        perChunk = selection is not None and self.chunkRows is not None and self.chunkRows[index] is not None
+        buffer = SpillBuffer(self.memoryBudget, self.memoryBudget.used(self.pxd.data) if self.memoryBudget is not None else 0)
+        flags, chunkRows, others = None, [], []
+        chunkStart = 0
+        for number, chunk in enumerate(self._chunks(eventTree, stage, keys=keys, fields=fields)):
+            part = PXD()
+            kwargs = {}
+            if perChunk:
+                chunkStop = chunkStart + self.chunkRows[index][number]
+                inChunk = selection[np.searchsorted(selection, chunkStart):np.searchsorted(selection, chunkStop)]
+                kwargs['rows'] = inChunk - chunkStart
+                chunkStart = chunkStop
+            load(part, chunk, fileName, progress.chunk(chunk.entryStart, eventTree.num_entries), **kwargs)
+            if withOthers:
+                others.append(self._loadOthers(chunk, fileName))
+            if flags is None:
+                flags = {key: value for key, value in vars(part).items() if key.startswith('got')}
+            if stage == 'clusters':
+                chunkRows.append(len(part['eventNumber']) if part.data else 0)
+            buffer.add(part.data)
+
+        part = PXD()
+        part.data = buffer.result()
+        for key, value in (flags or {}).items():
+            setattr(part, key, value)
+        if selection is not None and not perChunk:
+            part.data = {key: value[selection] for key, value in part.data.items()}
+        if stage == 'clusters':
+            part.chunkRows = chunkRows
+        if withOthers:
+            names = [name for name in self.detectors if any(name in chunk for chunk in others)]
+            part.others = {name: {key: np.concatenate([chunk[name][key] for chunk in others if name in chunk])
+                                  for key in next(chunk[name] for chunk in others if name in chunk)} for name in names}
+        return part
+
+    def _otherDetectors(self) -> list:
+        return [(name, detector) for name, detector in self.detectors.items() if detector is not self.pxd]
+
+    def _loadOthers(self, eventTree, fileName: str) -> dict:
+        """
+        the clusters of the other detectors, they come from the same tree (or chunk)
+        as the pxd clusters, so the file is only read once. detectors, whose branches
+        aren't in the file, are left out
+        """
+        others = {}
+        eventKeys = eventTree.keys()
+        for name, detector in self._otherDetectors():
+            if detector.hasClusters(eventKeys):
+                other = detector.emptyCopy()
+                other.getClusters(eventTree, fileName)
+                others[name] = other.data
+        return others
+
+    def _fillOthers(self, others: list) -> None:
+        """
+        merges the clusters of the other detectors of all files, like the pxd ones
+        they get the index of their file and the global event id
+        """
+        for name, detector in self._otherDetectors():
+            parts = [(index, part[name]) for index, part in enumerate(others) if part is not None and name in part]
+            if not parts:
+                continue
+            for index, part in parts:
+                part['fileIndex'] = np.full(len(part['eventNumber']), self.fileIndices[index])
+                part['eventID'] = part['eventNumber'] + self.entryOffsets[index]
+            for key in parts[0][1].keys():
+                detector.set(key, np.concatenate([part[key] for _, part in parts]))
+            detector.length = len(detector['eventNumber'])
+            detector.gotClusters = True
+
+    def _othersStage(self, method: str) -> None:
+        """
+        runs a stage, that only needs the clusters, for the other detectors, that have a geometry
+        """
+        for _, detector in self._otherDetectors():
+            if detector.gotClusters and detector.geometry is not None:
+                getattr(detector, method)()
+
+    def _allocate(self, data: dict, shape: tuple, dtype: np.dtype) -> np.ndarray:
+        """
+        an output column, with a memory limit it goes straight to disk, if it doesn't fit
+        """
+        if self.memoryBudget is None:
+            return np.empty(shape, dtype=dtype)
+        return self.memoryBudget.allocate(data, shape, dtype)
+
+    def _fillColumns(self, stage: str, parts: Iterable[tuple[int, PXD]], rows: list | None = None) -> None:
+        """
+        second pass of the multi-file merge, every output column is allocated once
+        for all files and the part of every file is copied into its own slice.
+        if the number of rows per file isn't known beforehand (clusters reconstructed
+        from digits), all parts are loaded first. the cluster stage adds the global
+        event id and the index of the file
+        """
+        if rows is None:
+            parts = sorted(self._holdParts(parts), key=lambda part: part[0])
+            rows = [len(next(iter(part.values()))) if part.data else 0 for _, part in parts]
+        offsets = np.cumsum([0] + list(rows))
+        single = len(rows) == 1
+
+        columns = {}
+        categoricals = {}
+        columnKeys = None
+        chunkRows = [None] * len(rows)
+        others = [None] * len(rows)
+        for index, part in parts:
+            start, stop = offsets[index], offsets[index + 1]
+            if stage == 'clusters':
+                chunkRows[index] = getattr(part, 'chunkRows', None)
+                others[index] = getattr(part, 'others', None)
+                part.data['fileIndex'] = np.full(len(part['eventNumber']), self.fileIndices[index])
+                part.data['eventID'] = part['eventNumber'] + self.entryOffsets[index]
+            if columnKeys is None:
+                columnKeys = set(part.keys())
+            elif set(part.keys()) != columnKeys:
+                raise ValueError(f"'{self.fileNames[index]}' doesn't provide the same columns as the other files")
+
+            for key, value in part.items():
+                if len(value) != stop - start:
+                    raise ValueError(f"'{self.fileNames[index]}' has {len(value)} rows in '{key}' instead of {stop - start}")
+                if single:
+                    columns[key] = value
+                    continue
+                if isinstance(value, Categorical):
+                    # the vocabularies of the files are merged at the end
+                    categoricals.setdefault(key, [None] * len(rows))[index] = value
+                    continue
+                if key not in columns:
+                    columns[key] = self._allocate({**self.pxd.data, **columns}, (offsets[-1], *value.shape[1:]), value.dtype)
+                elif value.dtype.kind == 'U' and value.dtype.itemsize > columns[key].dtype.itemsize:
+                    columns[key] = columns[key].astype(value.dtype)
+                columns[key][start:stop] = value
+            for key, value in vars(part).items():
+                if key.startswith('got') and value:
+                    setattr(self.pxd, key, True)
+
+        for key, values in categoricals.items():
+            columns[key] = Categorical.concatenate(value for value in values if value is not None)
+        for key, column in columns.items():
+            if key in self.pxd.data:
+                self.pxd.set(key, column)
+            else:
+                self.pxd.data[key] = column
+        if stage == 'clusters':
+            self._fillOthers(others)
+            self.fileRows = list(rows)
+            self.rowSelection = None
+            self.chunkRows = chunkRows
+            self.eventIndex = None
+            self._eventIndex()
+        if 'eventNumber' in self.pxd.data:
+            self.pxd.length = len(self.pxd['eventNumber'])
+
+    def _holdParts(self, parts: Iterable[tuple[int, PXD]]) -> list:
+        """
+        all parts of the files, with a memory limit the columns of the parts, that
+        don't fit next to the loaded columns and the parts before them, go to disk
+        """
+        if self.memoryBudget is None:
+            return list(parts)
+        held = self.memoryBudget.used(self.pxd.data)
+        result = []
+        for index, part in parts:
+            part.data.update(self.memoryBudget.spill(part.data, held))
+            held += self.memoryBudget.used(part.data)
+            result.append((index, part))
+        return result
+
+    def _filterRows(self, mask: np.ndarray) -> None:
+        """
+        keeps only the rows of the mask, the selection of every file is remembered,
+        so that the stages, that are loaded afterwards, only compute these rows
+        """
+        keep = np.nonzero(mask)[0]
+        fileRows = self.fileRows if self.fileRows is not None else [self.numClusters]
+        offsets = np.cumsum([0] + list(fileRows))
+        bounds = np.searchsorted(keep, offsets)
+        selection = self.rowSelection or [np.arange(rows) for rows in fileRows]
+        self.rowSelection = [fileSelection[keep[bounds[i]:bounds[i + 1]] - offsets[i]] for i, fileSelection in enumerate(selection)]
+        self.fileRows = [len(fileSelection) for fileSelection in self.rowSelection]
+        for key, value in self.pxd.items():
+            self.pxd.data[key] = value[keep]
+        self.pxd.length = len(keep)
+        self.eventIndex = None
+
+    def getClusters(self, keys: list | None = None, onProgress: Callable | None = None, cancelToken: CancelToken | None = None) -> None:
+        """
+        keys: list = the cluster parameters to read, defaults to all of them
+        """
         if self.gotClusters:
             warnings.warn('already loaded clusters parameters')
         else:
-            for eventTree, fileName in zip(self.eventTrees, self.fileNames):
-                self.pxd.getClusters(eventTree, fileName, self.includeUnselected)
+            load = lambda pxd, eventTree, fileName, progress: pxd.getClusters(eventTree, fileName, self.includeUnselected, progress=progress, keys=keys, hotPixels=self.hotPixels, etaCorrection=self.etaCorrection)
+            self._runStage('clusters', load, onProgress=onProgress, cancelToken=cancelToken, keys=keys)
             self.gotClusters = True
 
-    def getDigits(self) -> None:
+    def _requireClusters(self, keys: list, onProgress: Callable | None = None, cancelToken: CancelToken | None = None, clusterKeys: list | None = None) -> None:
+        """
+        coordinates, sphericals and layers are calculated from the cluster parameters,
+        loading them first makes sure, that they aren't read a second time (and
+        appended twice) by a later 'getClusters'. the check goes by the columns, not by
+        the import flag, if the clusters are loaded, but some of the parameters in keys
+        aren't there (e.g. 'load' dropped them), only these are read again for the rows,
+        that are loaded
+        keys: list = the cluster parameters, that are needed
+        clusterKeys: list = the parameters to read, if no clusters are loaded yet, defaults to all of them
+        """
+        if not self.gotClusters:
+            self.getClusters(keys=clusterKeys, onProgress=onProgress, cancelToken=cancelToken)
+        missing = [key for key in self.pxd.clusterKeys.keys() if key in keys and key not in self.pxd.data]
+        if not missing:
+            return
+        if len(self.eventTrees) == 0 or any(eventTree is None for eventTree in self.eventTrees):
+            raise ValueError(f'the cluster parameters {missing} are not loaded and there are no open files to read them from')
+
+        def load(pxd: PXD, eventTree, fileName: str, progress: Progress, rows: np.ndarray | None = None) -> None:
+            # the rows of the clusters stage, that are left, in the same order
+            pxd.getClusters(eventTree, fileName, self.includeUnselected, progress=progress, keys=missing, hotPixels=self.hotPixels, etaCorrection=self.etaCorrection)
+            pxd.data = {key: pxd.data[key] if rows is None else pxd.data[key][rows] for key in missing}
+        self._runStage('clusterColumns', load, onProgress=onProgress, cancelToken=cancelToken, keys=missing)
+
+    def getDigits(self, onProgress: Callable | None = None, cancelToken: CancelToken | None = None) -> None:
         if self.gotDigits:
             warnings.warn('already loaded cluster digits')
         else:
-            for eventTree in self.eventTrees:
-                self.pxd.getDigits(eventTree, self.includeUnselected)
+            load = lambda pxd, eventTree, fileName, progress, rows=None: pxd.getDigits(eventTree, self.includeUnselected, progress=progress, hotPixels=self.hotPixels, rows=rows)
+            self._runStage('digits', load, onProgress=onProgress, cancelToken=cancelToken)
             self.gotDigits = True
 
-    def getMatrices(self, matrixSize: tuple = (9, 9)) -> None:
+    def getMatrices(self, matrixSize: tuple = (9, 9), onProgress: Callable | None = None, cancelToken: CancelToken | None = None) -> None:
         if self.gotMatrices:
             warnings.warn('already loaded matrices')
-        if self.gotDigits:
-            self.pxd.getMatrices(eventTree=None, matrixSize=matrixSize, includeUnselected=self.includeUnselected)
-        else:
-            for eventTree in self.eventTrees:
-                self.pxd.getMatrices(eventTree=eventTree, matrixSize=matrixSize, includeUnselected=self.includeUnselected)
+            return
+        load = lambda pxd, eventTree, fileName, progress, rows=None: pxd.getMatrices(eventTree=eventTree, matrixSize=matrixSize, includeUnselected=self.includeUnselected, progress=progress, hotPixels=self.hotPixels, rows=rows)
+        if self.gotDigits and self.memoryBudget is not None and 'matrix' not in self.pxd.data:
+            load = lambda pxd, eventTree, fileName, progress: self._matricesInBlocks(pxd, matrixSize, progress)
+        self._runStage('matrices', load, perFile=not self.gotDigits, onProgress=onProgress, cancelToken=cancelToken)
         self.gotMatrices = True
 
-    def getCoordinates(self) -> None:
+    def _matricesInBlocks(self, pxd: PXD, matrixSize: tuple, progress: Progress) -> None:
+        """
+        the matrices of the loaded digits, with a memory limit they're made for blocks
+        of clusters, that fit into the read share, and written straight into their
+        column, that goes to disk, if it doesn't fit next to the other columns
+        """
+        numClusters = pxd.numClusters
+        matrix = self._allocate(pxd.data, (numClusters, *matrixSize), int)
+        step = self.memoryBudget.stepSize(matrix.itemsize * int(np.prod(matrixSize)) + 3 * self.memoryBudget.arrayOverhead)
+        for start in range(0, numClusters, step):
+            progress.update(start, numClusters)
+            rows = slice(start, start + step)
+            matrix[rows] = pxd.generateMatrices.get(pxd['cellCharges'][rows], pxd['uCellIDs'][rows], pxd['vCellIDs'][rows], matrixSize=matrixSize)['matrix']
+        pxd.data['matrix'] = matrix
+        pxd.gotMatrices = True
+
+    def getShapeFeatures(self, onProgress: Callable | None = None, cancelToken: CancelToken | None = None) -> None:
+        """
+        charge center of gravity, second moments, eta, seed ratio and u/v extent of
+        every cluster, calculated from the digits
+        """
+        if self.gotShapes:
+            warnings.warn('already loaded cluster shapes')
+            return
+        load = lambda pxd, eventTree, fileName, progress, rows=None: pxd.getShapeFeatures(eventTree=eventTree, includeUnselected=self.includeUnselected, progress=progress, hotPixels=self.hotPixels, rows=rows)
+        self._runStage('shapes', load, perFile=not self.gotDigits, onProgress=onProgress, cancelToken=cancelToken)
+        self.gotShapes = True
+
+    def getCoordinates(self, onProgress: Callable | None = None, cancelToken: CancelToken | None = None) -> None:
         if self.gotCoordinates:
             warnings.warn('already loaded clusters coordinates')
-        if self.gotClusters:
-            self.pxd.getCoordinates(None)
-        else:
-            for eventTree in self.eventTrees:
-                self.pxd.getCoordinates(eventTree)
+            return
+        self._requireClusters(self._stageDependencies['coordinates'], onProgress, cancelToken)
+        load = lambda pxd, eventTree, fileName, progress: pxd.getCoordinates(eventTree, progress=progress)
+        self._runStage('coordinates', load, perFile=False, onProgress=onProgress, cancelToken=cancelToken)
+        self._othersStage('getCoordinates')
         self.gotCoordinates = True
 
-    def getSphericals(self) -> None:
+    def getSphericals(self, onProgress: Callable | None = None, cancelToken: CancelToken | None = None) -> None:
         if self.gotSphericals:
             warnings.warn('already loaded spherical coordinates')
-        if self.gotClusters:
-            self.pxd.getSphericals(None)
-        else:
-            for eventTree in self.eventTrees:
-                self.pxd.getSphericals(eventTree)
+            return
+        self._requireClusters(self._stageDependencies['sphericals'], onProgress, cancelToken)
+        load = lambda pxd, eventTree, fileName, progress: pxd.getSphericals(eventTree, progress=progress)
+        self._runStage('sphericals', load, perFile=False, onProgress=onProgress, cancelToken=cancelToken)
+        self._othersStage('getSphericals')
         self.gotSphericals = True
 
-    def getLayers(self) -> None:
+    def getLayers(self, onProgress: Callable | None = None, cancelToken: CancelToken | None = None) -> None:
         if self.gotLayers:
             warnings.warn('already loaded clusters layers/ladders')
-        if self.gotClusters:
-            self.pxd.getLayers(None)
-        else:
-            for eventTree in self.eventTrees:
-                self.pxd.getLayers(eventTree)
+            return
+        self._requireClusters(self._stageDependencies['layers'], onProgress, cancelToken)
+        load = lambda pxd, eventTree, fileName, progress: pxd.getLayers(eventTree, progress=progress)
+        self._runStage('layers', load, perFile=False, onProgress=onProgress, cancelToken=cancelToken)
+        self._othersStage('getLayers')
         self.gotLayers = True
 
-    def getMCData(self) -> None:
+    def getMCData(self, fields: list | None = None, onProgress: Callable | None = None, cancelToken: CancelToken | None = None) -> None:
+        """
+        fields: list = the mc particle parameters to read, e.g. ['pdg', 'energy'],
+                       defaults to pdg and momentum
+        """
         if self.gotMCData:
             warnings.warn('already loaded clusters mc data')
-        for eventTree in self.eventTrees:
-            self.pxd.getMCData(eventTree, self.includeUnselected)
+            return
+        load = lambda pxd, eventTree, fileName, progress, rows=None: pxd.getMCData(eventTree, self.includeUnselected, progress=progress, fields=fields, rows=rows, hotPixels=self.hotPixels)
+        self._runStage('mcData', load, onProgress=onProgress, cancelToken=cancelToken, fields=fields)
         self.gotMCData = True
 
+    def load(self, columns: list, matrixSize: tuple = (9, 9), onProgress: Callable | None = None, cancelToken: CancelToken | None = None,
+             entryStart: int | None = None, entryStop: int | None = None, entries: ArrayLike | None = None, where: str | list | None = None) -> None:
+        """
+        loads exactly the requested columns, the order of the 'get' commands is worked
+        out here. only the cluster branches, that are needed, are read, every stage runs
+        once and intermediates (e.g. digits for matrices) are dropped afterwards,
+        unless they were requested as well. the event number is always kept.
+        columns: list = the keywords listed in the README, e.g. ['xPosition', 'matrix', 'pdg']
+        entryStart/entryStop/entries: only these entries of every file are read, see 'open'
+        where: str or list = conditions like in 'where', e.g. ['clsSize > 1', 'layer == 1'],
+                             every condition is applied as soon as its column is loaded,
+                             the digits, matrices and mc data are only made for the rows left
+        """
+        columns = list(columns)
+        conditions = [] if where is None else [where] if isinstance(where, str) else list(where)
+        self.conditions.extend(conditions)
+        conditionColumns = [FancyDict.parseCondition(condition)[0] for condition in conditions]
+        plan = self._plan(columns + conditionColumns)
+        self._selectEntries(entryStart, entryStop, entries)
+        before = set(self.pxd.keys())
+        kwargs = {'onProgress': onProgress, 'cancelToken': cancelToken}
+
+        def applyConditions() -> None:
+            # the conditions, whose columns exist by now, are applied all at once
+            ready = [condition for condition, column in zip(conditions, conditionColumns) if column in self.pxd.data]
+            if ready and self.numClusters > 0:
+                self._filterRows(self.pxd.mask(*ready))
+            for condition in ready:
+                index = conditions.index(condition)
+                conditions.pop(index)
+                conditionColumns.pop(index)
+
+        # the cluster parameters, that are missing (e.g. dropped by an earlier 'load'), are read as well
+        self._requireClusters(plan['clusters'], clusterKeys=plan['clusters'], **kwargs)
+        applyConditions()
+        stages = ['coordinates', 'sphericals', 'layers', 'digits', 'matrices', 'shapes', 'mcData']
+        if any(column in self.pxd.mcToClusters.mcKeys for column in conditionColumns):
+            # a cut on the mc data is applied before the digits are collected
+            stages = ['coordinates', 'sphericals', 'layers', 'mcData', 'digits', 'matrices', 'shapes']
+        for stage in stages:
+            if stage not in plan or getattr(self, self._stageFlags[stage]):
+                continue
+            if stage == 'matrices':
+                # without loaded digits, the matrices are made file by file and the
+                # digits are thrown away right after
+                self.getMatrices(matrixSize=matrixSize, **kwargs)
+            elif stage == 'mcData':
+                # only the requested mc particle branches are read
+                self.getMCData(fields=list(dict.fromkeys(column for column in columns + conditionColumns if column in self.pxd.mcToClusters.mcKeys)), **kwargs)
+            else:
+                getattr(self, self._stageMethods[stage])(**kwargs)
+            applyConditions()
+
+        # dropping the intermediates
+        for key in set(self.pxd.keys()) - before - set(columns) - {'eventNumber', 'eventID', 'fileIndex'}:
+            self.pxd.pop(key)
+        # the stages, whose columns were all dropped, can be run again later on
+        for stage, stageColumns in self._stageColumns().items():
+            if stage != 'clusters' and not any(column in self.pxd.data for column in stageColumns):
+                setattr(self, self._stageFlags[stage], False)
+                setattr(self.pxd, self._stageFlags[stage], False)
+
+    def _stageColumns(self) -> dict:
+        """
+        the columns every stage makes
+        """
+        return {'clusters': list(self.pxd.clusterKeys.keys()) + ['eventNumber', 'eventID', 'fileIndex', 'roiSelected', 'fileName'],
+                'coordinates': ['xPosition', 'yPosition', 'zPosition'],
+                'sphericals': ['r', 'theta', 'phi'],
+                'layers': ['layer', 'ladder'],
+                'digits': list(self.pxd.digitKeys.keys()),
+                'matrices': ['matrix'],
+                'shapes': ClusterShapes.keys,
+                'mcData': list(self.pxd.mcToClusters.mcKeys.keys()) + ['clsNumber']}
+
+    def _plan(self, columns: list) -> dict:
+        """
+        works out which stages are needed for the columns and which cluster
+        parameters they depend on
+        """
+        clusterKeys = list(self.pxd.clusterKeys.keys())
+        stageColumns = self._stageColumns()
+        known = {column for stageColumn in stageColumns.values() for column in stageColumn}
+        unknown = [column for column in columns if column not in known]
+        if unknown:
+            raise ValueError(f'unknown columns {unknown}')
+
+        # every column needs the clusters, they define the rows
+        plan = {'clusters': [column for column in columns if column in clusterKeys]}
+        for stage, stageColumn in stageColumns.items():
+            if stage != 'clusters' and any(column in stageColumn for column in columns):
+                plan[stage] = stageColumn
+                plan['clusters'].extend(self._stageDependencies.get(stage, []))
+        plan['clusters'] = list(dict.fromkeys(plan['clusters']))
+        return plan
+
+    def _rowsPerFile(self) -> list:
+        """
+        the number of rows of every file, after reopening a store it's counted from
+        the file indices
+        """
+        if self.fileRows is not None:
+            return list(self.fileRows)
+        if len(self.fileNames) <= 1:
+            return [self.numClusters]
+        fileIndex = np.asarray(self.pxd['fileIndex'])
+        return [int(np.count_nonzero(fileIndex == index)) for index in self.fileIndices]
+
+    def append(self, *fileNames: str, store: str | None = None, **kwargs) -> None:
+        """
+        converts only the new files and adds their rows to every column, that is loaded
+        (including the coordinates, matrices, mc data and so on). the new files get the
+        next file indices and event ids, the conditions of 'load' are applied to them too.
+        store: str = a directory written by 'save', the new rows are appended to its files,
+                     so only the new data is written, and the columns are opened from it
+                     again as memory maps. it has to hold the rows, that are loaded, a
+                     store, that doesn't exist yet, gets all rows, the old and the new ones
+        kwargs are handed to 'open' for the new files, by default the settings of the
+        files, that are already open, are used (stepSize, workers, hotPixels ...)
+        """
+        if not self.gotClusters:
+            raise ValueError("nothing has been loaded yet, use 'open' and a 'get' command or 'load' first")
+        columnStore = ColumnStore(store) if store is not None else None
+        if columnStore is not None and columnStore.exists() and columnStore.readMeta()['rows'] != self.numClusters:
+            # an out of date store would get mixed up with the rows in memory
+            raise ValueError(f"the store '{store}' has {columnStore.readMeta()['rows']} rows, but {self.numClusters} are loaded, 'save' them there first")
+        columns = list(self.pxd.keys())
+        matrix = self.pxd.data.get('matrix')
+        matrixSize = tuple(matrix.shape[1:]) if matrix is not None and matrix.ndim == 3 else (9, 9)
+
+        settings = {'includeUnselected': self.includeUnselected, 'onProgress': self.onProgress, 'cancelToken': self.cancelToken,
+                    'stepSize': self.stepSize, 'prefetch': self.prefetch, 'decompressionExecutor': self.decompressionExecutor,
+                    'workers': self.workers, 'hotPixels': self.hotPixels, 'etaCorrection': self.etaCorrection}
+        settings.update(kwargs)
+        part = Rootable(detectors=[detector.emptyCopy() for _, detector in self._otherDetectors()])
+        part.open(*fileNames, **settings)
+        firstEntry = self.entryOffsets[-1] + self.fileEntries[-1] if self.fileEntries else 0
+        firstIndex = max(self.fileIndices) + 1 if len(self.fileIndices) > 0 else 0
+        part.fileIndices = list(range(firstIndex, firstIndex + len(part.fileNames)))
+        part.entryOffsets = (firstEntry + np.cumsum([0] + part.fileEntries[:-1])).tolist()
+
+        # the same columns, the stages are worked out from them
+        try:
+            part.load(columns, matrixSize=matrixSize, where=self.conditions or None)
+        except ValueError as error:
+            raise ValueError(f"the new files can't provide the same columns: {error}") from None
+        for key in set(part.pxd.keys()) - set(columns):
+            part.pxd.pop(key)
+        missing = set(columns) - set(part.pxd.keys())
+        if missing:
+            raise ValueError(f'the new files are missing the columns {sorted(missing)}')
+
+        oldRows = self._rowsPerFile()
+        newRows = part._rowsPerFile()
+        if self.rowSelection is not None or part.rowSelection is not None:
+            self.rowSelection = (self.rowSelection or [np.arange(rows) for rows in oldRows]) + (part.rowSelection or [np.arange(rows) for rows in newRows])
+        self.chunkRows = (self.chunkRows or [None] * len(oldRows)) + (part.chunkRows or [None] * len(newRows))
+        self.fileRows = oldRows + newRows
+        if len(self.eventTrees) != len(self.fileNames):
+            # the columns were opened from a store, there are no trees for the old files
+            self.eventTrees = [None] * len(self.fileNames)
+        self.eventTrees = self.eventTrees + part.eventTrees
+        self.fileNames = self.fileNames + part.fileNames
+        self.fileEntries = self.fileEntries + part.fileEntries
+        self.fileIndices = list(self.fileIndices) + part.fileIndices
+        self.entryOffsets = list(self.entryOffsets) + part.entryOffsets
+        self.multiplyFiles = len(self.fileNames) > 1
+        self.eventIndex = None
+
+        if columnStore is not None:
+            if not columnStore.exists():
+                # a new store gets the rows, that were loaded before, first
+                columnStore.write(self.pxd.data)
+            columnStore.append(part.pxd.data, self._storeAttributes())
+            self.pxd.data = columnStore.read(mmap=True)
+        elif part.numClusters > 0:
+            for key in columns:
+                self.pxd.data[key] = np.concatenate((self.pxd.data[key], part.pxd.data[key]))
+        self.pxd.length = self.numClusters
+        self._spill()
+        for name, detector in self._otherDetectors():
+            other = part.detectors[name]
+            for key in (detector.keys() if detector.data else other.keys()):
+                detector.set(key, other[key])
+            detector.length = len(detector.data.get('eventNumber', []))
+            detector.gotClusters = detector.gotClusters or other.gotClusters
+
+    def iterate(self, *stages: str, **kwargs) -> Iterable[FancyDict]:
+        """
+        loads the opened files one after another and yields the data of every file
+        (or of every chunk, if a step size was set) as its own batch, instead of
+        collecting everything inside this object.
+        stages: str = names of the stages to run, e.g. 'clusters', 'coordinates',
+                      'layers', 'digits', 'matrices', 'shapes', 'mcData', defaults to clusters
+        kwargs are handed to the 'get' commands, that accept them (e.g. matrixSize)
+        """
+        methods = self._stageMethods
+        stages = stages or ('clusters',)
+        for stage in stages:
+            if stage not in methods:
+                raise ValueError(f"unknown stage '{stage}', choose from {list(methods.keys())}")
+
+        for eventTree, fileName, fileIndex, entryOffset in zip(self.eventTrees, self.fileNames, self.fileIndices, self.entryOffsets):
+            # with a step size every chunk is a batch, all branches of all stages
+            # are read at once by the prefetching loader
+            chunks = [eventTree] if self.stepSize is None else self._chunks(eventTree, *stages, keys=kwargs.get('keys'), fields=kwargs.get('fields'))
+            for chunk in chunks:
+                batch = Rootable()
+                batch.eventTrees = [chunk]
+                batch.fileNames = [fileName]
+                batch.fileIndices = [fileIndex]
+                batch.entryOffsets = [entryOffset]
+                batch.includeUnselected = self.includeUnselected
+                batch.hotPixels = self.hotPixels
+                batch.etaCorrection = self.etaCorrection
+                batch.onProgress = self.onProgress
+                batch.cancelToken = self.cancelToken
+                for stage in stages:
+                    method = getattr(batch, methods[stage])
+                    parameters = inspect.signature(method).parameters
+                    method(**{key: value for key, value in kwargs.items() if key in parameters})
+                yield FancyDict(batch.pxd.data)
+
+    def fillHistograms(self, *histograms: Histogram, **kwargs) -> tuple[Histogram, ...]:
+        """
+        fills the histograms batch by batch (file by file, or chunk by chunk with a
+        step size) using 'iterate', so the clusters are never all in memory at once.
+        only the stages the histograms need are run.
+        kwargs are handed to 'iterate', the monte carlo fields the histograms need are
+        read on top of the ones in 'fields'
+        """
+        columns = [column for histogram in histograms for column in histogram.needs]
+        stages = list(self._plan(columns).keys())
+        if 'mcData' in stages:
+            # only the requested mc particle branches are read, like in 'load'
+            fields = list(kwargs.get('fields') or []) + [column for column in columns if column in self.pxd.mcToClusters.mcKeys]
+            kwargs['fields'] = list(dict.fromkeys(fields))
+        for batch in self.iterate(*stages, **kwargs):
+            for histogram in histograms:
+                histogram.fill(batch)
+        return histograms
+
+    def batches(self, batchSize: int = 256, features: list | None = None, labels: str | list | None = 'pdg', **kwargs) -> BatchLoader:
+        """
+        a shuffled, prefetching loader over the loaded columns, that yields
+        (matrices, features, labels) batches, see 'BatchLoader' for the options
+        """
+        return BatchLoader(self, batchSize=batchSize, features=features, labels=labels, **kwargs)
+
+    def fillOccupancy(self, occupancyMap: OccupancyMap | None = None, inOut: str = 'inROI') -> OccupancyMap:
+        """
+        accumulates the per pixel hit and charge maps of all opened files, only the
+        digit branches are read, chunk by chunk
+        inOut: str = 'inROI' for the ROI selected digits, 'outROI' for the unselected ones
+        """
+        occupancyMap = occupancyMap if occupancyMap is not None else OccupancyMap()
+        for eventTree in self.eventTrees:
+            occupancyMap.fillTree(eventTree, inOut=inOut, stepSize=self.stepSize or 10000)
+        return occupancyMap
+
     def asStructuredArray(self) -> np.ndarray:
         """
         this converts the data dict of this class into a structured numpy array
@@ -198,7 +1009,10 @@ class Rootable:
             # Determine the data type of the first value in the list
             sampleValue = value[0]
 
-            if isinstance(sampleValue, np.ndarray):
+            if isinstance(value, Categorical) or value.dtype.kind == 'U':
+                # strings need their width, the vocabulary of a categorical has it
+                fieldDtype = value.dtype
+            elif isinstance(sampleValue, np.ndarray):
                 # If the value is an array, use its shape and dtype
                 shapes = [val.shape for val in value]
                 if not all(shape == shapes[0] for shape in shapes):
@@ -221,5 +1035,50 @@ class Rootable:
 
         return structuredArray
 
+    def asDataFrame(self, popMatrices: bool | str = True):
+        """
+        the columns as a pandas dataframe, numeric columns aren't copied
+        popMatrices: bool or str = True/'drop' leaves out the matrices, 'explode' gives a
+                                   column per pixel (matrix_i_j), False/'ragged' keeps them
+                                   as one column with a 2d array per row
+        """
+        return toDataFrame(self.pxd.data, popMatrices=popMatrices)
+
     def asDict(self) -> dict:
-        return {'pxd': self.pxd.data}
+        return self.data
+
+    def save(self, path: str) -> None:
+        """
+        writes all loaded columns into a directory, one binary file per column,
+        they can be opened again as memory maps with 'openStore'
+        """
+        ColumnStore(path).write(self.pxd.data, self._storeAttributes())
+
+    def _storeAttributes(self) -> dict:
+        return {'fileNames': self.fileNames, 'fileIndices': [int(index) for index in self.fileIndices],
+                'entryOffsets': [int(offset) for offset in self.entryOffsets],
+                'fileEntries': [int(entries) for entries in self.fileEntries],
+                'includeUnselected': self.includeUnselected, 'conditions': self.conditions,
+                'flags': {key: value for key, value in vars(self.pxd).items() if key.startswith('got')}}
+
+    def openStore(self, path: str, mmap: bool = True) -> None:
+        """
+        opens columns written by 'save', with mmap the data stays on disk and only
+        the parts, that are accessed, get read
+        """
+        store = ColumnStore(path)
+        meta = store.readMeta()
+        attributes = meta['attributes']
+        self.pxd.data = store.read(mmap=mmap)
+        self.pxd.length = meta['rows']
+        self.fileNames = attributes.get('fileNames', [])
+        self.fileIndices = attributes.get('fileIndices', [])
+        self.entryOffsets = attributes.get('entryOffsets', [])
+        self.fileEntries = attributes.get('fileEntries', [])
+        self.includeUnselected = attributes.get('includeUnselected', False)
+        self.conditions = attributes.get('conditions', [])
+        self.fileRows = None
+        for key, value in attributes.get('flags', {}).items():
+            setattr(self.pxd, key, value)
+            setattr(self, key, value)
+        self.eventIndex = None
@@ -20,7 +20,9 @@ setuptools.setup(
         "uproot>=4.0.11"
     ],
     extras_require={
-        'pandas': ['pandas>=1.0.0']
+        'pandas': ['pandas>=1.0.0'],
+        'arrow': ['pandas>=1.0.0', 'pyarrow'],
+        'numba': ['numba>=0.57']
     },
     keywords=['python', 'pxd', 'root'],
     classifiers= [
@@ -0,0 +1,134 @@
+import numpy as np
+import pytest
+
+
+# the branch names of the pxd clusters, digits and the mc particles in the root files
+clusterBranch = 'PXDClusters/PXDClusters.m_'
+digitBranch = 'PXDDigits/PXDDigits.m_'
+digitOutBranch = 'PXDDigitsOUT/PXDDigitsOUT.m_'
+mcBranch = 'MCParticles/MCParticles.m_'
+panelIDs = np.array([ 8480,  8512,  8736,  8768,  8992,  9024,  9248,  9280,  9504,  9536,  9760,  9792, 10016, 10048, 10272, 10304,
+                     16672, 16704, 16928, 16960, 17184, 17216, 17440, 17472, 17696, 17728, 17952, 17984, 18208, 18240, 18464, 18496,
+                     18720, 18752, 18976, 19008, 19232, 19264, 19488, 19520])
+mcKeys = ['pdg', 'mass', 'energy', 'momentum_x', 'momentum_y', 'momentum_z', 'validVertex', 'productionTime',
+          'productionVertex_x', 'productionVertex_y', 'productionVertex_z', 'decayTime', 'decayVertex_x', 'decayVertex_y', 'decayVertex_z']
+clusterKeys = ['clsCharge', 'seedCharge', 'clsSize', 'uSize', 'vSize', 'uStart', 'vStart', 'uPosition', 'vPosition', 'sensorID']
+
+
+def objectArray(parts: list) -> np.ndarray:
+    column = np.empty(len(parts), dtype=object)
+    for i, part in enumerate(parts):
+        column[i] = part
+    return column
+
+
+class FakeBranch:
+    def __init__(self, uncompressedBytes: int) -> None:
+        self.uncompressed_bytes = uncompressedBytes
+
+
+class FakeTree:
+    """
+    a small random event tree with the pxd branches, it has the part of the uproot
+    TTree interface, that rootable uses (keys, arrays, num_entries and the branches)
+    numEvents: int = the number of events
+    seed: int = seed of the random numbers
+    clusters: bool = with the cluster branches, otherwise they're reconstructed from digits
+    out: bool = with the roi unselected digits
+    singlePixels: bool = every cluster is a single pixel
+    """
+    def __init__(self, numEvents: int = 20, seed: int = 0, clusters: bool = True, out: bool = False, singlePixels: bool = False) -> None:
+        rng = np.random.default_rng(seed)
+        columns = {key: [] for key in clusterKeys}
+        digits = {key: [] for key in ['uCellID', 'vCellID', 'charge', 'sensorID']}
+        relation, mcFrom, mcTo, digitMCFrom, digitMCTo = [], [], [], [], []
+        mc = {key: [] for key in mcKeys}
+        for _ in range(numEvents):
+            event = {key: [] for key in clusterKeys}
+            uCells, vCells, charges, sensors, indices = [], [], [], [], []
+            used = set()
+            for _ in range(rng.integers(0, 5)):
+                sensor = rng.choice(panelIDs)
+                # the clusters of an event are far enough apart, that they don't touch
+                while True:
+                    u, v = rng.integers(5, 240), rng.integers(5, 760)
+                    if (sensor, u // 20, v // 20) not in used:
+                        used.add((sensor, u // 20, v // 20))
+                        break
+                pixels = [(u, v)]
+                while len(pixels) < (1 if singlePixels else rng.integers(1, 5)):
+                    step = [(1, 0), (0, 1)][rng.integers(0, 2)]
+                    pixels.append((pixels[-1][0] + step[0], pixels[-1][1] + step[1]))
+                charge = rng.integers(5, 60, size=len(pixels))
+                indices.append(np.arange(len(uCells), len(uCells) + len(pixels)))
+                uCells += [pixel[0] for pixel in pixels]
+                vCells += [pixel[1] for pixel in pixels]
+                charges += list(charge)
+                sensors += [sensor] * len(pixels)
+                event['clsCharge'].append(charge.sum())
+                event['seedCharge'].append(charge.max())
+                event['clsSize'].append(len(pixels))
+                event['uSize'].append(len({pixel[0] for pixel in pixels}))
+                event['vSize'].append(len({pixel[1] for pixel in pixels}))
+                event['uStart'].append(min(pixel[0] for pixel in pixels))
+                event['vStart'].append(min(pixel[1] for pixel in pixels))
+                event['uPosition'].append(u * 0.005 - 0.62)
+                event['vPosition'].append(v * 0.0058 - 2.2)
+                event['sensorID'].append(sensor)
+            for key in clusterKeys:
+                columns[key].append(np.array(event[key], dtype=float if 'Position' in key else np.int32))
+            for key, values in zip(digits, (uCells, vCells, charges, sensors)):
+                digits[key].append(np.array(values, dtype=np.int32))
+            relation.append(objectArray(indices))
+
+            numParticles = rng.integers(1, 6)
+            for key in mcKeys:
+                mc[key].append(rng.integers(-300, 300, numParticles).astype(np.int32) if key == 'pdg' else rng.normal(size=numParticles))
+            matched = [i for i in range(len(indices)) if rng.random() < 0.7]
+            mcFrom.append(np.array(matched, dtype=np.int32))
+            mcTo.append(objectArray([np.array([rng.integers(0, numParticles)], dtype=np.int32) for _ in matched]))
+            matched = [i for i in range(len(uCells)) if rng.random() < 0.7]
+            digitMCFrom.append(np.array(matched, dtype=np.int32))
+            digitMCTo.append(objectArray([np.array([rng.integers(0, numParticles)], dtype=np.int32) for _ in matched]))
+
+        branches = {}
+        if clusters:
+            for key in clusterKeys:
+                branches[clusterBranch + key] = objectArray(columns[key])
+            branches['PXDClustersToPXDDigits/m_elements/m_elements.m_to'] = objectArray(relation)
+            branches['PXDClustersToMCParticles/m_elements/m_elements.m_from'] = objectArray(mcFrom)
+            branches['PXDClustersToMCParticles/m_elements/m_elements.m_to'] = objectArray(mcTo)
+        for key, values in digits.items():
+            branches[digitBranch + key] = objectArray(values)
+        branches['PXDDigitsToMCParticles/m_elements/m_elements.m_from'] = objectArray(digitMCFrom)
+        branches['PXDDigitsToMCParticles/m_elements/m_elements.m_to'] = objectArray(digitMCTo)
+        if out:
+            for key, values in digits.items():
+                branches[digitOutBranch + key] = objectArray(values)
+            branches['PXDDigitsOUTToMCParticles/m_elements/m_elements.m_from'] = objectArray(digitMCFrom)
+            branches['PXDDigitsOUTToMCParticles/m_elements/m_elements.m_to'] = objectArray(digitMCTo)
+        for key in mcKeys:
+            branches[mcBranch + key] = objectArray(mc[key])
+        self.branches = branches
+        self.num_entries = numEvents
+
+    def keys(self) -> list:
+        return list(self.branches.keys())
+
+    def __getitem__(self, key: str) -> FakeBranch:
+        return FakeBranch(sum(part.nbytes for part in self.branches[key]))
+
+    def arrays(self, expressions, library: str = 'np', entry_start: int | None = None, entry_stop: int | None = None, **kwargs) -> dict:
+        expressions = [expressions] if isinstance(expressions, str) else list(expressions)
+        return {key: self.branches[key][entry_start:entry_stop] for key in expressions}
+
+
+@pytest.fixture
+def trees(monkeypatch) -> dict:
+    """
+    the fake trees by file name, 'uproot.open' returns them instead of reading a file
+    """
+    import uproot
+    trees = {}
+    monkeypatch.setattr(uproot, 'open', lambda path, *args, **kwargs: trees[path.partition(':')[0]])
+    return trees
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from conftest import FakeTree
+from rootable import Rootable
+
+
+@pytest.fixture
+def files(trees) -> dict:
+    trees['a.root'] = FakeTree(12, seed=5)
+    trees['b.root'] = FakeTree(10, seed=6)
+    return trees
+
+
+def loaded() -> Rootable:
+    loader = Rootable()
+    loader.open('a.root')
+    loader.load(['clsCharge', 'xPosition', 'matrix'])
+    return loader
+
+
+def expected() -> Rootable:
+    loader = Rootable()
+    loader.open('a.root', 'b.root')
+    loader.load(['clsCharge', 'xPosition', 'matrix'])
+    return loader
+
+
+def assertSame(loader: Rootable, reference: Rootable) -> None:
+    assert loader.numClusters == reference.numClusters
+    for key in ['clsCharge', 'xPosition', 'matrix', 'eventID', 'fileIndex']:
+        np.testing.assert_array_equal(loader[key], reference[key])
+
+
+def test_append(files):
+    loader = loaded()
+    loader.append('b.root')
+    assertSame(loader, expected())
+
+
+def test_appendToANewStore(files, tmp_path):
+    loader = loaded()
+    loader.append('b.root', store=str(tmp_path / 'store'))
+    assertSame(loader, expected())
+
+    reopened = Rootable()
+    reopened.openStore(str(tmp_path / 'store'))
+    assertSame(reopened, expected())
+
+
+def test_appendToAStore(files, tmp_path):
+    loaded().save(str(tmp_path / 'store'))
+    loader = Rootable()
+    loader.openStore(str(tmp_path / 'store'))
+    loader.append('b.root', store=str(tmp_path / 'store'))
+    assertSame(loader, expected())
+
+
+def test_appendRejectsAnOutdatedStore(files, tmp_path):
+    trees = files
+    trees['c.root'] = FakeTree(8, seed=7)
+    loader = loaded()
+    loader.save(str(tmp_path / 'store'))
+    loader.append('c.root')
+    rows = loader.numClusters
+    with pytest.raises(ValueError, match='rows'):
+        loader.append('b.root', store=str(tmp_path / 'store'))
+    assert loader.numClusters == rows
+    assert len(loader.fileNames) == 2
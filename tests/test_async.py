@@ -0,0 +1,79 @@
+import asyncio
+import numpy as np
+from conftest import FakeTree
+from rootable import Rootable, AsyncRootable
+from rootable.common import Histogram, CancelToken
+
+
+columns = ['clsCharge', 'xPosition', 'matrix', 'layer']
+
+
+def synchronous(*files: str, **kwargs) -> Rootable:
+    loader = Rootable()
+    loader.open(*files, **kwargs)
+    loader.load(columns)
+    return loader
+
+
+def assertSame(first, second, keys: list = columns) -> None:
+    assert len(first['clsCharge']) == len(second['clsCharge'])
+    for key in keys:
+        np.testing.assert_array_equal(first[key], second[key])
+
+
+def test_openAndLoad(trees):
+    trees['a.root'] = FakeTree(25, seed=0)
+    events = []
+
+    async def main() -> AsyncRootable:
+        async with AsyncRootable(maxWorkers=2) as loader:
+            await loader.open('a.root', stepSize=4, entryStart=3, entryStop=20, cancelToken=CancelToken(), onProgress=lambda *args: events.append(args))
+            await loader.load(columns)
+            return loader
+
+    loader = asyncio.run(main())
+    assert loader.rootable.stepSize == 4 and events
+    assertSame(loader, synchronous('a.root', entryStart=3, entryStop=20))
+
+
+def test_whereAppendAndHistograms(trees, tmp_path):
+    trees['a.root'] = FakeTree(20, seed=1)
+    trees['b.root'] = FakeTree(15, seed=2)
+    histogram = Histogram('clsCharge', bins=20, ranges=(0, 250), by='layer')
+
+    async def main() -> tuple:
+        loader = AsyncRootable()
+        await loader.open('a.root')
+        await loader.load(columns)
+        await loader.append('b.root')
+        view = await loader.where('clsCharge > 60', lazy=True)
+        filled, = await loader.fillHistograms(Histogram('clsCharge', bins=20, ranges=(0, 250), by='layer'))
+        await loader.save(str(tmp_path / 'store'))
+        stored = AsyncRootable()
+        await stored.openStore(str(tmp_path / 'store'))
+        return loader, view, filled, stored
+
+    loader, view, filled, stored = asyncio.run(main())
+    reference = synchronous('a.root', 'b.root')
+    assertSame(loader, reference, columns + ['eventID', 'fileIndex'])
+    assertSame(stored, reference)
+    assertSame(view, reference.where('clsCharge > 60'), ['clsCharge', 'xPosition'])
+    expected, = reference.fillHistograms(histogram)
+    for layer, counts in expected.counts.items():
+        np.testing.assert_array_equal(filled.counts[layer], counts)
+
+
+def test_aiterate(trees):
+    trees['a.root'] = FakeTree(20, seed=3)
+
+    async def main() -> list:
+        loader = AsyncRootable()
+        await loader.open('a.root', stepSize=6)
+        return [batch async for batch in loader.aiterate('clusters', 'coordinates')]
+
+    batches = asyncio.run(main())
+    loader = Rootable()
+    loader.open('a.root')
+    loader.getClusters()
+    loader.getCoordinates()
+    np.testing.assert_array_equal(np.concatenate([batch['xPosition'] for batch in batches]), loader['xPosition'])
@@ -0,0 +1,119 @@
+import threading
+import numpy as np
+import pytest
+from conftest import FakeTree
+from rootable import Rootable
+from rootable.common import BatchLoader
+
+
+def columns(numRows: int, offset: int = 0, numFiles: int = 1) -> dict:
+    rows = np.arange(offset, offset + numRows)
+    return {
+        'matrix': np.repeat(rows, 4).reshape(numRows, 2, 2),
+        'a': rows * 1.0,
+        'b': rows * 2.0,
+        'pdg': rows,
+        'fileIndex': np.arange(numRows) % numFiles,
+    }
+
+
+def rowsOf(loader: BatchLoader) -> np.ndarray:
+    return np.concatenate([labels for _, _, labels in loader])
+
+
+def test_batchesAreTheColumns():
+    loader = BatchLoader(columns(10), batchSize=4, features=['a', 'b'], shuffle=False)
+    batches = list(loader)
+    assert len(batches) == len(loader) == 3
+    assert [len(labels) for _, _, labels in batches] == [4, 4, 2]
+    matrices, features, labels = batches[0]
+    assert matrices.shape == (4, 2, 2) and matrices.dtype == np.float32
+    assert features.shape == (4, 2) and features.dtype == np.float32
+    np.testing.assert_array_equal(labels, [0, 1, 2, 3])
+    np.testing.assert_array_equal(features, np.column_stack([labels, 2 * labels]))
+    np.testing.assert_array_equal(matrices[:, 0, 0], labels)
+
+
+def test_labelsAndMatricesAreOptional():
+    matrices, features, labels = next(iter(BatchLoader(columns(5), batchSize=5, labels=['a', 'b'], matrix=None)))
+    assert matrices is None and features.shape == (5, 0)
+    np.testing.assert_array_equal(labels[:, 1], 2 * labels[:, 0])
+    with pytest.raises(KeyError):
+        BatchLoader(columns(5), labels='momentumX')
+
+
+def test_shuffleIsReproducible():
+    first = BatchLoader(columns(50), batchSize=8, seed=3)
+    second = BatchLoader(columns(50), batchSize=8, seed=3)
+    epochZero = rowsOf(first)
+    assert sorted(epochZero) == list(range(50)) and list(epochZero) != list(range(50))
+    np.testing.assert_array_equal(epochZero, rowsOf(second))
+    # every pass is the next epoch, with its own permutation
+    assert first.epoch == 1
+    epochOne = rowsOf(first)
+    assert sorted(epochOne) == list(range(50)) and list(epochOne) != list(epochZero)
+    second.setEpoch(0)
+    np.testing.assert_array_equal(rowsOf(second), epochZero)
+
+
+def test_dropLast():
+    loader = BatchLoader(columns(10), batchSize=4, dropLast=True, seed=0)
+    assert len(loader) == 2
+    assert [len(labels) for _, _, labels in loader] == [4, 4]
+
+
+def test_shards():
+    # one source is split by the files, several sources among the workers
+    shards = [rowsOf(BatchLoader(columns(12, numFiles=3), shard=(worker, 2), shuffle=False)) for worker in range(2)]
+    np.testing.assert_array_equal(shards[0], [0, 2, 3, 5, 6, 8, 9, 11])
+    np.testing.assert_array_equal(shards[1], [1, 4, 7, 10])
+    sources = [columns(3, offset) for offset in (0, 10, 20)]
+    shards = [rowsOf(BatchLoader(sources, batchSize=2, shard=(worker, 2), shuffle=False)) for worker in range(2)]
+    np.testing.assert_array_equal(shards[0], [0, 1, 2, 20, 21, 22])
+    np.testing.assert_array_equal(shards[1], [10, 11, 12])
+    with pytest.raises(AssertionError):
+        BatchLoader(sources, shard=(2, 2))
+
+
+def test_batchesAcrossSources():
+    loader = BatchLoader([columns(3), columns(4, 100)], batchSize=5, shuffle=False)
+    np.testing.assert_array_equal([len(labels) for _, _, labels in loader], [5, 2])
+    np.testing.assert_array_equal(rowsOf(loader), [0, 1, 2, 100, 101, 102, 103])
+
+
+def test_fromAStore(trees, tmp_path):
+    trees['a.root'] = FakeTree(20, seed=0)
+    loader = Rootable()
+    loader.open('a.root')
+    loader.load(['clsCharge', 'clsSize', 'matrix'])
+    loader.save(str(tmp_path / 'store'))
+    fromMemory = list(loader.batches(7, features=['clsCharge'], labels='clsSize', shuffle=False))
+    fromStore = list(BatchLoader(str(tmp_path / 'store'), 7, features=['clsCharge'], labels='clsSize', shuffle=False))
+    assert len(fromMemory) == len(fromStore) == -(-loader.numClusters // 7)
+    for memory, store in zip(fromMemory, fromStore):
+        for a, b in zip(memory, store):
+            np.testing.assert_array_equal(a, b)
+
+
+def test_stoppingEarlyEndsTheWorker():
+    loader = BatchLoader(columns(1000), batchSize=2, prefetch=1)
+    before = threading.active_count()
+    for number, batch in enumerate(loader):
+        if number == 1:
+            break
+    assert threading.active_count() == before
+    # an unfinished pass isn't an epoch
+    assert loader.epoch == 0
+
+
+def test_errorsAreRaised():
+    class BrokenColumn:
+        def __len__(self) -> int:
+            return 10
+
+        def __getitem__(self, rows):
+            raise OSError('broken store')
+    source = columns(10)
+    source['b'] = BrokenColumn()
+    with pytest.raises(OSError):
+        list(BatchLoader(source, features=['b']))
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from conftest import FakeTree
+from rootable import Rootable
+from rootable.common import Categorical
+
+
+def test_behavesLikeAColumn():
+    values = np.array(['b', 'a', 'c', 'a', 'b'])
+    column = Categorical.fromValues(values)
+    assert list(column.categories) == ['a', 'b', 'c'] and column.codes.dtype == np.int32
+    assert len(column) == 5 and column[1] == 'a'
+    np.testing.assert_array_equal(np.asarray(column[[0, 2]]), values[[0, 2]])
+    np.testing.assert_array_equal(np.asarray(column[values != 'a']), ['b', 'c', 'b'])
+    np.testing.assert_array_equal(column == 'a', values == 'a')
+    np.testing.assert_array_equal(column != 'z', np.ones(5, dtype=bool))
+    np.testing.assert_array_equal(np.isin(column, ['a', 'c']), np.isin(values, ['a', 'c']))
+    assert list(column) == list(values)
+    column[0] = 'd'
+    assert list(column) == ['d', 'a', 'c', 'a', 'b']
+
+
+def test_concatenateMergesTheVocabularies():
+    first = Categorical.fromValues(np.array(['x', 'y', 'x']))
+    second = Categorical.fromValues(np.array(['z', 'x']))
+    joined = np.concatenate([first, second])
+    assert isinstance(joined, Categorical) and list(joined.categories) == ['x', 'y', 'z']
+    assert list(joined) == ['x', 'y', 'x', 'z', 'x']
+    # plain strings, that are joined with a categorical, are encoded too
+    joined = np.concatenate([first, np.array(['w'])])
+    assert isinstance(joined, Categorical) and list(joined) == ['x', 'y', 'x', 'w']
+    empty = Categorical.fromValues(np.array([], dtype=str))
+    assert list(Categorical.concatenate([empty, second])) == ['z', 'x']
+
+
+@pytest.fixture
+def files(trees) -> dict:
+    trees['first.root'] = FakeTree(12, seed=0)
+    trees['second.root'] = FakeTree(12, seed=1)
+    return trees
+
+
+def fileNames(loader: Rootable) -> np.ndarray:
+    return np.array(['first', 'second'])[loader['fileIndex']]
+
+
+def test_fileNamesOfMergedFiles(files):
+    loader = Rootable()
+    loader.open('first.root', 'second.root')
+    loader.load(['clsCharge', 'fileName', 'fileIndex'])
+    column = loader.pxd.data['fileName']
+    assert isinstance(column, Categorical) and list(column.categories) == ['first', 'second']
+    np.testing.assert_array_equal(np.asarray(column), fileNames(loader))
+    second = loader.where('fileName == second')
+    assert second.numClusters == np.sum(loader['fileIndex'] == 1)
+
+
+def test_appendAndStores(files, tmp_path):
+    loader = Rootable()
+    loader.open('first.root')
+    loader.load(['clsCharge', 'fileName', 'fileIndex'])
+    loader.append('second.root')
+    column = loader.pxd.data['fileName']
+    assert isinstance(column, Categorical) and list(column.categories) == ['first', 'second']
+    np.testing.assert_array_equal(np.asarray(column), fileNames(loader))
+
+    loader.save(str(tmp_path / 'store'))
+    reopened = Rootable()
+    reopened.openStore(str(tmp_path / 'store'))
+    column = reopened.pxd.data['fileName']
+    assert isinstance(column, Categorical)
+    np.testing.assert_array_equal(column.codes, loader.pxd.data['fileName'].codes)
+    np.testing.assert_array_equal(np.asarray(column), fileNames(loader))
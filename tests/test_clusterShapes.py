@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from conftest import FakeTree, objectArray
+from rootable import Rootable
+from rootable.detectors import ClusterShapes
+
+
+def reference(charges: np.ndarray, uCells: np.ndarray, vCells: np.ndarray) -> dict:
+    """
+    the features of one cluster, one digit at a time
+    """
+    if len(charges) == 0:
+        return {key: 0 if key.endswith('Extent') else np.nan for key in ClusterShapes.keys}
+    charges, uCells, vCells = (np.asarray(column, dtype=float) for column in (charges, uCells, vCells))
+    total = charges.sum()
+    uCoG, vCoG = (charges * uCells).sum() / total, (charges * vCells).sum() / total
+    seed = int(np.argmax(charges))
+
+    def eta(cells: np.ndarray) -> float:
+        left, center, right = (charges[cells == cells[seed] + offset].sum() for offset in (-1, 0, 1))
+        return right / (center + right) if right >= left else center / (left + center)
+
+    return {'uCoG': uCoG,
+            'vCoG': vCoG,
+            'uVariance': (charges * (uCells - uCoG)**2).sum() / total,
+            'vVariance': (charges * (vCells - vCoG)**2).sum() / total,
+            'uvCovariance': (charges * (uCells - uCoG) * (vCells - vCoG)).sum() / total,
+            'uEta': eta(uCells),
+            'vEta': eta(vCells),
+            'seedRatio': charges[seed] / total,
+            'uExtent': int(uCells.max() - uCells.min() + 1),
+            'vExtent': int(vCells.max() - vCells.min() + 1)}
+
+
+def assertSameFeatures(features: dict, charges, uCells, vCells) -> None:
+    expected = [reference(*digits) for digits in zip(charges, uCells, vCells)]
+    for key in ClusterShapes.keys:
+        np.testing.assert_allclose(features[key], [cluster[key] for cluster in expected], atol=1e-12, err_msg=key)
+
+
+def randomClusters(seed: int, numClusters: int = 200) -> tuple:
+    rng = np.random.default_rng(seed)
+    charges, uCells, vCells = [], [], []
+    for _ in range(numClusters):
+        # the same cell can show up twice, and few charges give ties for the seed
+        size = rng.integers(0, 8)
+        start = rng.integers(0, 200, 2)
+        charges.append(rng.integers(1, 5, size).astype(np.int32))
+        uCells.append((start[0] + rng.integers(0, 4, size)).astype(np.uint16))
+        vCells.append((start[1] + rng.integers(0, 4, size)).astype(np.uint16))
+    return objectArray(charges), objectArray(uCells), objectArray(vCells)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_sameAsTheReference(seed):
+    digits = randomClusters(seed)
+    assertSameFeatures(ClusterShapes().get(*digits), *digits)
+
+
+def test_simpleClusters():
+    # one cell, two cells in u sharing 1:3 and a cross with the seed in the middle
+    charges = objectArray([np.array([7]), np.array([1, 3]), np.array([1, 2, 6, 2, 1])])
+    uCells = objectArray([np.array([5]), np.array([10, 11]), np.array([20, 21, 21, 21, 22])])
+    vCells = objectArray([np.array([5]), np.array([10, 10]), np.array([30, 29, 30, 31, 30])])
+    features = ClusterShapes().get(charges, uCells, vCells)
+    np.testing.assert_allclose(features['uEta'], [0, 0.75, 1 / 11])
+    np.testing.assert_allclose(features['vEta'], [0, 0, 0.2])
+    np.testing.assert_allclose(features['uCoG'], [5, 10.75, 21])
+    np.testing.assert_allclose(features['uVariance'], [0, 0.1875, 2 / 12])
+    np.testing.assert_allclose(features['uvCovariance'], [0, 0, 0])
+    np.testing.assert_array_equal(features['uExtent'], [1, 2, 3])
+    np.testing.assert_array_equal(features['vExtent'], [1, 1, 3])
+
+
+def test_loadedFeatures(trees):
+    trees['a.root'] = FakeTree(30, seed=2)
+    trees['b.root'] = FakeTree(30, seed=3, clusters=False)
+    loader = Rootable()
+    with pytest.warns(UserWarning):
+        loader.open('a.root', 'b.root')
+    loader.getDigits()
+    loader.getShapeFeatures()
+    assertSameFeatures(loader.pxd.data, loader['cellCharges'], loader['uCellIDs'], loader['vCellIDs'])
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from conftest import FakeTree
+from rootable import Rootable
+from rootable.common import FancyDict
+
+
+data = FancyDict({'layer': np.array([1, 2, 1, 2, 2]), 'clsCharge': np.array([10., 50., 30., 20., 70.]),
+                  'name': np.array(['a', 'b', 'c', 'a', 'b'])})
+
+
+@pytest.mark.parametrize('condition, expected', [('layer in [1]', [1, 0, 1, 0, 0]), ('layer in (1, 2)', [1, 1, 1, 1, 1]),
+                                                 ("name in {'a', 'c'}", [1, 0, 1, 1, 0]), ('clsCharge > 25', [0, 1, 1, 0, 1]),
+                                                 ('clsCharge <= 20', [1, 0, 0, 1, 0])])
+def test_mask(condition, expected):
+    np.testing.assert_array_equal(data.mask(condition), np.array(expected, dtype=bool))
+
+
+@pytest.mark.parametrize('condition', ["layer in __import__('os').getcwd()", 'layer in [1, x]', 'layer in (lambda: [1])()'])
+def test_conditionsAreNotExecuted(condition):
+    with pytest.raises(ValueError):
+        data.mask(condition)
+
+
+def test_loadWithAnInCondition(trees):
+    trees['a.root'] = FakeTree(30, seed=0)
+    loader = Rootable()
+    loader.open('a.root')
+    loader.load(['clsCharge'], where='layer in [1]')
+    expected = Rootable()
+    expected.open('a.root')
+    expected.load(['clsCharge', 'layer'])
+    np.testing.assert_array_equal(loader['clsCharge'], expected['clsCharge'][expected['layer'] == 1])
+    with pytest.raises(ValueError):
+        loader.load(['clsCharge'], where="clsSize in open('secrets').read()")
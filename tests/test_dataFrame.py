@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from conftest import FakeTree
+from rootable import Rootable
+from rootable.common import Categorical, toDataFrame
+
+pd = pytest.importorskip('pandas')
+
+
+@pytest.fixture
+def loader(trees) -> Rootable:
+    trees['a.root'] = FakeTree(15, seed=0)
+    trees['b.root'] = FakeTree(15, seed=1)
+    loader = Rootable()
+    loader.open('a.root', 'b.root')
+    loader.getClusters()
+    loader.getDigits()
+    loader.getMatrices()
+    return loader
+
+
+def test_numericColumnsAreShared(loader):
+    frame = loader.asDataFrame()
+    assert len(frame) == loader.numClusters and 'matrix' not in frame
+    for key in ('clsCharge', 'uPosition', 'eventNumber', 'roiSelected'):
+        np.testing.assert_array_equal(frame[key].to_numpy(), loader[key])
+        assert frame[key].dtype == loader[key].dtype
+    assert np.shares_memory(frame['clsCharge'].to_numpy(), loader['clsCharge'])
+
+
+def test_fileNamesAreCategoricals(loader):
+    frame = loader.asDataFrame()
+    assert isinstance(frame['fileName'].dtype, pd.CategoricalDtype)
+    assert list(frame['fileName'].cat.categories) == ['a', 'b']
+    np.testing.assert_array_equal(frame['fileName'].cat.codes.to_numpy(), loader.pxd.data['fileName'].codes)
+    # plain string columns with few values are turned into categoricals as well
+    frame = toDataFrame({'detector': np.array(['pxd', 'svd', 'pxd'])})
+    assert list(frame['detector'].cat.categories) == ['pxd', 'svd']
+
+
+def test_matrices(loader):
+    matrices = loader['matrix']
+    exploded = loader.asDataFrame(popMatrices='explode')
+    assert 'matrix' not in exploded and 'matrix_0_0' in exploded and 'matrix_8_8' in exploded
+    np.testing.assert_array_equal(exploded['matrix_4_3'].to_numpy(), matrices[:, 4, 3])
+    ragged = loader.asDataFrame(popMatrices=False)
+    assert all(np.array_equal(row, matrix) for row, matrix in zip(ragged['matrix'], matrices))
+    with pytest.raises(ValueError):
+        loader.asDataFrame(popMatrices='flatten')
+
+
+def test_digitsAreLists(loader):
+    frame = loader.asDataFrame()
+    for row, digits in zip(frame['cellCharges'], loader['cellCharges']):
+        np.testing.assert_array_equal(np.asarray(row), digits)
+
+
+def test_otherColumns():
+    frame = toDataFrame({'momentum': np.arange(6.).reshape(3, 2), 'kind': Categorical.fromValues(np.array(['x', 'y', 'x']))})
+    np.testing.assert_array_equal(frame['momentum_1'].to_numpy(), [1, 3, 5])
+    assert list(frame['kind']) == ['x', 'y', 'x']
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from conftest import FakeTree, clusterBranch
+from rootable import Rootable
+from rootable.detectors import Detector
+
+
+class Mine(Detector):
+    name = 'mine'
+    clusterKeys = {'clsCharge': clusterBranch + 'clsCharge'}
+
+
+@pytest.mark.parametrize('stepSize', [None, 5])
+def test_configuredInstanceKeepsItsKeys(trees, stepSize):
+    trees['a.root'] = FakeTree(20, seed=8)
+    trees['b.root'] = FakeTree(10, seed=9)
+    mine = Mine()
+    mine.clusterKeys['size'] = clusterBranch + 'clsSize'
+    loader = Rootable(detectors=[mine])
+    loader.open('a.root', stepSize=stepSize)
+    loader.getClusters()
+    loader.append('b.root')
+
+    reference = Rootable()
+    reference.open('a.root', 'b.root')
+    reference.getClusters()
+    assert set(loader['mine'].keys()) >= {'clsCharge', 'size', 'eventNumber', 'eventID', 'fileIndex'}
+    np.testing.assert_array_equal(loader['mine']['size'], reference['clsSize'])
+    np.testing.assert_array_equal(loader['mine']['eventID'], reference['eventID'])
+    assert 'size' not in Mine.clusterKeys
+
+
+def test_emptyCopy():
+    mine = Mine()
+    mine.clusterKeys['size'] = clusterBranch + 'clsSize'
+    mine.data['clsCharge'] = np.arange(3)
+    mine.gotClusters = True
+    other = mine.emptyCopy()
+    assert other.clusterKeys == mine.clusterKeys and other.clusterKeys is not mine.clusterKeys
+    assert other.data == {} and not other.gotClusters
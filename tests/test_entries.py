@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from conftest import FakeTree, clusterBranch
+from rootable import Rootable
+from rootable.common import TreeView
+
+
+columns = ['clsCharge', 'matrix', 'pdg', 'xPosition']
+
+
+def full(trees) -> Rootable:
+    loader = Rootable()
+    loader.open('a.root')
+    loader.load(columns)
+    return loader
+
+
+def assertRows(loader: Rootable, expected: Rootable, events: np.ndarray) -> None:
+    rows = np.isin(expected['eventNumber'], events)
+    # the event numbers stay the ones of the whole file
+    np.testing.assert_array_equal(loader['eventNumber'], expected['eventNumber'][rows])
+    for key in columns:
+        np.testing.assert_array_equal(loader[key], expected[key][rows])
+
+
+@pytest.mark.parametrize('stepSize', [None, 3])
+def test_entryRange(trees, stepSize):
+    trees['a.root'] = FakeTree(30, seed=0)
+    loader = Rootable()
+    loader.open('a.root', entryStart=5, entryStop=17, stepSize=stepSize)
+    loader.load(columns)
+    assertRows(loader, full(trees), np.arange(5, 17))
+
+
+@pytest.mark.parametrize('stepSize', [None, 2])
+def test_entryList(trees, stepSize):
+    trees['a.root'] = FakeTree(30, seed=1)
+    entries = [28, 3, 4, 11, 3, 20]
+    loader = Rootable()
+    loader.open('a.root', stepSize=stepSize)
+    loader.load(columns, entries=entries)
+    assertRows(loader, full(trees), np.unique(entries))
+
+
+def test_entriesAfterLoading(trees):
+    trees['a.root'] = FakeTree(10, seed=0)
+    loader = Rootable()
+    loader.open('a.root')
+    loader.getClusters()
+    with pytest.raises(ValueError):
+        loader.load(['clsCharge'], entryStart=2)
+
+
+class CountingTree(FakeTree):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.reads = []
+
+    def arrays(self, expressions, library: str = 'np', entry_start: int | None = None, entry_stop: int | None = None, **kwargs) -> dict:
+        self.reads.append((entry_start, entry_stop))
+        return super().arrays(expressions, library, entry_start, entry_stop)
+
+
+def test_viewReadsOnlyTheEntries():
+    tree = CountingTree(3000, seed=2)
+    view = TreeView(tree, entries=[5, 6, 2500, 7])
+    branch = clusterBranch + 'clsCharge'
+    values = view.arrays(branch)[branch]
+    # runs close to each other are read in one go, the far one on its own
+    assert view.num_entries == 4 and sorted(tree.reads) == [(5, 8), (2500, 2501)]
+    assert all(np.array_equal(a, tree.branches[branch][entry]) for a, entry in zip(values, [5, 6, 7, 2500]))
+    with pytest.raises(IndexError):
+        TreeView(tree, entries=[3000])
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from conftest import objectArray
+from rootable.detectors import EtaCorrection
+from rootable.detectors.clustersFromDigits import ClustersFromDigits
+
+
+# a sensor with a few clusters, that share their charge only in v
+sensor = 8480
+uCells = [np.array([10, 10]), np.array([50, 50, 51]), np.array([90]), np.array([130, 130])]
+vCells = [np.array([100, 101]), np.array([200, 201, 200]), np.array([300]), np.array([400, 401])]
+charges = [np.array([30, 10]), np.array([20, 25, 5]), np.array([40]), np.array([12, 12])]
+
+
+def reconstruct(etaCorrection: EtaCorrection | None) -> dict:
+    return ClustersFromDigits()._process(objectArray([np.concatenate(uCells)]), objectArray([np.concatenate(vCells)]),
+                                         objectArray([np.concatenate(charges)]), objectArray([np.full(sum(map(len, charges)), sensor)]),
+                                         etaCorrection=etaCorrection)
+
+
+def test_onlyOneDirection():
+    # the sample clusters are one cell wide in u
+    sample = [0, 3]
+    etaCorrection = EtaCorrection.fromDigits(*(objectArray([column[i] for i in sample]) for column in (charges, uCells, vCells)))
+    assert etaCorrection.uTable is None and etaCorrection.vTable is not None
+    assert np.isnan(etaCorrection.u([0.2, 0.5])).all()
+
+    plain = reconstruct(None)
+    corrected = reconstruct(etaCorrection)
+    # u keeps the center of gravity, v is corrected for the clusters two cells wide in v
+    np.testing.assert_allclose(corrected['uPosition'], plain['uPosition'])
+    twoWide = plain['vSize'] == 2
+    assert np.all(np.isfinite(corrected['vPosition']))
+    assert not np.allclose(corrected['vPosition'][twoWide], plain['vPosition'][twoWide])
+    np.testing.assert_allclose(corrected['vPosition'][~twoWide], plain['vPosition'][~twoWide])
+
+
+def test_noSharedCharge():
+    single = objectArray([np.array([5]), np.array([7])])
+    with pytest.raises(ValueError):
+        EtaCorrection.fromDigits(single, single, single)
+
+
+def test_sameColumnsAsBefore():
+    clusters = reconstruct(None)
+    assert clusters['uCellIDs'].dtype == object and len(clusters['uCellIDs']) == len(uCells)
+    assert sorted(map(len, clusters['cellCharges'])) == sorted(map(len, charges))
+    assert sum(map(np.sum, clusters['cellCharges'])) == sum(map(np.sum, charges))
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from conftest import FakeTree
+from rootable import Rootable
+from rootable.common import EventIndex
+
+
+def test_sortedRowsAreSlices():
+    index = EventIndex([0, 0, 2, 2, 2, 5])
+    assert len(index) == 6
+    assert index.rows(0) == slice(0, 2) and index.rows(2) == slice(2, 5) and index.rows(5) == slice(5, 6)
+    # events without clusters and outside of the table have no rows
+    assert index.rows(1) == slice(2, 2) and index.rows(9) == slice(0, 0) and index.rows(-1) == slice(0, 0)
+    assert index.rowRange(slice(1, 5)) == slice(2, 5)
+    with pytest.raises(ValueError):
+        index.rowRange(slice(0, 5, 2))
+
+
+def test_mixedRowsAreIndices():
+    index = EventIndex([1, 3, 1, 0, 3])
+    np.testing.assert_array_equal(index.rows(1), [0, 2])
+    np.testing.assert_array_equal(index.rows(3), [1, 4])
+    np.testing.assert_array_equal(np.sort(index.rowRange(slice(0, 2))), [0, 2, 3])
+    assert len(index.rows(2)) == 0
+
+
+def test_eventLookup(trees):
+    trees['a.root'] = FakeTree(20, seed=0)
+    trees['b.root'] = FakeTree(20, seed=1)
+    loader = Rootable()
+    loader.open('a.root', 'b.root')
+    loader.load(['clsCharge', 'matrix'])
+    for event in [0, 7, 19, 20, 33, 39, 45]:
+        rows = loader['eventID'] == event
+        clusters = loader.event(event)
+        np.testing.assert_array_equal(clusters['clsCharge'], loader['clsCharge'][rows])
+        np.testing.assert_array_equal(clusters['matrix'], loader['matrix'][rows])
+    # the columns of an event are views into the loaded ones
+    event = int(loader['eventID'][0])
+    assert np.shares_memory(loader.event(event)['matrix'], loader['matrix'])
+    rows = (loader['eventID'] >= 15) & (loader['eventID'] < 25)
+    np.testing.assert_array_equal(loader.events(slice(15, 25))['clsCharge'], loader['clsCharge'][rows])
+
+
+def test_indexFollowsTheRows(trees):
+    trees['a.root'] = FakeTree(30, seed=2)
+    loader = Rootable()
+    loader.open('a.root')
+    loader.load(['clsCharge'])
+    loader.event(0)
+    loader.load(['clsCharge', 'clsSize'], where='clsCharge > 60')
+    for event in range(30):
+        np.testing.assert_array_equal(loader.event(event)['clsCharge'], loader['clsCharge'][loader['eventID'] == event])
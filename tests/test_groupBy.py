@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from conftest import FakeTree
+from rootable import Rootable
+from rootable.common import FancyDict, GroupBy
+
+
+@pytest.fixture
+def loader(trees) -> Rootable:
+    trees['a.root'] = FakeTree(40, seed=0)
+    loader = Rootable()
+    loader.open('a.root')
+    loader.load(['clsCharge', 'clsSize', 'sensorID', 'matrix'])
+    return loader
+
+
+def reference(loader: Rootable, column: str, function) -> dict:
+    groups = {}
+    for event, sensor, value in zip(loader['eventNumber'], loader['sensorID'], loader[column]):
+        groups.setdefault((event, sensor), []).append(value)
+    return {key: function(np.array(values)) for key, values in sorted(groups.items())}
+
+
+def test_agg(loader):
+    result = loader.groupby(['eventNumber', 'sensorID']).agg({'clsCharge': ['sum', 'mean', 'std', 'min'], 'clsSize': 'max'})
+    assert list(result.keys()) == ['eventNumber', 'sensorID', 'clsCharge_sum', 'clsCharge_mean', 'clsCharge_std', 'clsCharge_min', 'clsSize']
+    groups = list(zip(result['eventNumber'], result['sensorID']))
+    for name, column, function in [('clsCharge_sum', 'clsCharge', np.sum), ('clsCharge_mean', 'clsCharge', np.mean), ('clsCharge_std', 'clsCharge', np.std),
+                                   ('clsCharge_min', 'clsCharge', np.min), ('clsSize', 'clsSize', np.max)]:
+        expected = reference(loader, column, function)
+        assert groups == list(expected.keys())
+        np.testing.assert_allclose(result[name], list(expected.values()))
+
+
+def test_aggOfMatrices(loader):
+    result = loader.groupby('eventNumber').agg({'matrix': 'sum'})
+    for event, matrix in zip(result['eventNumber'], result['matrix']):
+        np.testing.assert_array_equal(matrix, loader['matrix'][loader['eventNumber'] == event].sum(axis=0))
+
+
+def test_combinePartials(trees, loader):
+    spec = {'clsCharge': ['mean', 'var', 'count'], 'clsSize': 'sum'}
+    chunked = Rootable()
+    chunked.open('a.root', stepSize=7)
+    partials = [batch.groupby('sensorID').partial(spec) for batch in chunked.iterate('clusters')]
+    assert len(partials) > 1
+    combined = GroupBy.combine(partials, spec)
+    expected = loader.groupby('sensorID').agg(spec)
+    for key in expected.keys():
+        np.testing.assert_allclose(combined[key], expected[key])
+
+
+def test_wrongSpec():
+    data = FancyDict({'a': np.array([1, 1, 2]), 'b': np.array([1., 2., 3.])})
+    with pytest.raises(KeyError):
+        data.groupby('c')
+    with pytest.raises(ValueError):
+        data.groupby('a').agg({'b': 'median'})
+    empty = FancyDict({'a': np.array([], dtype=int), 'b': np.array([])}).groupby('a').agg({'b': 'sum'})
+    assert len(empty['a']) == len(empty['b']) == 0
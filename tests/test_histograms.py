@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from conftest import FakeTree
+from rootable import Rootable
+from rootable.common import Histogram
+
+
+@pytest.mark.parametrize('stepSize', [None, 6])
+@pytest.mark.parametrize('column', ['energy', 'productionVertexX', 'pdg'])
+def test_fillHistogramsReadsTheMCFields(trees, stepSize, column):
+    trees['a.root'] = FakeTree(30, seed=2)
+    loader = Rootable()
+    loader.open('a.root', stepSize=stepSize)
+    histogram, = loader.fillHistograms(Histogram(column, bins=20, ranges=(-3, 3), by='layer'))
+
+    expected = Rootable()
+    expected.open('a.root')
+    expected.load([column, 'layer'])
+    reference = Histogram(column, bins=20, ranges=(-3, 3), by='layer').fill(expected)
+    assert histogram.entries == reference.entries == expected.numClusters
+    for layer, counts in reference.counts.items():
+        np.testing.assert_array_equal(histogram.counts[layer], counts)
+
+
+def test_fillHistogramsAddsToTheGivenFields(trees):
+    trees['a.root'] = FakeTree(30, seed=2)
+    loader = Rootable()
+    loader.open('a.root', stepSize=6)
+    energy, mass = loader.fillHistograms(Histogram('energy', bins=10, ranges=(-3, 3)), Histogram('mass', bins=10, ranges=(-3, 3)), fields=['mass'])
+    assert energy.entries == mass.entries > 0
+
+
+def test_fillLikeNumpy():
+    rng = np.random.default_rng(0)
+    # values right on the edges and outside of the range on top of random ones
+    values = np.concatenate((rng.uniform(-1, 11, 1000), np.linspace(0, 10, 21), [np.nan]))
+    batch = {'clsCharge': values, 'clsSize': rng.uniform(0, 4, len(values)), 'weight': rng.uniform(0, 2, len(values))}
+    histogram = Histogram('clsCharge', bins=20, ranges=(0, 10)).fill(batch)
+    counts, _ = np.histogram(values[np.isfinite(values)], bins=20, range=(0, 10))
+    np.testing.assert_array_equal(histogram[None], counts)
+    assert histogram.entries == len(values) and histogram.outOfRange == len(values) - counts.sum()
+
+    weighted = Histogram(('clsCharge', 'clsSize'), bins=(10, 4), ranges=((0, 10), (0, 4)), weights='weight').fill(batch)
+    valid = np.isfinite(values)
+    counts, *_ = np.histogram2d(values[valid], batch['clsSize'][valid], bins=(10, 4), range=((0, 10), (0, 4)), weights=batch['weight'][valid])
+    np.testing.assert_allclose(weighted[None], counts)
+
+
+def test_mergeSaveAndLoad(trees, tmp_path):
+    trees['a.root'] = FakeTree(30, seed=3)
+    loader = Rootable()
+    loader.open('a.root', stepSize=7)
+    merged = Histogram('clsCharge', bins=25, ranges=(0, 250), by='sensorID')
+    for batch in loader.iterate('clusters'):
+        merged += Histogram('clsCharge', bins=25, ranges=(0, 250), by='sensorID').fill(batch)
+
+    expected = Rootable()
+    expected.open('a.root')
+    expected.getClusters()
+    whole = Histogram('clsCharge', bins=25, ranges=(0, 250), by='sensorID').fill(expected)
+    assert merged.keys() == whole.keys() and merged.entries == whole.entries == expected.numClusters
+    for sensor in whole.keys():
+        np.testing.assert_array_equal(merged[sensor], whole[sensor])
+
+    merged.save(str(tmp_path / 'charge.npz'))
+    loaded = Histogram.load(str(tmp_path / 'charge.npz'))
+    assert loaded.keys() == whole.keys() and loaded.entries == whole.entries
+    np.testing.assert_array_equal(loaded[whole.keys()[0]], whole[whole.keys()[0]])
+    with pytest.raises(ValueError):
+        merged.merge(Histogram('clsCharge', bins=10, ranges=(0, 250), by='sensorID'))
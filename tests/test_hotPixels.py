@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from conftest import FakeTree
+from rootable import Rootable
+from rootable.detectors import OccupancyMap
+
+
+def hotMask(loader: Rootable, rows: np.ndarray) -> np.ndarray:
+    """
+    a mask, that has every pixel of the clusters in rows
+    """
+    panelIDs = OccupancyMap().panelIDs
+    mask = np.zeros((len(panelIDs), 250, 768), dtype=bool)
+    for row in rows:
+        mask[np.searchsorted(panelIDs, loader['sensorID'][row]), loader['uCellIDs'][row], loader['vCellIDs'][row]] = True
+    return mask
+
+
+@pytest.fixture
+def singles(trees) -> tuple:
+    """
+    the unmasked clusters and a mask of the pixels of every second single pixel cluster
+    """
+    trees['a.root'] = FakeTree(40, seed=3)
+    loader = Rootable()
+    loader.open('a.root')
+    loader.getClusters()
+    loader.getDigits()
+    hot = np.flatnonzero(loader['clsSize'] == 1)[::2]
+    return loader, hot, hotMask(loader, hot)
+
+
+@pytest.mark.parametrize('stepSize', [None, 7])
+def test_fullyMaskedClustersKeepTheirRows(trees, singles, stepSize):
+    reference, hot, mask = singles
+    loader = Rootable()
+    loader.open('a.root', hotPixels=mask, stepSize=stepSize)
+    loader.getClusters()
+    loader.getDigits()
+    loader.getMatrices()
+    loader.getShapeFeatures()
+    assert loader.numClusters == reference.numClusters
+    sizes = np.fromiter(map(len, loader['cellCharges']), dtype=int)
+    assert np.all(sizes[hot] == 0)
+    assert np.all(loader['matrix'][hot] == 0)
+    assert np.all(loader['uExtent'][hot] == 0) and np.all(np.isnan(loader['uCoG'][hot]))
+
+    others = np.setdiff1d(np.arange(loader.numClusters), hot)
+    assert np.all(loader['matrix'][others].sum(axis=(1, 2)) == reference['clsCharge'][others])
+    assert np.all(loader['uExtent'][others] > 0)
+
+
+def test_matricesWithoutDigits(trees, singles):
+    _, hot, mask = singles
+    loader = Rootable()
+    loader.open('a.root', hotPixels=mask)
+    loader.load(['matrix', 'clsCharge'], where='uExtent > 0')
+    assert loader.numClusters == len(singles[0]['clsCharge']) - len(hot)
+    assert np.all(loader['matrix'].sum(axis=(1, 2)) == loader['clsCharge'])
+
+
+def test_mcDataOfReconstructedClustersIsMasked(trees):
+    trees['a.root'] = FakeTree(40, seed=4, clusters=False)
+    reference = Rootable()
+    with pytest.warns(UserWarning):
+        reference.open('a.root')
+    reference.getClusters()
+    reference.getDigits()
+    reference.getMCData(fields=['pdg', 'energy'])
+    hot = np.flatnonzero(reference['clsSize'] == 1)[::2]
+    assert len(hot) > 0
+
+    loader = Rootable()
+    with pytest.warns(UserWarning):
+        loader.open('a.root', hotPixels=hotMask(reference, hot))
+    loader.getClusters()
+    loader.getMCData(fields=['pdg', 'energy'])
+    others = np.setdiff1d(np.arange(reference.numClusters), hot)
+    assert loader.numClusters == len(others) == len(loader['pdg'])
+    np.testing.assert_array_equal(loader['clsCharge'], reference['clsCharge'][others])
+    np.testing.assert_array_equal(loader['pdg'], reference['pdg'][others])
+    np.testing.assert_array_equal(loader['energy'], reference['energy'][others])
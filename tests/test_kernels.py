@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+from rootable.common import backend, genCluster, genLadder, extractMatrix
+from rootable.detectors.generateMatrices import GenerateMatrices
+
+
+# the compiled kernels run as plain python without numba, so the numba code paths are
+# compared with the numpy ones here, whether numba is installed or not
+
+
+def onBackend(monkeypatch, name: str, function, *args, **kwargs):
+    monkeypatch.setattr(backend, '_backend', name)
+    return function(*args, **kwargs)
+
+
+def same(first, second) -> bool:
+    if isinstance(first, (list, tuple)):
+        return len(first) == len(second) and all(same(a, b) for a, b in zip(first, second))
+    return np.array_equal(first, second)
+
+
+def randomLadder(seed: int, numClusters: int = 30, size: tuple = (250, 768)) -> tuple:
+    rng = np.random.default_rng(seed)
+    centers = np.column_stack((rng.integers(0, size[0], numClusters), rng.integers(0, size[1], numClusters)))
+    pixels = np.repeat(centers, 6, axis=0) + rng.integers(-2, 3, (6 * numClusters, 2))
+    pixels = np.unique(np.clip(pixels, 0, np.array(size) - 1), axis=0)
+    pixels = pixels[rng.permutation(len(pixels))]
+    # few different charges, so that there are ties for the seed
+    return pixels[:, 0], pixels[:, 1], rng.integers(1, 4, len(pixels))
+
+
+# pixels on the edges and corners of the ladder, a cluster with two equal seeds and a long line
+edgeLadder = (np.array([0, 0, 1, 249, 249, 248, 120, 121, 60, 60, 60, 60, 60, 60, 60, 60, 60, 60, 60, 60]),
+              np.array([0, 1, 0, 767, 766, 767, 400, 400, 100, 101, 102, 103, 104, 105, 106, 107, 108, 109, 110, 111]),
+              np.array([5, 5, 3, 2, 7, 7, 9, 9, 1, 2, 3, 4, 5, 6, 7, 8, 9, 8, 7, 6]))
+
+
+def clusters(uCells, vCells, charges) -> list:
+    return [np.asarray(cluster) for cluster in genCluster(uCells, vCells, charges, size=(250, 768))]
+
+
+@pytest.mark.parametrize('ladder', [randomLadder(0), randomLadder(1, numClusters=200), edgeLadder])
+def test_labelClusters(monkeypatch, ladder):
+    expected = onBackend(monkeypatch, 'numpy', clusters, *ladder)
+    result = onBackend(monkeypatch, 'numba', clusters, *ladder)
+    assert same(expected, result)
+    assert sum(map(len, result)) == len(ladder[0])
+
+
+def test_labelClustersWithoutPixels(monkeypatch):
+    empty = (np.array([], dtype=int),) * 3
+    assert onBackend(monkeypatch, 'numpy', clusters, *empty) == []
+    assert len(onBackend(monkeypatch, 'numba', clusters, *empty)) == 0
+
+
+def windows(ladder: tuple, matrixSize: tuple) -> list:
+    matrixLadder = genLadder(*ladder)
+    return [extractMatrix(matrixLadder, u, v, eventNumber=0, matrixSize=matrixSize) for u, v in zip(ladder[0], ladder[1])]
+
+
+@pytest.mark.parametrize('ladder', [randomLadder(2), randomLadder(3, numClusters=400), edgeLadder])
+@pytest.mark.parametrize('matrixSize', [(9, 9), (3, 5)])
+def test_matrixWindow(monkeypatch, ladder, matrixSize):
+    expected = onBackend(monkeypatch, 'numpy', windows, ladder, matrixSize)
+    result = onBackend(monkeypatch, 'numba', windows, ladder, matrixSize)
+    assert same(expected, result)
+
+
+def test_matrixWindowGrows(monkeypatch):
+    # the line is longer than the window, so there's charge on the border and it grows
+    ladder = (np.full(15, 100), np.arange(300, 315), np.arange(1, 16))
+    expected = onBackend(monkeypatch, 'numpy', windows, ladder, (3, 3))
+    result = onBackend(monkeypatch, 'numba', windows, ladder, (3, 3))
+    assert same(expected, result)
+    assert max(matrix.shape[1] for matrix, *_ in result) > 3
+
+
+def jagged(parts: list) -> np.ndarray:
+    column = np.empty(len(parts), dtype=object)
+    for i, part in enumerate(parts):
+        column[i] = np.asarray(part, dtype=int)
+    return column
+
+
+def digitColumns(seed: int, numClusters: int = 300) -> tuple:
+    rng = np.random.default_rng(seed)
+    # some clusters don't have digits, some are wider than the matrix
+    sizes = rng.integers(0, 14, numClusters)
+    uCells = jagged([rng.integers(10, 25, size) for size in sizes])
+    vCells = jagged([rng.integers(10, 25, size) for size in sizes])
+    charges = jagged([rng.integers(0, 4, size) for size in sizes])
+    return charges, uCells, vCells
+
+
+@pytest.mark.parametrize('order', ['uv', 'vu'])
+@pytest.mark.parametrize('matrixSize', [(9, 9), (5, 5)])
+def test_fillWindows(monkeypatch, order, matrixSize):
+    columns = digitColumns(4)
+    get = lambda: GenerateMatrices().get(*columns, matrixSize=matrixSize, order=order)['matrix']
+    expected = onBackend(monkeypatch, 'numpy', get)
+    result = onBackend(monkeypatch, 'numba', get)
+    np.testing.assert_array_equal(expected, result)
+    empty = np.fromiter(map(len, columns[0]), dtype=int) == 0
+    assert empty.any() and np.all(result[empty] == 0)
+
+
+def test_fillWindowsNonSquare(monkeypatch):
+    columns = digitColumns(5)
+    get = lambda: GenerateMatrices().get(*columns, matrixSize=(3, 7), order='uv')['matrix']
+    np.testing.assert_array_equal(onBackend(monkeypatch, 'numpy', get), onBackend(monkeypatch, 'numba', get))
+
+
+def test_fillWindowsWithoutClusters(monkeypatch):
+    columns = (jagged([]),) * 3
+    for name in ('numpy', 'numba'):
+        assert onBackend(monkeypatch, name, lambda: GenerateMatrices().get(*columns)['matrix']).shape == (0, 9, 9)
@@ -0,0 +1,47 @@
+import numpy as np
+from conftest import FakeTree
+from rootable import Rootable
+from rootable.common import FancyDict, LazyColumns
+
+
+def loaded(trees) -> Rootable:
+    trees['a.root'] = FakeTree(40, seed=0)
+    loader = Rootable()
+    loader.open('a.root')
+    loader.load(['clsCharge', 'clsSize', 'matrix', 'xPosition'])
+    return loader
+
+
+def test_sameRowsAsEager(trees):
+    loader = loaded(trees)
+    eager = loader.where('clsCharge > 40').where('clsSize >= 2')
+    lazy = loader.where('clsCharge > 40', lazy=True).where('clsSize >= 2')
+    assert isinstance(lazy.data, LazyColumns) and lazy.numClusters == eager.numClusters
+    for key in eager.keys():
+        np.testing.assert_array_equal(lazy[key], eager[key])
+    np.testing.assert_array_equal(lazy.compact()['matrix'], eager['matrix'])
+
+
+def test_onlyAccessedColumnsAreCopied(trees):
+    loader = loaded(trees)
+    view = loader.where('clsCharge > 40', lazy=True).where('xPosition > 0')
+    # the conditions only read their own columns, the matrices aren't touched
+    assert 'matrix' not in view.data.materialized
+    view['clsSize']
+    assert set(view.data.materialized) == {'clsSize'}
+    # the view doesn't see the changes of the loaded columns
+    charge = loader['clsCharge'].copy()
+    rows = (charge > 40) & (loader['xPosition'] > 0)
+    loader.pxd.data['clsCharge'] = charge[::-1]
+    np.testing.assert_array_equal(view['clsCharge'], charge[rows])
+
+
+def test_viewOfAView():
+    data = FancyDict({'a': np.arange(10), 'b': np.arange(10) * 2})
+    view = data.where('a > 2', lazy=True)
+    view.data['c'] = view['a'] + 1
+    again = view.where('a < 7')
+    np.testing.assert_array_equal(again['c'], [4, 5, 6, 7])
+    np.testing.assert_array_equal(again['b'], [6, 8, 10, 12])
+    assert again.data.take(0) == {'a': 3, 'b': 6, 'c': 4}
+    np.testing.assert_array_equal(data['a'], np.arange(10))
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from conftest import FakeTree
+from rootable import Rootable
+
+
+@pytest.fixture
+def loader(trees) -> Rootable:
+    trees['a.root'] = FakeTree(20, seed=0)
+    trees['b.root'] = FakeTree(15, seed=1)
+    loader = Rootable()
+    loader.open('a.root', 'b.root')
+    return loader
+
+
+def reference(trees, *stages: str) -> Rootable:
+    loader = Rootable()
+    loader.open('a.root', 'b.root')
+    for stage in stages:
+        getattr(loader, stage)()
+    return loader
+
+
+def test_loadKeepsOnlyTheRequestedColumns(loader):
+    loader.load(['xPosition'])
+    assert set(loader.pxd.keys()) == {'xPosition', 'eventNumber', 'eventID', 'fileIndex'}
+
+
+@pytest.mark.parametrize('second', [['xPosition'], ['layer'], ['uPosition', 'r']])
+def test_loadReadsDroppedClusterColumns(trees, loader, second):
+    loader.load(['clsCharge'])
+    loader.load(second)
+    expected = reference(trees, 'getClusters', 'getCoordinates', 'getSphericals', 'getLayers')
+    for key in second + ['clsCharge']:
+        np.testing.assert_allclose(loader[key], expected[key])
+    assert 'vPosition' not in loader.pxd.data or 'vPosition' in second
+
+
+def test_loadAfterCoordinates(trees, loader):
+    loader.load(['xPosition'])
+    loader.load(['layer'])
+    expected = reference(trees, 'getClusters', 'getCoordinates', 'getLayers')
+    np.testing.assert_array_equal(loader['layer'], expected['layer'])
+    np.testing.assert_allclose(loader['xPosition'], expected['xPosition'])
+
+
+def test_getCoordinatesAfterLoad(trees, loader):
+    loader.load(['clsCharge'])
+    loader.getCoordinates()
+    expected = reference(trees, 'getClusters', 'getCoordinates')
+    np.testing.assert_allclose(loader['zPosition'], expected['zPosition'])
+
+
+@pytest.mark.parametrize('stepSize', [None, 4])
+def test_missingColumnsOnlyForTheRowsLeft(trees, stepSize):
+    trees['a.root'] = FakeTree(20, seed=0)
+    trees['b.root'] = FakeTree(15, seed=1)
+    loader = Rootable()
+    loader.open('a.root', 'b.root', stepSize=stepSize)
+    loader.load(['clsCharge'], where='clsSize > 1')
+    loader.load(['layer'])
+    expected = reference(trees, 'getClusters', 'getLayers')
+    rows = expected['clsSize'] > 1
+    np.testing.assert_array_equal(loader['clsCharge'], expected['clsCharge'][rows])
+    np.testing.assert_array_equal(loader['layer'], expected['layer'][rows])
+
+
+def test_missingColumnsOfReconstructedClusters(trees):
+    trees['a.root'] = FakeTree(20, seed=0, clusters=False)
+    loader = Rootable()
+    with pytest.warns(UserWarning):
+        loader.open('a.root')
+    loader.load(['clsCharge'])
+    loader.load(['xPosition'])
+    expected = Rootable()
+    with pytest.warns(UserWarning):
+        expected.open('a.root')
+    expected.getClusters()
+    expected.getCoordinates()
+    np.testing.assert_allclose(loader['xPosition'], expected['xPosition'])
+
+
+@pytest.mark.parametrize('stage', ['getMatrices', 'getShapeFeatures', 'getCoordinates', 'getSphericals', 'getLayers', 'getMCData'])
+def test_loadingAStageTwice(loader, stage):
+    loader.getClusters()
+    getattr(loader, stage)()
+    with pytest.warns(UserWarning, match='already loaded'):
+        getattr(loader, stage)()
+    assert {len(column) for column in loader.pxd.data.values()} == {loader.numClusters}
+
+
+def test_stagesDroppedByLoadRunAgain(trees, loader):
+    # the coordinates are only an intermediate of the sphericals here
+    loader.load(['r'])
+    assert 'xPosition' not in loader.pxd.data
+    loader.getCoordinates()
+    expected = reference(trees, 'getClusters', 'getCoordinates')
+    np.testing.assert_allclose(loader['xPosition'], expected['xPosition'])
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from conftest import FakeTree
+from rootable import Rootable, mapreduce
+
+
+@pytest.fixture
+def files(trees) -> list:
+    trees['a.root'] = FakeTree(25, seed=0)
+    trees['b.root'] = FakeTree(9, seed=1)
+    trees['c.root'] = FakeTree(16, seed=2)
+    return ['a.root', 'b.root', 'c.root']
+
+
+def expected(files: list) -> tuple:
+    loader = Rootable()
+    loader.open(*files)
+    loader.load(['clsCharge', 'xPosition'])
+    return loader.numClusters, int(loader['clsCharge'].sum()), set(loader['eventID'].tolist())
+
+
+def summary(batch) -> tuple:
+    return len(batch['clsCharge']), int(batch['clsCharge'].sum()), set(batch['eventID'].tolist())
+
+
+def add(first: tuple, second: tuple) -> tuple:
+    return first[0] + second[0], first[1] + second[1], first[2] | second[2]
+
+
+class Flaky:
+    """
+    a map function, that fails the first 'failures' times for every chunk
+    """
+    def __init__(self, failures: int = 1, always: tuple = ()) -> None:
+        self.failures = failures
+        self.always = always
+        self.calls = {}
+
+    def __call__(self, batch) -> tuple:
+        key = (int(batch['fileIndex'][0]), int(batch['eventNumber'][0])) if len(batch['clsCharge']) else None
+        self.calls[key] = self.calls.get(key, 0) + 1
+        if self.calls[key] <= self.failures or key in self.always:
+            raise OSError('the worker lost its connection')
+        return summary(batch)
+
+
+@pytest.mark.parametrize('chunkEvents', [None, 4])
+@pytest.mark.parametrize('threads', [False, True])
+def test_sameAsLoading(files, chunkEvents, threads):
+    executor = ThreadPoolExecutor(3) if threads else None
+    result = mapreduce(files, summary, add, chunkEvents=chunkEvents, columns=['clsCharge', 'xPosition'], executor=executor)
+    assert result == expected(files)
+    result = mapreduce(files, summary, add, chunkEvents=chunkEvents, stages=('clusters', 'coordinates'), executor=executor, initial=(0, 0, set()))
+    assert result == expected(files)
+
+
+@pytest.mark.parametrize('threads', [False, True])
+def test_retries(files, threads):
+    executor = ThreadPoolExecutor(2) if threads else None
+    flaky = Flaky(failures=2)
+    assert mapreduce(files, flaky, add, chunkEvents=5, columns=['clsCharge'], retries=2, executor=executor) == expected(files)
+    with pytest.raises(RuntimeError):
+        mapreduce(files, Flaky(failures=2), add, chunkEvents=5, columns=['clsCharge'], retries=1, executor=executor)
+
+
+def test_checkpoint(files, tmp_path):
+    checkpoint = str(tmp_path / 'run.pickle')
+    # the chunk of the first events of the second file breaks the first run
+    broken = Flaky(failures=0, always=((1, 0),))
+    with pytest.raises(RuntimeError):
+        mapreduce(files, broken, add, chunkEvents=5, columns=['clsCharge'], retries=0, checkpoint=checkpoint)
+    assert (tmp_path / 'run.pickle').exists()
+    finished = {key for key, calls in broken.calls.items() if key != (1, 0)}
+
+    # the second run only does the chunks, that weren't done
+    second = Flaky(failures=0)
+    assert mapreduce(files, second, add, chunkEvents=5, columns=['clsCharge'], checkpoint=checkpoint) == expected(files)
+    assert (1, 0) in second.calls and not finished & set(second.calls)
+    assert mapreduce(files, second, add, chunkEvents=5, columns=['clsCharge'], checkpoint=checkpoint) == expected(files)
+
+
+def test_unknownStage(files):
+    with pytest.raises(ValueError):
+        mapreduce(files, summary, add, stages=('clusters', 'tracks'))
@@ -0,0 +1,94 @@
+import warnings
+import numpy as np
+import pytest
+from conftest import FakeTree, objectArray
+from rootable import Rootable
+from rootable.common import SpillBuffer, Categorical, MemoryBudget
+
+
+def loaded(trees, memoryLimit, *stages: str) -> Rootable:
+    loader = Rootable(memoryLimit=memoryLimit)
+    with warnings.catch_warnings():
+        # without the cluster branches, the clusters are reconstructed with a warning
+        warnings.simplefilter('ignore')
+        loader.open('a.root', 'b.root', stepSize=4)
+    for stage in stages:
+        getattr(loader, stage)()
+    return loader
+
+
+def same(first: Rootable, second: Rootable) -> None:
+    assert first.pxd.keys() == second.pxd.keys()
+    for key in first.pxd.keys():
+        if np.asarray(first[key]).dtype == object:
+            assert all(np.array_equal(a, b) for a, b in zip(first[key], second[key]))
+        else:
+            np.testing.assert_array_equal(first[key], second[key])
+
+
+@pytest.fixture
+def spills(monkeypatch) -> list:
+    """
+    the number of rows of every part, that a SpillBuffer moved to disk
+    """
+    spills = []
+    flush = SpillBuffer._flush
+
+    def counted(self) -> None:
+        spills.append(sum(len(next(iter(part.values()))) for part in self.parts))
+        flush(self)
+    monkeypatch.setattr(SpillBuffer, '_flush', counted)
+    return spills
+
+
+@pytest.mark.parametrize('clusters', [True, False])
+@pytest.mark.parametrize('stages', [('getClusters', 'getDigits', 'getMatrices'), ('getClusters', 'getMatrices', 'getDigits')])
+def test_spilledWhileLoading(trees, spills, clusters, stages):
+    trees['a.root'] = FakeTree(40, seed=0, clusters=clusters)
+    trees['b.root'] = FakeTree(30, seed=1, clusters=clusters)
+    expected = loaded(trees, None, *stages)
+    loader = loaded(trees, 2000, *stages)
+    same(loader, expected)
+    # the chunks went to disk during the stages, not only after them
+    assert len(spills) > 2 and sum(spills) > 0
+    assert isinstance(loader['matrix'], np.memmap)
+    assert MemoryBudget.mapped(loader['cellCharges'][0]) and MemoryBudget.inMemory(loader['cellCharges']) == loader['cellCharges'].nbytes
+
+
+def test_spilledWithSelectedRows(trees, spills):
+    trees['a.root'] = FakeTree(40, seed=0)
+    trees['b.root'] = FakeTree(30, seed=1)
+    expected = Rootable()
+    expected.open('a.root', 'b.root', stepSize=4)
+    expected.load(['matrix', 'clsCharge'], where='clsSize > 1')
+    loader = Rootable(memoryLimit=2000)
+    loader.open('a.root', 'b.root', stepSize=4)
+    loader.load(['matrix', 'clsCharge'], where='clsSize > 1')
+    same(loader, expected)
+    assert spills
+
+
+def test_nothingSpilledBelowTheLimit(trees, spills):
+    trees['a.root'] = FakeTree(20, seed=0)
+    trees['b.root'] = FakeTree(20, seed=1)
+    loader = loaded(trees, '1GB', 'getClusters', 'getDigits')
+    assert not spills and not isinstance(loader['clsCharge'], np.memmap)
+
+
+def test_spillBuffer():
+    budget = Rootable(memoryLimit=100).memoryBudget
+    buffer = SpillBuffer(budget)
+    parts = [{'number': np.arange(start, start + 10),
+              'name': Categorical.fromValues(np.array(['a', 'b'] * 5 if start else ['c'] * 10)),
+              'ragged': objectArray([np.arange(i) for i in range(10)]),
+              'text': np.array([str(i) * (start // 10 + 1) for i in range(10)])} for start in (0, 10, 20)]
+    for part in parts:
+        buffer.add(part)
+    result = buffer.result()
+    assert list(result.keys()) == ['number', 'name', 'ragged', 'text']
+    np.testing.assert_array_equal(result['number'], np.arange(30))
+    assert isinstance(result['number'], np.memmap)
+    assert list(np.asarray(result['name'])) == ['c'] * 10 + ['a', 'b'] * 10
+    assert all(np.array_equal(row, np.arange(i % 10)) for i, row in enumerate(result['ragged']))
+    # strings would be cut to the length of the first part on disk, they stay in memory
+    assert result['text'][-1] == '999'
@@ -0,0 +1,45 @@
+import warnings
+import numpy as np
+import pytest
+from conftest import FakeTree
+from rootable import Rootable
+
+
+files = {'a.root': (20, 0), 'b.root': (7, 1), 'c.root': (15, 2)}
+
+
+def single(fileName: str) -> Rootable:
+    loader = Rootable()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        loader.open(fileName)
+    loader.getClusters()
+    loader.getDigits()
+    return loader
+
+
+@pytest.mark.parametrize('clusters', [True, False])
+@pytest.mark.parametrize('workers', [1, 3])
+@pytest.mark.parametrize('stepSize', [None, 4])
+def test_mergedFiles(trees, clusters, workers, stepSize):
+    for fileName, (numEvents, seed) in files.items():
+        trees[fileName] = FakeTree(numEvents, seed=seed, clusters=clusters)
+    loader = Rootable()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        loader.open(*files, workers=workers, stepSize=stepSize)
+    loader.getClusters()
+    loader.getDigits()
+
+    parts = [single(fileName) for fileName in files]
+    assert loader.numClusters == sum(part.numClusters for part in parts)
+    for key in ['clsCharge', 'uPosition', 'sensorID', 'eventNumber']:
+        np.testing.assert_array_equal(loader[key], np.concatenate([part[key] for part in parts]))
+    assert all(np.array_equal(a, b) for a, b in zip(loader['cellCharges'], [row for part in parts for row in part['cellCharges']]))
+
+    # the event ids go on from file to file, the file index tells the files apart
+    offsets = np.cumsum([0] + [numEvents for numEvents, _ in files.values()])[:-1]
+    np.testing.assert_array_equal(loader['fileIndex'], np.concatenate([np.full(part.numClusters, i) for i, part in enumerate(parts)]))
+    np.testing.assert_array_equal(loader['eventID'], np.concatenate([part['eventNumber'] + offset for part, offset in zip(parts, offsets)]))
+    assert loader.fileRows == [part.numClusters for part in parts]
+
@@ -0,0 +1,88 @@
+import threading
+import numpy as np
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from conftest import FakeTree, clusterBranch
+from rootable import Rootable
+from rootable.common import PrefetchLoader
+
+
+class RecordingTree(FakeTree):
+    """
+    remembers the keyword arguments of every read and can fail at a given chunk
+    """
+    def __init__(self, *args, failAt: int | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.reads = []
+        self.failAt = failAt
+
+    def arrays(self, expressions, library: str = 'np', entry_start: int | None = None, entry_stop: int | None = None, **kwargs) -> dict:
+        if self.failAt is not None and entry_start >= self.failAt:
+            raise OSError('broken basket')
+        self.reads.append((entry_start, entry_stop, kwargs))
+        return super().arrays(expressions, library, entry_start, entry_stop)
+
+
+branches = [clusterBranch + 'clsCharge', clusterBranch + 'sensorID', 'not/a/branch']
+
+
+def test_chunksCoverTheTree():
+    tree = RecordingTree(23, seed=0)
+    loader = PrefetchLoader(tree, branches, stepSize=5)
+    chunks = list(loader)
+    assert len(chunks) == len(loader) == 5
+    assert [(chunk.entryStart, chunk.entryStop) for chunk in chunks] == [(0, 5), (5, 10), (10, 15), (15, 20), (20, 23)]
+    charges = np.concatenate([chunk.arrays(clusterBranch + 'clsCharge')[clusterBranch + 'clsCharge'] for chunk in chunks])
+    assert all(np.array_equal(a, b) for a, b in zip(charges, tree.branches[clusterBranch + 'clsCharge']))
+    # branches, that aren't in the tree, aren't read, the others aren't read ahead
+    with pytest.raises(KeyError):
+        chunks[0].arrays(clusterBranch + 'uSize')
+
+
+def test_decompressionExecutorIsHandedToUproot():
+    tree = RecordingTree(10, seed=0)
+    with ThreadPoolExecutor(2) as executor:
+        list(PrefetchLoader(tree, branches, stepSize=4, decompressionExecutor=executor))
+    assert all(kwargs == {'decompression_executor': executor} for *_, kwargs in tree.reads)
+
+
+def test_readAheadIsBounded():
+    tree = RecordingTree(40, seed=0)
+    chunks = iter(PrefetchLoader(tree, branches, stepSize=2, prefetch=2))
+    next(chunks)
+    threading.Event().wait(0.3)
+    # one chunk is handed out, two wait in the queue and one is held by the reader
+    assert len(tree.reads) <= 4
+    chunks.close()
+
+
+def test_errorsOfTheReaderAreRaised():
+    tree = RecordingTree(20, seed=0, failAt=10)
+    chunks = []
+    with pytest.raises(OSError):
+        for chunk in PrefetchLoader(tree, branches, stepSize=5):
+            chunks.append(chunk)
+    assert len(chunks) == 2
+
+
+def test_stoppingEarlyEndsTheReader():
+    tree = RecordingTree(200, seed=0)
+    before = threading.active_count()
+    for number, chunk in enumerate(PrefetchLoader(tree, branches, stepSize=2, prefetch=1)):
+        if number == 1:
+            break
+    assert threading.active_count() == before
+
+
+@pytest.mark.parametrize('stepSize', [3, 50])
+def test_chunkedLoadingIsTheSame(trees, stepSize):
+    trees['a.root'] = FakeTree(30, seed=4)
+    expected = Rootable()
+    expected.open('a.root')
+    expected.load(['clsCharge', 'matrix', 'pdg'])
+    with ThreadPoolExecutor(2) as executor:
+        loader = Rootable()
+        loader.open('a.root', stepSize=stepSize, prefetch=1, decompressionExecutor=executor)
+        loader.load(['clsCharge', 'matrix', 'pdg'])
+    for key in ['clsCharge', 'matrix', 'pdg', 'eventNumber']:
+        np.testing.assert_array_equal(loader[key], expected[key])
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from conftest import FakeTree
+from rootable import Rootable
+from rootable.common import SpatialIndex
+
+
+def bruteForce(groups: np.ndarray, coordinates: np.ndarray, row: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    the other rows of the same group, sorted by row, and their distances
+    """
+    others = np.nonzero((groups == groups[row]) & (np.arange(len(groups)) != row))[0]
+    return others, np.linalg.norm(coordinates[others] - coordinates[row], axis=1)
+
+
+@pytest.fixture
+def points() -> tuple:
+    rng = np.random.default_rng(0)
+    groups = rng.integers(0, 6, 400)
+    coordinates = rng.uniform(-1, 1, (400, 3))
+    return groups, coordinates
+
+
+@pytest.mark.parametrize('cellSize', [0.05, 0.3, 5.])
+def test_radiusQuery(points, cellSize):
+    groups, coordinates = points
+    index = SpatialIndex([groups], coordinates, cellSize)
+    rows = np.arange(0, 400, 7)
+    neighbours, distances = index.radiusQuery(rows, 0.3, returnDistances=True)
+    for row, found, foundDistances in zip(rows, neighbours, distances):
+        others, otherDistances = bruteForce(groups, coordinates, row)
+        np.testing.assert_array_equal(found, others[otherDistances <= 0.3])
+        np.testing.assert_allclose(foundDistances, otherDistances[otherDistances <= 0.3])
+
+
+def test_nearest(points):
+    groups, coordinates = points
+    # a group with a single cluster has no neighbours
+    groups = np.append(groups, 99)
+    coordinates = np.vstack((coordinates, [[0, 0, 0]]))
+    index = SpatialIndex([groups], coordinates, 0.2)
+    rows = np.array([0, 5, 17, 400])
+    neighbours, distances = index.nearest(rows, k=3)
+    assert neighbours.shape == distances.shape == (4, 3)
+    for row, found, foundDistances in zip(rows[:3], neighbours, distances):
+        others, otherDistances = bruteForce(groups, coordinates, row)
+        np.testing.assert_allclose(foundDistances, np.sort(otherDistances)[:3])
+        np.testing.assert_allclose(np.linalg.norm(coordinates[found] - coordinates[row], axis=1), foundDistances)
+    assert np.all(neighbours[3] == -1) and np.all(np.isinf(distances[3]))
+
+
+def test_queriesOfLoadedClusters(trees):
+    trees['a.root'] = FakeTree(20, seed=1)
+    trees['b.root'] = FakeTree(20, seed=2)
+    loader = Rootable()
+    loader.open('a.root', 'b.root')
+    with pytest.raises(KeyError):
+        loader.radiusQuery([0], 1.)
+    loader.load(['xPosition', 'yPosition', 'zPosition', 'sensorID', 'uPosition', 'vPosition'])
+
+    coordinates = np.stack([loader['xPosition'], loader['yPosition'], loader['zPosition']], axis=1)
+    rows = np.arange(loader.numClusters)
+    for row, found in zip(rows, loader.radiusQuery(rows, 3.)):
+        others, distances = bruteForce(loader['eventID'], coordinates, row)
+        np.testing.assert_array_equal(found, others[distances <= 3.])
+
+    # on the sensors only clusters of the same event and sensor are neighbours
+    groups = loader['eventID'] * 100000 + loader['sensorID']
+    onSensor = np.stack([loader['uPosition'], loader['vPosition']], axis=1)
+    for row, found in zip(rows, loader.radiusQuery(rows, 1., space='uv')):
+        others, distances = bruteForce(groups, onSensor, row)
+        np.testing.assert_array_equal(found, others[distances <= 1.])